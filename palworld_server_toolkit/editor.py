@@ -16,7 +16,7 @@ import importlib.metadata
 import traceback
 from functools import reduce
 import multiprocessing
-import tarfile
+import mmap
 import subprocess
 import logging
 import palworld_coord
@@ -147,6 +147,13 @@ class skip_loading_progress(threading.Thread):
 
 
 class ProgressGvasFile(GvasFile):
+    tracker = None
+
+    @staticmethod
+    def track_changes():
+        """Record the original bytes of the sections for the incremental Save"""
+        return not getattr(args, "reduce_memory", False) and not getattr(args, "full_save", False)
+
     @staticmethod
     def read(
             data: bytes,
@@ -154,7 +161,7 @@ class ProgressGvasFile(GvasFile):
             custom_properties: dict[str, tuple[Callable, Callable]] = {},
             allow_nan: bool = True,
     ) -> "ProgressGvasFile":
-        gvas_file = GvasFile()
+        gvas_file = ProgressGvasFile()
         with FProgressArchiveReader(
                 data,
                 type_hints=type_hints,
@@ -162,6 +169,10 @@ class ProgressGvasFile(GvasFile):
                 allow_nan=allow_nan,
                 reduce_memory=getattr(args, "reduce_memory", False),
                 check_err=getattr(args, "check_file", False),
+                lazy_loading=getattr(args, "lazy_load", False),
+                memory_budget=getattr(args, "memory_budget", None) * 1048576
+                if getattr(args, "memory_budget", None) else None,
+                track_changes=ProgressGvasFile.track_changes(),
         ) as reader:
             skip_loading_progress(reader, len(data)).start()
             gvas_file.header = GvasHeader.read(reader)
@@ -171,8 +182,18 @@ class ProgressGvasFile(GvasFile):
                 print(
                     f"{len(gvas_file.trailer)} bytes of trailer data, file may not have fully parsed"
                 )
+            if reader.planner is not None:
+                reader.planner.report()
+            gvas_file.tracker = reader.tracker
         return gvas_file
 
+    def write(
+            self, custom_properties: dict[str, tuple[Callable, Callable]] = {}
+    ) -> bytes:
+        if self.tracker is None:
+            return super().write(custom_properties)
+        return self.tracker.write(self, custom_properties)
+
 
 def parse_item(properties, skip_path):
     if isinstance(properties, dict):
@@ -288,6 +309,55 @@ def main():
         action="store_true",
         help="Check error on the file",
     )
+    parser.add_argument(
+        "--lazy-load",
+        "-l",
+        action="store_true",
+        help="Only index the worldSaveData on load, decode each section on first access",
+    )
+    parser.add_argument(
+        "--snapshot",
+        "-s",
+        action="store_true",
+        help="Load the decoded save from <filename>.snapshot when the file unchanged, otherwise create it, "
+             "only with --full-save or --reduce-memory as the snapshot has no original bytes for the incremental Save",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the decompressed GVAS cache",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Decompressed GVAS cache directory (default: {GvasFileCache.DefaultCacheDir})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=4096,
+        help="Max size of decompressed GVAS cache in MB (default: 4096)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        help="Memory budget in MB for loading, large sections over the budget are decoded on first access "
+             "(default: no budget, multiprocess decode when over 4 GB memory remains)",
+    )
+    parser.add_argument(
+        "--full-save",
+        action="store_true",
+        help="Re-encode the whole save on Save instead of re-using the original bytes of untouched sections",
+    )
+    parser.add_argument(
+        "--compress-threads",
+        type=int,
+        help="Threads for compressing the saved file, 1 for single thread zlib (default: CPU count)",
+    )
+    parser.add_argument(
+        "--snapshot-chain",
+        action="store_true",
+        help="Also keep the backed up Level.sav as a delta snapshot in backup/chain",
+    )
     parser.add_argument(
         "--dot",
         "-d",
@@ -323,6 +393,10 @@ def main():
         log.fatal(f"{args.filename} is not a file")
         exit(1)
 
+    if DecodeWorkerPool.capable(getattr(args, "reduce_memory", False)):
+        # Start decode workers before loading, so they do not inherit the decoded save
+        DecodeWorkerPool.get()
+
     t1 = time.time()
     try:
         LoadFile(args.filename)
@@ -374,6 +448,8 @@ def main():
         print("               dry_run=False)                - Wipe player data from save")
         print("                                               InstanceId: delete specified InstanceId")
         print("                                               dry_run: only show how to delete")
+        print("  BatchDeletePlayers(uids, dry_run=False)    - Wipe several players in one pass, e.g.")
+        print("                                               BatchDeletePlayers(FindInactivePlayer(30))")
         print("  DeleteGuild(gid)                           - Delete Guild")
         print("  DeleteBaseCamp(base_id)                    - Delete Guild Base Camp")
         print("  EditPlayer(uid)                            - Allocate player base meta data to variable 'player'")
@@ -387,13 +463,27 @@ def main():
         print("                                             - Copy the basecamp base_id to new guild group id ")
         print("  BatchDeleteUnreferencedItemContainers()    - Delete Unref Item")
         print("  FixBrokenDamageRefContainer()              - Delete Damage Object")
+        print("  ShowNearby(x, y, radius=None, k=10)        - Show the map objects and base camps near a map point,")
+        print("                                               the k nearest or all within radius, in map units")
+        print("  DeleteMapObjectsInRange(x, y, radius,      ")
+        print("                          dry_run=False)     - Delete the map objects within radius of a map point")
+        print("  ShowOverlappingBaseCamps()                 - Show the base camps with overlapping areas")
         print("  CleanupWorkerSick()                        - Cleanup WorkerSick flags for all Pals")
         print("  Statistics()                               - Counting wsd block data size")
+        print("  BenchmarkCompress(threads=None)            - Benchmark the save compressors")
+        print("  ListBackups()                              - List the backups in backup/store")
+        print("  RestoreBackup(name, target_dir=None)       - Restore the files of a backup, default to backup/restore/<name>")
+        print("  SnapshotSave(filename=None)                - Append the Level.sav to the delta snapshot chain")
+        print("  WatchSnapshots(filename=None, interval=60) - Append each new version of Level.sav to the snapshot chain")
+        print("  ListSnapshots(filename=None)               - List the versions in the snapshot chain")
+        print("  OpenSnapshot(name)                         - Open a snapshot version as backup_wsd like OpenBackup")
+        print("  MaterializeSnapshot(name, output=None)     - Rebuild a snapshot version to a Sav file")
         print("  Save()                                     - Save the file and exit")
         print()
         print("Advance feature:")
         print("  search_key(wsd, '<value>')                 - Locate the key in the structure")
         print("  search_values(wsd, '<value>')              - Locate the value in the structure")
+        print("  ShowReferences(guid)                       - Show the entries defining and referring the GUID")
         print("  PrettyPrint(value)                         - Use XML format to show the value")
     elif modify_to_file:
         Save()
@@ -1339,8 +1429,12 @@ try:
                 else:
                     item_list[itemCodeName] = f"{item_list[itemCodeName]}: {itemCodeName}"
             self.item_container_vars = []
-            item_container = parse_item(
-                MappingCache.ItemContainerSaveData[self.item_container_id], "ItemContainerSaveData")
+            entry_index = MappingCache.GetSkipEntryIndex("ItemContainerSaveData")
+            if entry_index is not None:
+                item_container = entry_index.decode(self.item_container_id)
+            else:
+                item_container = parse_item(
+                    MappingCache.ItemContainerSaveData[self.item_container_id], "ItemContainerSaveData")
             self.item_containers = [{
                 'SlotIndex': item['SlotIndex'],
                 'ItemId': item['ItemId']['value']['StaticId'],
@@ -1357,6 +1451,9 @@ try:
         def savedata(self):
             for idx, item in enumerate(self.item_containers):
                 self.save(self.item_containers[idx], self.item_container_vars[idx])
+            entry_index = MappingCache.GetSkipEntryIndex("ItemContainerSaveData")
+            if entry_index is not None and self.item_container_id in entry_index.decoded:
+                entry_index.commit([self.item_container_id])
             self.destroy()
 
 
@@ -1382,24 +1479,16 @@ try:
         def savedata(self):
             self.save(self.player, self.gui_attribute)
             backup_file(self.player_sav_file, True)
-            with open(self.player_sav_file, "wb") as f:
-                if "Pal.PalWorldSaveGame" in self.player_gvas_file.header.save_game_class_name or \
-                        "Pal.PalLocalWorldSaveGame" in self.player_gvas_file.header.save_game_class_name:
-                    save_type = 0x32
-                else:
-                    save_type = 0x31
-                sav_file = compress_gvas_to_sav(self.player_gvas_file.write(PALWORLD_CUSTOM_PROPERTIES), save_type)
-                f.write(sav_file)
+            write_sav_file(self.player_gvas_file, self.player_sav_file, PALWORLD_CUSTOM_PROPERTIES)
             self.destroy()
 
 
     class PlayerEditGUI(ParamEditor):
         def __init__(self, player_uid=None, instanceId=None):
             super().__init__()
-            self.player = MappingCache.CharacterSaveParameterMap[
-                playerMapping[player_uid]['InstanceId'] if instanceId is None else toUUID(instanceId)]['value'][
-                'RawData'][
-                'value']['object']['SaveParameter']['value']
+            self.character = MappingCache.CharacterSaveParameterMap[
+                playerMapping[player_uid]['InstanceId'] if instanceId is None else toUUID(instanceId)]
+            self.player = self.character['value']['RawData']['value']['object']['SaveParameter']['value']
             self.gui.title(
                 "Player Edit - %s" % player_uid if player_uid is not None else "Character Edit - %s" % instanceId)
             self.gui_attribute = {}
@@ -1411,7 +1500,9 @@ try:
             self.autosize()
 
         def savedata(self):
-            self.save(self.player, self.gui_attribute)
+            # owner and container fields edited here are keys of the character indexes
+            with MappingCache.Updating('CharacterSaveParameterMap', self.character):
+                self.save(self.player, self.gui_attribute)
             self.destroy()
 
 
@@ -1461,9 +1552,11 @@ try:
 
         def savedata(self):
             self.save(self.group_data, self.gui_attribute)
-            group_data = MappingCache.GuildSaveDataMap[self.group_id]['value']['RawData']['value']
-            for attr in self.group_data:
-                group_data[attr] = self.group_data[attr]['value']
+            group = MappingCache.GuildSaveDataMap[self.group_id]
+            group_data = group['value']['RawData']['value']
+            with MappingCache.Updating('GroupSaveDataMap', group):
+                for attr in self.group_data:
+                    group_data[attr] = self.group_data[attr]['value']
             self.destroy()
 
 except NameError:
@@ -1481,7 +1574,7 @@ try:
                 'gvas_file': gvas_file,
                 'properties': gvas_file.properties
             }
-            paldata = self.data['properties']['worldSaveData']['value']['CharacterSaveParameterMap']['value']
+            paldata = MappingCache.SectionValues('CharacterSaveParameterMap')
             self.palguidmanager = PalInfo.PalGuid(self.data)
             self.loadpal(paldata)
 
@@ -1642,7 +1735,8 @@ class GUI():
             messagebox.showerror("Migrate Error", "\n".join(traceback.format_exception(e)))
 
     def open_file(self):
-        bk_f = filedialog.askopenfilename(filetypes=[("Level.sav file", "*.sav")], title="Open Level.sav")
+        bk_f = filedialog.askopenfilename(filetypes=[("Level.sav file", "*.sav"),
+                                                     ("Snapshot", "*.key *.delta")], title="Open Level.sav")
         if bk_f:
             self.status('loading')
             if self.data_source.current() == 0:
@@ -1748,6 +1842,13 @@ class GUI():
         return False
 
     def load_instances(self, specified_parent=None):
+        if specified_parent is not None:
+            self.target_instance['value'] = sorted([
+                "%s - %s" % (str(character['key']['InstanceId']['value']), self.characterInstanceName(character))
+                for character in MappingCache.EntriesOf('CharactersByOwner', toUUID(specified_parent))
+                if self.isCharacterRelativeToUID(character, specified_parent)
+            ])
+            return
         self.target_instance['value'] = sorted([
             "%s - %s" % (str(k), self.characterInstanceName(MappingCache.CharacterSaveParameterMap[k]))
             for k in
@@ -1757,7 +1858,7 @@ class GUI():
 
     def load_guilds(self):
         guild_list = []
-        for group_data in wsd['GroupSaveDataMap']['value']:
+        for group_data in MappingCache.SectionValues('GroupSaveDataMap'):
             if str(group_data['value']['GroupType']['value']['value']) == "EPalGroupType::Guild":
                 group_info = group_data['value']['RawData']['value']
                 guild_list.append("%s - %s" % (group_info['group_id'], group_info['guild_name']))
@@ -1887,7 +1988,7 @@ class GUI():
             return None
 
         target_guild = None
-        for group_data in wsd['GroupSaveDataMap']['value']:
+        for group_data in MappingCache.SectionValues('GroupSaveDataMap'):
             if str(group_data['value']['GroupType']['value']['value']) == "EPalGroupType::Guild":
                 group_info = group_data['value']['RawData']['value']
                 if group_info['group_id'] == target_guild_uuid:
@@ -2080,6 +2181,8 @@ class GUI():
         paledit.load_i18n(self.language)
         paledit.load(None)
         paledit.mainloop()
+        # PalEdit writes owners and slots into the characters without Updating
+        MappingCache.Invalidate('CharacterSaveParameterMap')
         self.status('done')
 
     def delete_base(self):
@@ -2183,7 +2286,7 @@ class GUI():
             self.target_base.set("ERROR")
             return None
         self.target_base.set("")
-        groupMapping = {str(group['key']): group for group in wsd['GroupSaveDataMap']['value']}
+        groupMapping = {str(group['key']): group for group in MappingCache.SectionValues('GroupSaveDataMap')}
         if target_guild_uuid in groupMapping:
             self.target_base['value'] = [str(x) for x in
                                          groupMapping[target_guild_uuid]['value']['RawData']['value']['base_ids']]
@@ -2308,10 +2411,7 @@ class GUI():
                                                                                                        "%d" % len(
                                                                                                            players)),
                                                type=messagebox.YESNO):
-                for idx, player_id in enumerate(players):
-                    self.progressbar['value'] = 100 * idx / len(players)
-                    self.gui.update()
-                    DeletePlayer(player_id)
+                BatchDeletePlayers(players)
                 self.progressbar['value'] = 100
                 self.gui.update()
                 self.load_players()
@@ -2659,36 +2759,80 @@ class GUI():
 
 def DumpSavDecompressData(filename):
     with open(filename, "rb") as f:
-        data = f.read()
-        raw_gvas, _ = decompress_sav_to_gvas(data)
+        raw_gvas, _ = decompress_sav_to_mmap(f, filename + ".raw")
+    if isinstance(raw_gvas, mmap.mmap):
+        raw_gvas.flush()
+        raw_gvas.close()
+
+
+def decompress_sav_file(filename, fingerprint=None):
+    start_time = time.time()
+    if SnapshotChain.is_entry_file(filename):
+        raw_gvas, save_type = SnapshotChain.open_entry_file(filename)
+        cache_hit = False
+    elif getattr(args, "no_cache", False):
+        with open(filename, "rb") as f:
+            raw_gvas, save_type = decompress_sav_to_mmap(f)
+        cache_hit = False
+    else:
+        cache = GvasFileCache(getattr(args, "cache_dir", None), getattr(args, "cache_size", 4096) * 1048576)
+        raw_gvas, save_type, cache_hit = cache.open(filename, fingerprint)
+    elapsed = max(time.time() - start_time, 1e-6)
+    if cache_hit:
+        print("Done in %.2fs (cached)." % elapsed)
+    else:
+        print("Done in %.2fs (%.1f MB/s)." % (elapsed, len(raw_gvas) / 1048576 / elapsed))
+    return raw_gvas, save_type
 
-    with open(filename + ".raw", "wb") as f:
-        f.write(raw_gvas)
+
+def read_gvas_file(filename):
+    snapshot_key = None
+    if getattr(args, "snapshot", False) and ProgressGvasFile.track_changes():
+        # the snapshot is fully decoded without the section offsets of the source, Save would re-encode everything
+        log.warning("Snapshot is not used with the incremental Save, add --full-save to load from the snapshot")
+    elif getattr(args, "snapshot", False):
+        print(f"Loading snapshot of {filename}...", end="", flush=True)
+        start_time = time.time()
+        snapshot_key = GvasFileCache.fingerprint(filename)
+        _gvas_file = GvasSnapshot.load(filename + ".snapshot", snapshot_key)
+        if _gvas_file is not None:
+            print("Done in %.2fs." % (time.time() - start_time))
+            return _gvas_file
+        print("Not found")
+
+    print(f"Loading {filename}...", end="", flush=True)
+    raw_gvas, _ = decompress_sav_file(filename, snapshot_key)
+
+    print(f"Parsing {filename}...", end="", flush=True)
+    start_time = time.time()
+    _gvas_file = ProgressGvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, SKP_PALWORLD_CUSTOM_PROPERTIES)
+    print("Done in %.2fs." % (time.time() - start_time))
+    DecodeWorkerPool.print_stats()
+
+    if snapshot_key is not None:
+        print(f"Saving snapshot to {filename}.snapshot...", end="", flush=True)
+        start_time = time.time()
+        try:
+            GvasSnapshot.save(filename + ".snapshot", _gvas_file, snapshot_key)
+            print("Done in %.2fs." % (time.time() - start_time))
+        except Exception as e:
+            log.warning(f"Save snapshot failed: {e}")
+    return _gvas_file
 
 
 def LoadFile(filename):
     global filetime, gvas_file, wsd, MappingCache, backup_path
-    print(f"Loading {filename}...", end="", flush=True)
     filetime = os.stat(filename).st_mtime
     backup_path = os.path.join(os.path.dirname(os.path.abspath(filename)),
                                "backup/%s" % datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
-    with open(filename, "rb") as f:
-        # Read the file
-        start_time = time.time()
-        data = f.read()
-        raw_gvas, _ = decompress_sav_to_gvas(data)
-        print("Done in %.2fs." % (time.time() - start_time))
-
-        print(f"Parsing {filename}...", end="", flush=True)
-        start_time = time.time()
-        gvas_file = ProgressGvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, SKP_PALWORLD_CUSTOM_PROPERTIES)
-        print("Done in %.2fs." % (time.time() - start_time))
+    gvas_file = read_gvas_file(filename)
 
     wsd = gvas_file.properties['worldSaveData']['value']
     MappingCache = MappingCacheObject.get(wsd, use_mp=not getattr(args, "reduce_memory", False))
 
 
 def Statistics():
+    MappingCache.Compact()
     for key in wsd:
         val_type = "Bytes" if isinstance(wsd[key]['value'], bytes) else "Keys "
         vals = len(wsd[key]['value'])
@@ -2701,7 +2845,26 @@ def Statistics():
                                                vals))
 
 
-def GetPlayerGvas(player_uid, src_file=None):
+# player save properties of the container reference scans
+PLAYER_CONTAINER_PATHS = ["SaveData.PlayerUId", "SaveData.IndividualId", "SaveData.OtomoCharacterContainerId",
+                          "SaveData.PalStorageContainerId"] + \
+                         ["SaveData.InventoryInfo.%s" % key for key in
+                          ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
+                           'PlayerEquipArmorContainerId', 'WeaponLoadOutContainerId']]
+
+
+def LoadPlayerSaves(src_file=None, paths=None):
+    """Decode the changed player saves of the Players directory into the session cache in parallel"""
+    players_dir = os.path.dirname(os.path.abspath(args.filename if src_file is None else src_file)) + "/Players"
+    return PlayerSaveCache.get().LoadDirectory(players_dir, use_mp=not getattr(args, "reduce_memory", False),
+                                               paths=paths)
+
+
+def GetPlayerGvas(player_uid, src_file=None, cached=False, paths=None):
+    """
+    cached: return the GvasFile shared by the session player save cache, only for callers which do not modify it
+    paths: decode only these property paths of the player save, e.g. PLAYER_CONTAINER_PATHS, implies cached
+    """
     player_sav_rel = "/Players/" + str(player_uid).upper().replace("-", "") + ".sav"
     player_sav_file = os.path.dirname(os.path.abspath(args.filename)) + player_sav_rel
     if src_file is not None:
@@ -2710,9 +2873,10 @@ def GetPlayerGvas(player_uid, src_file=None):
     if not os.path.exists(player_sav_file):
         return player_sav_file, None, player_sav_file, None
 
-    with open(player_sav_file, "rb") as f:
-        raw_gvas, _ = decompress_sav_to_gvas(f.read())
-        player_gvas_file = GvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES)
+    if cached or paths is not None:
+        player_gvas_file = PlayerSaveCache.get().Get(player_sav_file, paths)
+    else:
+        player_gvas_file = decode_player_sav(player_sav_file)[2]
     player_gvas = player_gvas_file.properties['SaveData']['value']
 
     return None, player_gvas, player_sav_file, player_gvas_file
@@ -2720,7 +2884,7 @@ def GetPlayerGvas(player_uid, src_file=None):
 
 def EditPlayer(player_uid):
     global player
-    for item in wsd['CharacterSaveParameterMap']['value']:
+    for item in MappingCache.SectionValues('CharacterSaveParameterMap'):
         if str(item['key']['PlayerUId']['value']) == player_uid:
             player = item['value']['RawData']['value']['object']['SaveParameter']['value']
             print("Player has allocated to 'player' variable, you can use player['Property']['value'] = xxx to modify")
@@ -2751,7 +2915,7 @@ def RenamePlayer(player_uid, new_name):
 def GetPlayerItems(player_uid):
     load_skipped_decode(wsd, ["ItemContainerSaveData"])
     item_containers = {}
-    for item_container in wsd["ItemContainerSaveData"]['value']:
+    for item_container in MappingCache.SectionValues('ItemContainerSaveData'):
         item_containers[str(item_container['key']['ID']['value'])] = [{
             'ItemId': x['ItemId']['value']['StaticId']['value'],
             'SlotIndex': x['SlotIndex']['value'],
@@ -2773,17 +2937,8 @@ def GetPlayerItems(player_uid):
 
 def OpenBackup(filename):
     global backup_gvas_file, backup_wsd, backup_file_path
-    print(f"Loading {filename}...")
     backup_file_path = filename
-    with open(filename, "rb") as f:
-        # Read the file
-        data = f.read()
-        raw_gvas, _ = decompress_sav_to_gvas(data)
-
-        print(f"Parsing {filename}...", end="", flush=True)
-        start_time = time.time()
-        backup_gvas_file = ProgressGvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, SKP_PALWORLD_CUSTOM_PROPERTIES)
-        print("Done in %.2fs." % (time.time() - start_time))
+    backup_gvas_file = read_gvas_file(filename)
     backup_wsd = backup_gvas_file.properties['worldSaveData']['value']
     ShowPlayers(backup_wsd)
     ShowGuild(backup_wsd)
@@ -2828,7 +2983,7 @@ def CopyItemContainers(src_containers, targetInstanceId):
     load_skipped_decode(wsd, ['ItemContainerSaveData'], False)
     new_containers = parse_item(copy.deepcopy(src_containers), "ItemContainerSaveData")
     new_containers['key']['ID']['value'] = targetInstanceId
-    wsd['ItemContainerSaveData']['value'].append(new_containers)
+    MappingCache.InsertEntry('ItemContainerSaveData', new_containers)
 
 
 def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
@@ -2854,7 +3009,6 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
     while new_player_uid in MappingCache.PlayerIdMapping:
         DeletePlayer(new_player_uid,
                      InstanceId=MappingCache.PlayerIdMapping[new_player_uid]['key']['InstanceId']['value'])
-        MappingCache.LoadCharacterSaveParameterMap()
 
     player_uid = player_gvas['PlayerUId']['value']
     if player_uid not in srcMappingCache.PlayerIdMapping:
@@ -2869,18 +3023,20 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
         log.info(
             f"{tcl(36)}Player {tcl(32)} {str(new_player_uid)} {tcl(31)} exists, update new player information {tcl(0)}")
         userInstance = MappingCache.PlayerIdMapping[new_player_uid]
-        if not dry_run:
-            userInstance['value'] = copy.deepcopy(srcMappingCache.PlayerIdMapping[player_uid])['value']
+        with MappingCache.Updating('CharacterSaveParameterMap', userInstance):
+            if not dry_run:
+                userInstance['value'] = copy.deepcopy(srcMappingCache.PlayerIdMapping[player_uid])['value']
+            userInstance['key']['PlayerUId']['value'] = new_player_uid
+            userInstance['key']['InstanceId']['value'] = player_gvas['IndividualId']['value']['InstanceId']['value']
     else:
         userInstance = copy.deepcopy(srcMappingCache.PlayerIdMapping[player_uid])
         log.info(
             f"{tcl(36)}Copy Player {tcl(32)} {str(new_player_uid)} %s {tcl(31)} {tcl(0)}" %
             userInstance['value']['RawData']['value']['object']['SaveParameter']['value']['NickName']['value'])
+        userInstance['key']['PlayerUId']['value'] = new_player_uid
+        userInstance['key']['InstanceId']['value'] = player_gvas['IndividualId']['value']['InstanceId']['value']
         if not dry_run:
-            wsd['CharacterSaveParameterMap']['value'].append(userInstance)
-
-    userInstance['key']['PlayerUId']['value'] = new_player_uid
-    userInstance['key']['InstanceId']['value'] = player_gvas['IndividualId']['value']['InstanceId']['value']
+            MappingCache.InsertEntry('CharacterSaveParameterMap', userInstance)
     instances.append(
         {'guid': new_player_uid, 'instance_id': player_gvas['IndividualId']['value']['InstanceId']['value']})
 
@@ -2893,14 +3049,15 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
         log.info(f"{tcl(32)}Copy User {tcl(93)} %s {tcl(0)}  to Guild{tcl(0)} {tcl(32)} %s {tcl(0)}  UUID %s" % (
             userInstance['value']['RawData']['value']['object']['SaveParameter']['value']['NickName']['value'],
             item['guild_name'], item['group_id']))
-        item['players'].append({
-            'player_uid': new_player_uid,
-            "player_info": {
-                'last_online_real_time': 0,
-                'player_name':
-                    userInstance['value']['RawData']['value']['object']['SaveParameter']['value']['NickName']['value']
-            }
-        })
+        with MappingCache.Updating('GroupSaveDataMap', player_group):
+            item['players'].append({
+                'player_uid': new_player_uid,
+                "player_info": {
+                    'last_online_real_time': 0,
+                    'player_name':
+                        userInstance['value']['RawData']['value']['object']['SaveParameter']['value']['NickName']['value']
+                }
+            })
     if player_group is None:
         src_player_group = srcMappingCache.GuildSaveDataMap[group_id]
         player_group = PalObject.GroupSaveData(group_id, src_player_group['value']['RawData']['value']['guild_name'],
@@ -2909,7 +3066,7 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
                                                    'value']['NickName']['value'])
         log.info(f"{tcl(32)}Create Guild{tcl(0)} Group ID [{tcl(92)}%s{tcl(0)}]" % (str(player_group['key'])))
         if not dry_run:
-            wsd['GroupSaveDataMap']['value'].append(player_group)
+            MappingCache.InsertEntry('GroupSaveDataMap', player_group)
 
     for idx_key in ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
                     'PlayerEquipArmorContainerId', 'WeaponLoadOutContainerId']:
@@ -2940,8 +3097,7 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
                     log.info(
                         f"{tcl(32)}  Copy DynamicItemContainer  {tcl(33)} {str(dynamicItemId)}{tcl(0)}  Item {tcl(32)} {slotItem['ItemId']['value']['StaticId']['value']} {tcl(0)}")
                     if not dry_run:
-                        wsd['DynamicItemSaveData']['value']['values'].append(
-                            srcMappingCache.DynamicItemSaveData[dynamicItemId])
+                        MappingCache.InsertEntry('DynamicItemSaveData', srcMappingCache.DynamicItemSaveData[dynamicItemId])
             dynamicItemIds = list(filter(lambda x: str(x) != PalObject.EmptyUUID,
                                          [x['ItemId']['value']['DynamicId']['value']['LocalIdInCreatedWorld'][
                                               'value'] for x in
@@ -2950,7 +3106,7 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
                 log.info(f"  {tcl(33)}Dynamic IDS: {tcl(0)} %s" % ",".join(
                     [str(x) for x in dynamicItemIds]))
             if not dry_run:
-                wsd['ItemContainerSaveData']['value'].append(new_item)
+                MappingCache.InsertEntry('ItemContainerSaveData', new_item)
 
     # Clone Item from CharacterContainerSaveData
     for idx_key in ['OtomoCharacterContainerId', 'PalStorageContainerId']:
@@ -2969,20 +3125,17 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
             for pal_id in copied_pals:
                 character = MappingCache.CharacterSaveParameterMap[pal_id]
                 characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
-                characterData['OwnerPlayerUId']['value'] = player_gvas['PlayerUId']['value']
-                characterData['OldOwnerPlayerUIds']['value']['values'] = [
-                    new_player_uid
-                ]
+                with MappingCache.Updating('CharacterSaveParameterMap', character):
+                    characterData['OwnerPlayerUId']['value'] = player_gvas['PlayerUId']['value']
+                    characterData['OldOwnerPlayerUIds']['value']['values'] = [
+                        new_player_uid
+                    ]
                 log.info(f"  {tcl(32)}Copy Pal{tcl(0)}  UUID: {tcl(33)}{pal_id}{tcl(0)}  CharacterID: %s" % (
                     characterData['CharacterID']['value']))
 
-    player_group['value']['RawData']['value']['individual_character_handle_ids'] += instances
-    MappingCache.LoadItemContainerMaps()
-    MappingCache.LoadCharacterSaveParameterMap()
-    MappingCache.LoadCharacterContainerMaps()
-    MappingCache.LoadGroupSaveDataMap()
-    MappingCache.LoadGuildInstanceMapping()
     if not dry_run:
+        with MappingCache.Updating('GroupSaveDataMap', player_group):
+            player_group['value']['RawData']['value']['individual_character_handle_ids'] += instances
         if id(old_wsd) != id(wsd) and player_uid not in MappingCache.PlayerIdMapping:
             backup_file(player_sav_file, True)
             if os.path.dirname(player_sav_file) == os.path.dirname(new_player_sav_file):
@@ -2990,14 +3143,8 @@ def CopyPlayer(player_uid, new_player_uid, old_wsd, dry_run=False):
         if new_player_sav_file in delete_files:
             delete_files.remove(new_player_sav_file)
         backup_file(new_player_sav_file, True)
-        with open(new_player_sav_file, "wb") as f:
-            log.info("Saving new player sav %s" % (new_player_sav_file))
-            if "Pal.PalWorldSaveGame" in player_gvas_file.header.save_game_class_name or "Pal.PalLocalWorldSaveGame" in player_gvas_file.header.save_game_class_name:
-                save_type = 0x32
-            else:
-                save_type = 0x31
-            sav_file = compress_gvas_to_sav(player_gvas_file.write(PALWORLD_CUSTOM_PROPERTIES), save_type)
-            f.write(sav_file)
+        log.info("Saving new player sav %s" % (new_player_sav_file))
+        write_sav_file(player_gvas_file, new_player_sav_file, PALWORLD_CUSTOM_PROPERTIES)
         RepairPlayer(new_player_uid)
 
 
@@ -3012,7 +3159,8 @@ def MoveToGuild(player_uid, group_id):
     remove_instance_ids = []
     playerInstance = None
 
-    for item in wsd['CharacterSaveParameterMap']['value']:
+    for item in MappingCache.EntriesOf('PlayersByUId', player_uid) + \
+            MappingCache.EntriesOf('CharactersByOwner', player_uid):
         player = item['value']['RawData']['value']['object']['SaveParameter']['value']
         if item['key']['PlayerUId']['value'] == player_uid and 'IsPlayer' in player and player['IsPlayer']['value']:
             playerInstance = player
@@ -3028,7 +3176,8 @@ def MoveToGuild(player_uid, group_id):
             })
             remove_instance_ids.append(item['key']['InstanceId']['value'])
 
-    for _group_id in MappingCache.GroupSaveDataMap:
+    # DeleteGuild drops the emptied guilds from the index while walking it
+    for _group_id in list(MappingCache.GroupSaveDataMap):
         group_data = parse_item(MappingCache.GroupSaveDataMap[_group_id], "GroupSaveDataMap")
         if group_data['value']['GroupType']['value']['value'] == "EPalGroupType::Guild":
             group_info = group_data['value']['RawData']['value']
@@ -3040,11 +3189,14 @@ def MoveToGuild(player_uid, group_id):
                         f"{tcl(31)}Delete player {tcl(93)} %s {tcl(31)} on guild {tcl(93)} %s {tcl(0)} [{tcl(92)} %s {tcl(0)}] " % (
                             g_player['player_info']['player_name'], group_info['guild_name'], group_info['group_id']))
 
-            for g_player in delete_g_players:
-                group_info['players'].remove(g_player)
+            if len(delete_g_players) > 0:
+                with MappingCache.Updating('GroupSaveDataMap', group_data):
+                    for g_player in delete_g_players:
+                        group_info['players'].remove(g_player)
 
             if len(group_info['players']) == 0 and group_info['group_id'] != toUUID(group_id):
                 DeleteGuild(group_info['group_id'])
+                continue
 
             remove_items = []
             for ind_id in group_info['individual_character_handle_ids']:
@@ -3053,25 +3205,27 @@ def MoveToGuild(player_uid, group_id):
                     log.info(
                         f"{tcl(31)}Delete guild [{tcl(92)} %s {tcl(31)}] character handle GUID {tcl(92)} %s {tcl(0)} [InstanceID {tcl(92)} %s {tcl(0)}] " % (
                             group_info['group_id'], ind_id['guid'], ind_id['instance_id']))
-            for item in remove_items:
-                group_info['individual_character_handle_ids'].remove(item)
+            if len(remove_items) > 0:
+                with MappingCache.Updating('GroupSaveDataMap', group_data):
+                    for item in remove_items:
+                        group_info['individual_character_handle_ids'].remove(item)
 
-    MappingCache.PlayerIdMapping[player_uid]['value']['RawData']['value']['group_id'] = toUUID(group_id)
+    with MappingCache.Updating('CharacterSaveParameterMap', MappingCache.PlayerIdMapping[player_uid]) as player:
+        player['value']['RawData']['value']['group_id'] = toUUID(group_id)
 
     group_data = parse_item(MappingCache.GroupSaveDataMap[toUUID(group_id)], "GroupSaveDataMap")
     group_info = group_data['value']['RawData']['value']
     log.info(f"{tcl(32)}Append character and players to Guild {group_info['guild_name']}{tcl(0)}")
-    group_info['players'].append({
-        'player_uid': player_uid,
-        'player_info': {
-            'last_online_real_time': 0,
-            'player_name':
-                playerInstance['NickName']['value']
-        }
-    })
-    group_info['individual_character_handle_ids'] += instances
-
-    MappingCache.LoadGroupSaveDataMap()
+    with MappingCache.Updating('GroupSaveDataMap', group_data):
+        group_info['players'].append({
+            'player_uid': player_uid,
+            'player_info': {
+                'last_online_real_time': 0,
+                'player_name':
+                    playerInstance['NickName']['value']
+            }
+        })
+        group_info['individual_character_handle_ids'] += instances
 
 
 def CleanupWorkerSick():
@@ -3134,7 +3288,8 @@ def RepairCharacterContainer(container_id):
         if _slot['RawData']['value']['instance_id'] not in MappingCache.CharacterSaveParameterMap:
             log.warning(f"Charcater Container {container_id} -> {_slot['RawData']['value']['instance_id']} invalid")
             gp(_slot)
-            _slot['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+            with MappingCache.Updating('CharacterContainerSaveData', container):
+                _slot['RawData']['value']['instance_id'] = PalObject.EmptyUUID
             _slot['PermissionTribeID']['value']['value'] = "EPalTribeID::None"
 
 
@@ -3154,10 +3309,12 @@ def UpdateCharacterToSlot(character, target_container_id, slotIndex=None, slotIt
         return False
     log.info(
         f"  Character {character['key']['InstanceId']['value']} Container -> {target_container_id} Slot {slotIndex}")
-    slotItem['RawData']['value']['instance_id'] = character['key']['InstanceId']['value']
+    with MappingCache.Updating('CharacterContainerSaveData', MappingCache.CharacterContainerSaveData[target_container_id]):
+        slotItem['RawData']['value']['instance_id'] = character['key']['InstanceId']['value']
     characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
-    characterData['SlotID']['value']['ContainerId']['value']['ID']['value'] = target_container_id
-    characterData['SlotID']['value']['SlotIndex']['value'] = slotIndex
+    with MappingCache.Updating('CharacterSaveParameterMap', character):
+        characterData['SlotID']['value']['ContainerId']['value']['ID']['value'] = target_container_id
+        characterData['SlotID']['value']['SlotIndex']['value'] = slotIndex
     return True
 
 
@@ -3205,9 +3362,8 @@ def RepairPlayer(player_uid):
                 log.info(f"{tcl(31)}Duplicate Instance, delete the instance "
                          f"{tcl(93)}{MappingCache.PlayerIdMapping[player_uid]['key']['InstanceId']['value']}{tcl(0)}")
                 DeleteCharacter(MappingCache.PlayerIdMapping[player_uid]['key']['InstanceId']['value'])
-                MappingCache.LoadCharacterSaveParameterMap()
-        MappingCache.PlayerIdMapping[player_uid]['key']['InstanceId']['value'] = \
-            player_gvas['IndividualId']['value']['InstanceId']['value']
+        with MappingCache.Updating('CharacterSaveParameterMap', MappingCache.PlayerIdMapping[player_uid]) as player:
+            player['key']['InstanceId']['value'] = player_gvas['IndividualId']['value']['InstanceId']['value']
         replace_anyway = True
 
     load_skipped_decode(wsd, ['DynamicItemSaveData', 'ItemContainerSaveData', 'CharacterContainerSaveData'], False)
@@ -3222,7 +3378,6 @@ def RepairPlayer(player_uid):
         "OtomoCharacterContainerId": 5,
         "PalStorageContainerId": 480
     }
-    anyFix = False
     for key in ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
                 'PlayerEquipArmorContainerId', 'WeaponLoadOutContainerId']:
         if player_gvas['InventoryInfo']['value'][key]['value']['ID']['value'] not in MappingCache.ItemContainerSaveData:
@@ -3232,8 +3387,7 @@ def RepairPlayer(player_uid):
             n = PalObject.ItemContainerSaveData_Array(
                 player_gvas['InventoryInfo']['value'][key]['value']['ID']['value'],
                 emptySlots[key])
-            wsd['ItemContainerSaveData']['value'].append(n)
-            anyFix = True
+            MappingCache.InsertEntry('ItemContainerSaveData', n)
 
     loaded_instance = set()
     if player_gvas['OtomoCharacterContainerId']['value']['ID']['value'] in MappingCache.CharacterContainerSaveData:
@@ -3272,8 +3426,7 @@ def RepairPlayer(player_uid):
             if 'WorkerDirector' in basecamp:
                 baseWorkerContainers.add(basecamp['WorkerDirector']['value']['RawData']['value']['container_id'])
 
-    for instanceId in MappingCache.CharacterSaveParameterMap:
-        item = MappingCache.CharacterSaveParameterMap[instanceId]
+    for item in MappingCache.EntriesOf('CharactersByOwner', player_uid):
         player = item['value']['RawData']['value']['object']['SaveParameter']['value']
         if 'OwnerPlayerUId' in player and player['OwnerPlayerUId']['value'] == player_uid:
             if 'SlotID' in player and player['SlotID']['value']['ContainerId']['value']['ID']['value'] == \
@@ -3296,8 +3449,9 @@ def RepairPlayer(player_uid):
                     if slot_id not in MappingCache.CharacterContainerSaveData:
                         log.info(f"{tcl(33)} Player {tcl(93)}{player_uid}{tcl(33)} SlotID "
                                  f"{tcl(93)}{slot_id}{tcl(33)} invalid{tcl(0)}")
-                        player['SlotID']['value']['ContainerId']['value']['ID']['value'] = \
-                            player_gvas['PalStorageContainerId']['value']['ID']['value']
+                        with MappingCache.Updating('CharacterSaveParameterMap', item):
+                            player['SlotID']['value']['ContainerId']['value']['ID']['value'] = \
+                                player_gvas['PalStorageContainerId']['value']['ID']['value']
                         standbySlots.append(item['key']['InstanceId']['value'])
                         rebuildPalStorageContainerId = True
                     else:
@@ -3354,9 +3508,8 @@ def RepairPlayer(player_uid):
             player_gvas['PalStorageContainerId']['value']['ID']['value'] in MappingCache.CharacterContainerSaveData:
         log.info(f"{tcl(33)}Rebuild Player {tcl(93)}{player_uid}{tcl(33)} Character Container "
                  f"{player_gvas['PalStorageContainerId']['value']['ID']['value']}{0}")
-        wsd['CharacterContainerSaveData']['value'].remove(
-            MappingCache.CharacterContainerSaveData[player_gvas['PalStorageContainerId']['value']['ID']['value']])
-        del MappingCache.CharacterContainerSaveData[player_gvas['PalStorageContainerId']['value']['ID']['value']]
+        MappingCache.RemoveEntry('CharacterContainerSaveData', MappingCache.CharacterContainerSaveData[
+            player_gvas['PalStorageContainerId']['value']['ID']['value']])
 
     for idx_key in ['OtomoCharacterContainerId', 'PalStorageContainerId']:
         container_id = player_gvas[idx_key]['value']['ID']['value']
@@ -3366,8 +3519,7 @@ def RepairPlayer(player_uid):
                 f"{tcl(32)}{container_id}{tcl(0)} Not exists")
             n = PalObject.CharacterContainerSaveData_Array(container_id, emptySlots[idx_key], list(loaded_instance) if
             idx_key == 'OtomoCharacterContainerId' else standbySlots)
-            wsd['CharacterContainerSaveData']['value'].append(n)
-            anyFix = True
+            MappingCache.InsertEntry('CharacterContainerSaveData', n)
 
     if len(unloadedSlots) > 0:
         log.warning(f"Player {tcl(93)}{player_uid}{tcl(33)} Have {tcl(32)}{len(unloadedSlots)}{tcl(33)} "
@@ -3452,19 +3604,12 @@ def RepairPlayer(player_uid):
             else:
                 new_handle_ids.append(ind_char)
         if len(required_guild_instances - current_guild_instances) > 0 or replace_anyway:
-            for ind_char in remove_handle_ids:
-                group['individual_character_handle_ids'].remove(ind_char)
-            anyFix = True
-            log.error(f"{tcl(33)}Guild instance {tcl(36)}{group_id}{tcl(0)} invalid, local items: {start_items}, "
-                      f"replace with {len(group['individual_character_handle_ids'])} -> {len(new_handle_ids)}")
-            group['individual_character_handle_ids'] += new_handle_ids
-
-    if anyFix:
-        print("Reload cache")
-        MappingCache.LoadCharacterSaveParameterMap()
-        MappingCache.LoadCharacterContainerMaps()
-        MappingCache.LoadItemContainerMaps()
-        MappingCache.LoadGuildInstanceMapping()
+            with MappingCache.Updating('GroupSaveDataMap', MappingCache.GroupSaveDataMap[group_id]):
+                for ind_char in remove_handle_ids:
+                    group['individual_character_handle_ids'].remove(ind_char)
+                log.error(f"{tcl(33)}Guild instance {tcl(36)}{group_id}{tcl(0)} invalid, local items: {start_items}, "
+                          f"replace with {len(group['individual_character_handle_ids'])} -> {len(new_handle_ids)}")
+                group['individual_character_handle_ids'] += new_handle_ids
 
 
 def MigratePlayer(player_uid, new_player_uid):
@@ -3497,28 +3642,23 @@ def MigratePlayer(player_uid, new_player_uid):
     while new_player_uid in MappingCache.PlayerIdMapping:
         DeletePlayer(new_player_uid,
                      InstanceId=MappingCache.PlayerIdMapping[new_player_uid]['key']['InstanceId']['value'])
-        MappingCache.LoadCharacterSaveParameterMap()
 
     backup_file(new_player_sav_file, True)
-    with open(new_player_sav_file, "wb") as f:
-        log.info("Saving new player sav %s" % new_player_sav_file)
-        if "Pal.PalWorldSaveGame" in player_gvas_file.header.save_game_class_name or "Pal.PalLocalWorldSaveGame" in player_gvas_file.header.save_game_class_name:
-            save_type = 0x32
-        else:
-            save_type = 0x31
-        sav_file = compress_gvas_to_sav(player_gvas_file.write(PALWORLD_CUSTOM_PROPERTIES), save_type)
-        f.write(sav_file)
-    for item in wsd['CharacterSaveParameterMap']['value']:
+    log.info("Saving new player sav %s" % new_player_sav_file)
+    write_sav_file(player_gvas_file, new_player_sav_file, PALWORLD_CUSTOM_PROPERTIES)
+    for item in MappingCache.SectionValues('CharacterSaveParameterMap'):
         player = item['value']['RawData']['value']['object']['SaveParameter']['value']
         if item['key']['PlayerUId']['value'] == player_uid and 'IsPlayer' in player and player['IsPlayer']['value']:
-            item['key']['PlayerUId']['value'] = player_gvas['PlayerUId']['value']
-            item['key']['InstanceId']['value'] = player_gvas['IndividualId']['value']['InstanceId']['value']
+            with MappingCache.Updating('CharacterSaveParameterMap', item):
+                item['key']['PlayerUId']['value'] = player_gvas['PlayerUId']['value']
+                item['key']['InstanceId']['value'] = player_gvas['IndividualId']['value']['InstanceId']['value']
             log.info(
                 f"{tcl(32)}Migrate User{tcl(0)}  UUID: %s  Level: %d  CharacterID: {tcl(93)}%s{tcl(0)}" % (
                     str(item['key']['InstanceId']['value']), player['Level']['value'] if 'Level' in player else -1,
                     player['NickName']['value']))
         elif 'OwnerPlayerUId' in player and player['OwnerPlayerUId']['value'] == player_uid:
-            player['OwnerPlayerUId']['value'] = new_player_uid
+            with MappingCache.Updating('CharacterSaveParameterMap', item):
+                player['OwnerPlayerUId']['value'] = new_player_uid
             player['OldOwnerPlayerUIds']['value']['values'] = [player['OwnerPlayerUId']['value']]
             log.info(
                 f"{tcl(32)}Migrate Pal{tcl(0)}  UUID: %s  Owner: %s  CharacterID: %s" % (
@@ -3528,9 +3668,8 @@ def MigratePlayer(player_uid, new_player_uid):
                 if player['EquipItemContainerId']['value']['ID']['value'] not in MappingCache.ItemContainerSaveData:
                     log.warning(f"{tcl(31)}Error: Invalid Equal Item Container ID "
                                 f"{player['EquipItemContainerId']['value']['ID']['value']}{tcl(0)}")
-                    wsd['ItemContainerSaveData']['value'].append(
-                        PalObject.ItemContainerSaveData_Array(player['EquipItemContainerId']['value']['ID']['value'],
-                                                              2))
+                    MappingCache.InsertEntry('ItemContainerSaveData', PalObject.ItemContainerSaveData_Array(
+                        player['EquipItemContainerId']['value']['ID']['value'], 2))
         elif 'OldOwnerPlayerUIds' in player and player_uid in player['OldOwnerPlayerUIds']['value']['values']:
             player['OldOwnerPlayerUIds']['value']['values'].remove(player_uid)
             log.info(f"{tcl(31)}Delete Pal OldOwnerPlayerUIds{tcl(0)}  UUID: %s  CharacterID: %s" % (
@@ -3540,7 +3679,7 @@ def MigratePlayer(player_uid, new_player_uid):
             if slot_container_id not in MappingCache.CharacterContainerSaveData:
                 log.error(f"{tcl(31)}Error: Invalid Character Container ID {slot_container_id}{tcl(0)}")
 
-    for group_data in wsd['GroupSaveDataMap']['value']:
+    for group_data in MappingCache.SectionValues('GroupSaveDataMap'):
         if str(group_data['value']['GroupType']['value']['value']) == "EPalGroupType::Guild":
             item = group_data['value']['RawData']['value']
             for player in item['players']:
@@ -3556,12 +3695,13 @@ def MigratePlayer(player_uid, new_player_uid):
                             remove_handle_ids.append(ind_char)
                             log.info(f"{tcl(31)}Delete Guild Character InstanceID %s {tcl(0)}" % str(
                                 ind_char['instance_id']))
-                    for remove_handle in remove_handle_ids:
-                        item['individual_character_handle_ids'].remove(remove_handle)
-                    item['individual_character_handle_ids'].append({
-                        'guid': player_gvas['PlayerUId']['value'],
-                        'instance_id': player_gvas['IndividualId']['value']['InstanceId']['value']
-                    })
+                    with MappingCache.Updating('GroupSaveDataMap', group_data):
+                        for remove_handle in remove_handle_ids:
+                            item['individual_character_handle_ids'].remove(remove_handle)
+                        item['individual_character_handle_ids'].append({
+                            'guid': player_gvas['PlayerUId']['value'],
+                            'instance_id': player_gvas['IndividualId']['value']['InstanceId']['value']
+                        })
                     log.info(f"{tcl(32)}Append Guild Character InstanceID %s {tcl(0)}" % (
                         str(player_gvas['IndividualId']['value']['InstanceId']['value'])))
                     break
@@ -3575,7 +3715,6 @@ def MigratePlayer(player_uid, new_player_uid):
         delete_files.remove(new_player_sav_file)
     backup_file(player_sav_file, True)
     delete_files.append(player_sav_file)
-    MappingCache.LoadCharacterSaveParameterMap()
     # RepairPlayer(new_player_uid)
     log.info("Finish to migrate player from Save")
 
@@ -3584,7 +3723,7 @@ def MigrateBuilding(player_uid, new_player_uid):
     player_uid = toUUID(player_uid)
     new_player_uid = toUUID(new_player_uid)
 
-    for map_data in wsd['MapObjectSaveData']['value']['values']:
+    for map_data in MappingCache.SectionValues('MapObjectSaveData'):
         if 'owner_player_uid' in map_data['ConcreteModel']['value']['RawData']['value'] and \
                 map_data['ConcreteModel']['value']['RawData']['value']['owner_player_uid'] == player_uid:
             log.info(
@@ -3600,12 +3739,13 @@ def MigrateBuilding(player_uid, new_player_uid):
                         log.info(f"{tcl(32)}Migrate ConcreteModel PasswordLock{tcl(0)}  {tcl(93)}%s{tcl(0)}" % (
                             str(map_data['MapObjectInstanceId']['value'])))
         if map_data['Model']['value']['RawData']['value']['build_player_uid'] == player_uid:
-            map_data['Model']['value']['RawData']['value']['build_player_uid'] = new_player_uid
+            with MappingCache.Updating('MapObjectSaveData', map_data):
+                map_data['Model']['value']['RawData']['value']['build_player_uid'] = new_player_uid
             log.info(f"{tcl(32)}Migrate Building{tcl(0)}  {tcl(93)}%s{tcl(0)}" % (
                 str(map_data['MapObjectInstanceId']['value'])))
 
 
-def FindReferenceMapObject(mapObjectId, level=0, reference_ids=None, srcMapping=None):
+def FindReferenceMapObject(mapObjectId, reference_ids=None, srcMapping=None):
     mapObjectId = toUUID(mapObjectId)
     if srcMapping is None:
         srcMapping = MappingCache
@@ -3617,58 +3757,29 @@ def FindReferenceMapObject(mapObjectId, level=0, reference_ids=None, srcMapping=
             "MapObject": set(),
             "ItemContainer": set(),
             "WorkData": set(),
-            "Spawner": set(),
-            "PendingScan": []
+            "Spawner": set()
         }
     if mapObjectId in reference_ids['MapObject']:
         return reference_ids
-    reference_ids['MapObject'].add(mapObjectId)
-    mapObject = srcMapping.MapObjectSaveData[mapObjectId]
-    connector = mapObject['Model']['value']['Connector']['value']['RawData']
-    if 'value' in connector:
-        if 'connect' in connector['value']:
-            if 'any_place' in connector['value']['connect']:
-                for connection_item in connector['value']['connect']['any_place']:
-                    if connection_item['connect_to_model_instance_id'] == mapObjectId:
-                        continue
-                    connect_id = connection_item['connect_to_model_instance_id']
-                    if connect_id not in reference_ids['MapObject']:
-                        # if level > 100:
-                        #     print("Anyplace: ", level, mapObjectId, connect_id)
-                        if level > 500:
-                            reference_ids['PendingScan'].append(connect_id)
-                            continue
-                        FindReferenceMapObject(connect_id, level + 1, reference_ids, srcMapping)
-        if 'other_connectors' in connector['value']:
-            for other_connection_list in connector['value']['other_connectors']:
-                for connection_item in other_connection_list['connect']:
-                    if connection_item['connect_to_model_instance_id'] == mapObjectId:
-                        continue
-                    connect_id = connection_item['connect_to_model_instance_id']
-                    if connect_id not in reference_ids['MapObject']:
-                        if level > 500:
-                            reference_ids['PendingScan'].append(connect_id)
-                            continue
-                        FindReferenceMapObject(connect_id, level + 1, reference_ids, srcMapping)
-    if level == 0:
-        while len(reference_ids['PendingScan']) > 0:
-            FindReferenceMapObject(reference_ids['PendingScan'].pop(), 1, reference_ids)
-
-    for concrete in mapObject['ConcreteModel']['value']['ModuleMap']['value']:
-        if concrete['key'] == "EPalMapObjectConcreteModelModuleType::ItemContainer":
-            reference_ids['ItemContainer'].add(concrete['value']['RawData']['value']['target_container_id'])
-        if concrete['key'] == "EPalMapObjectConcreteModelModuleType::Workee":
-            reference_ids['WorkData'].add(concrete['value']['RawData']['value']['target_work_id'])
-    mapObjectRawData = mapObject['Model']['value']['RawData']['value']
-    if 'repair_work_id' in mapObjectRawData and mapObjectRawData['repair_work_id'] != PalObject.EmptyUUID:
-        reference_ids['WorkData'].add(mapObjectRawData['repair_work_id'])
-    owner_spawner_level_object_instance_id = mapObjectRawData['owner_spawner_level_object_instance_id']
-    if owner_spawner_level_object_instance_id in MappingCache.MapObjectSpawnerInStageSaveData:
-        reference_ids['Spawner'].add(owner_spawner_level_object_instance_id)
-
-    if 'BuildProcess' in mapObject['Model']['value'] and PalObject.EmptyUUID != \
-            mapObject['Model']['value']['BuildProcess']['value']['RawData']['value']['id']:
-        reference_ids['WorkData'].add(mapObject['Model']['value']['BuildProcess']['value']['RawData']['value']['id'])
+    # map objects connected from mapObjectId, the walk is bounded by its MapObjectClusters cluster
+    for map_object_id in srcMapping.MapObjectClusters.Reachable(mapObjectId):
+        reference_ids['MapObject'].add(map_object_id)
+        mapObject = srcMapping.MapObjectSaveData[map_object_id]
+        for concrete in mapObject['ConcreteModel']['value']['ModuleMap']['value']:
+            if concrete['key'] == "EPalMapObjectConcreteModelModuleType::ItemContainer":
+                reference_ids['ItemContainer'].add(concrete['value']['RawData']['value']['target_container_id'])
+            if concrete['key'] == "EPalMapObjectConcreteModelModuleType::Workee":
+                reference_ids['WorkData'].add(concrete['value']['RawData']['value']['target_work_id'])
+        mapObjectRawData = mapObject['Model']['value']['RawData']['value']
+        if 'repair_work_id' in mapObjectRawData and mapObjectRawData['repair_work_id'] != PalObject.EmptyUUID:
+            reference_ids['WorkData'].add(mapObjectRawData['repair_work_id'])
+        owner_spawner_level_object_instance_id = mapObjectRawData['owner_spawner_level_object_instance_id']
+        if owner_spawner_level_object_instance_id in MappingCache.MapObjectSpawnerInStageSaveData:
+            reference_ids['Spawner'].add(owner_spawner_level_object_instance_id)
+
+        if 'BuildProcess' in mapObject['Model']['value'] and PalObject.EmptyUUID != \
+                mapObject['Model']['value']['BuildProcess']['value']['RawData']['value']['id']:
+            reference_ids['WorkData'].add(mapObject['Model']['value']['BuildProcess']['value']['RawData']['value']['id'])
 
     return reference_ids
 
@@ -3683,13 +3794,7 @@ def BatchDeleteMapObject(map_object_ids):
         map_object_id = toUUID(map_object_id)
         if map_object_id in MappingCache.MapObjectSaveData:
             delete_map_object_ids.add(map_object_id)
-            try:
-                reference_ids = FindReferenceMapObject(map_object_id, 0, reference_ids)
-            except RecursionError:
-                log.error(
-                    f"{tcl(31)}Fatal Error: maximum recursion depth exceeded in comparison on {tcl(36)}{map_object_id}{tcl(0)}")
-                log.info(f"Found Reference MapObject: {len(reference_ids['MapObject'])}")
-                return
+            reference_ids = FindReferenceMapObject(map_object_id, reference_ids)
 
     if reference_ids is None:
         return None
@@ -3699,10 +3804,6 @@ def BatchDeleteMapObject(map_object_ids):
     BatchDeleteItemContainer(list(reference_ids['ItemContainer']))
     _BatchDeleteMapObjectSpawner(list(reference_ids['Spawner']))
 
-    MappingCache.LoadItemContainerMaps()
-    MappingCache.LoadWorkSaveData()
-    MappingCache.LoadMapObjectMaps()
-
     log.info(f"Delete MapObject: {len(delete_map_object_ids)} / {len(map_object_ids)}")
     log.info(f"Delete MapObject With Ref: {len(reference_ids['MapObject'])}")
     log.info(f"Delete MapObjectSpawner: {len(reference_ids['Spawner'])}")
@@ -3746,7 +3847,7 @@ def CopyMapObject(map_object_id, src_wsd, dry_run=False):
         log.info(f"Clone MapObject {map_object_id}")
         mapObject = copy.deepcopy(srcMappingObject.MapObjectSaveData[toUUID(map_object_id)])
         if not dry_run:
-            wsd['MapObjectSaveData']['value']['values'].append(mapObject)
+            MappingCache.InsertEntry('MapObjectSaveData', mapObject)
     for item_container_id in reference_ids['ItemContainer']:
         if item_container_id in MappingCache.ItemContainerSaveData:
             continue
@@ -3771,12 +3872,8 @@ def CopyMapObject(map_object_id, src_wsd, dry_run=False):
         log.info(
             f"Clone MapObjectSpawnerInStageSaveData {spawner}  Map Object {map_object_id}")
         if not dry_run:
-            wsd['MapObjectSpawnerInStageSaveData']['value'][0]['value']['SpawnerDataMapByLevelObjectInstanceId'][
-                'value'].append(mapObjSpawner)
+            MappingCache.InsertEntry('MapObjectSpawnerInStageSaveData', mapObjSpawner)
 
-    MappingCache.LoadWorkSaveData()
-    MappingCache.LoadItemContainerMaps()
-    MappingCache.LoadMapObjectMaps()
     return True
 
 
@@ -3827,10 +3924,11 @@ def CopyCharacter(characterId, src_wsd, target_container=None, dry_run=False):
         try:
             group = MappingCache.GroupSaveDataMap[character['value']['RawData']['value']['group_id']]
             if not dry_run:
-                group['value']['RawData']['value']['individual_character_handle_ids'].append({
-                    'guid': PalObject.EmptyUUID,
-                    "instance_id": characterId
-                })
+                with MappingCache.Updating('GroupSaveDataMap', group):
+                    group['value']['RawData']['value']['individual_character_handle_ids'].append({
+                        'guid': PalObject.EmptyUUID,
+                        "instance_id": characterId
+                    })
         except KeyError:
             pass
 
@@ -3851,7 +3949,8 @@ def CopyCharacter(characterId, src_wsd, target_container=None, dry_run=False):
         if isFound is None:
             for _slotIndex, slotItem in enumerate(characterContainer['value']['Slots']['value']['values']):
                 if slotItem['RawData']['value']['instance_id'] == PalObject.EmptyUUID:
-                    slotItem['RawData']['value']['instance_id'] = character['key']['InstanceId']['value']
+                    with MappingCache.Updating('CharacterContainerSaveData', characterContainer):
+                        slotItem['RawData']['value']['instance_id'] = character['key']['InstanceId']['value']
                     isFound = _slotIndex
                     break
             if isFound is None:
@@ -3861,14 +3960,13 @@ def CopyCharacter(characterId, src_wsd, target_container=None, dry_run=False):
         characterData['SlotID'] = PalObject.PalCharacterSlotId(characterContainerId, slotIndex)
         # print(f"Set character {characterId} -> Container {characterContainerId} SlotIndex {slotIndex}")
     try:
-        wsd['CharacterSaveParameterMap']['value'].append(character)
-        MappingCache.CharacterSaveParameterMap[character['key']['InstanceId']['value']] = character
+        MappingCache.InsertEntry('CharacterSaveParameterMap', character)
     except ValueError:
         return False
     return character['key']['InstanceId']['value']
 
 
-def DeleteCharacter(characterId, isBatch=False):
+def DeleteCharacter(characterId):
     characterId = toUUID(characterId)
     if characterId not in MappingCache.CharacterSaveParameterMap:
         log.error(f"Error: Character {characterId} not found")
@@ -3887,7 +3985,8 @@ def DeleteCharacter(characterId, isBatch=False):
                 if ind['instance_id'] == characterId:
                     log.info(
                         f"  Delete Chracater {characterId} group {character['value']['RawData']['value']['group_id']} instances")
-                    del group['value']['RawData']['value']['individual_character_handle_ids'][idx]
+                    with MappingCache.Updating('GroupSaveDataMap', group):
+                        del group['value']['RawData']['value']['individual_character_handle_ids'][idx]
                     break
         except KeyError:
             pass
@@ -3899,32 +3998,36 @@ def DeleteCharacter(characterId, isBatch=False):
                                                     'value']], "CharacterContainerSaveData")
             for slotItem in characterContainer['value']['Slots']['value']['values']:
                 if slotItem['RawData']['value']['instance_id'] == characterId:
-                    slotItem['PermissionTribeID']['value']['value'] = "EPalTribeID::None"
-                    slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+                    with MappingCache.Updating('CharacterContainerSaveData', characterContainer):
+                        slotItem['PermissionTribeID']['value']['value'] = "EPalTribeID::None"
+                        slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
                     log.info(
                         f"  Delete Character {characterId} from CharacterContainer {characterData['SlotID']['value']['ContainerId']['value']['ID']['value']}")
                     break
         except KeyError:
             pass
-    try:
-        wsd['CharacterSaveParameterMap']['value'].remove(character)
-    except ValueError:
-        return False
-    if not isBatch:
-        MappingCache.LoadItemContainerMaps()
-        MappingCache.LoadCharacterSaveParameterMap()
-    return True
+    return MappingCache.RemoveEntry('CharacterSaveParameterMap', character)
 
 
-def BatchDeleteCharacter(characterIds):
+def BatchDeleteCharacter(characterIds, item_containers=None):
+    """
+    item_containers: set collecting the item containers of the characters for the caller to delete, deleted here if None
+    """
     deleteItemContainers = []
+    deleteCharacters = {}
+    groups = {}
+    containers = {}
     characterIds = [toUUID(characterId) for characterId in characterIds]
+    characterIdSet = set(characterIds)
     for characterId in characterIds:
         if characterId not in MappingCache.CharacterSaveParameterMap:
             log.error(f"Error: Character {characterId} not found")
             continue
 
         character = MappingCache.CharacterSaveParameterMap[characterId]
+        if id(character) in deleteCharacters:
+            continue
+        deleteCharacters[id(character)] = character
         characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
         if 'EquipItemContainerId' in characterData:
             deleteItemContainers.append(characterData['EquipItemContainerId']['value']['ID']['value'])
@@ -3934,39 +4037,42 @@ def BatchDeleteCharacter(characterIds):
         if 'group_id' in character['value']['RawData']['value']:
             try:
                 group = MappingCache.GroupSaveDataMap[character['value']['RawData']['value']['group_id']]
-                new_individual_character_handle_ids = []
-                for idx, ind in enumerate(group['value']['RawData']['value']['individual_character_handle_ids']):
-                    if ind['instance_id'] not in characterIds:
-                        new_individual_character_handle_ids.append(ind)
-                group['value']['RawData']['value'][
-                    'individual_character_handle_ids'] = new_individual_character_handle_ids
+                groups[id(group)] = group
             except KeyError:
                 pass
 
         if 'SlotID' in characterData:
             try:
-                characterContainer = parse_item(MappingCache.CharacterContainerSaveData[
-                                                    characterData['SlotID']['value']['ContainerId']['value']['ID'][
-                                                        'value']],
-                                                "CharacterContainerSaveData")
-                for slotItem in characterContainer['value']['Slots']['value']['values']:
-                    if slotItem['RawData']['value']['instance_id'] in characterIds:
-                        slotItem['PermissionTribeID']['value']['value'] = "EPalTribeID::None"
-                        slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+                characterContainer = MappingCache.CharacterContainerSaveData[
+                    characterData['SlotID']['value']['ContainerId']['value']['ID']['value']]
+                containers[id(characterContainer)] = characterContainer
             except KeyError:
                 pass
-        del MappingCache.CharacterSaveParameterMap[characterId]
+    MappingCache.RemoveEntries('CharacterSaveParameterMap', deleteCharacters.values())
 
-    wsd['CharacterSaveParameterMap']['value'] = [MappingCache.CharacterSaveParameterMap[characterId] for characterId in
-                                                 MappingCache.CharacterSaveParameterMap]
+    # each container and group filtered once for all the deleted characters
+    for characterContainer in containers.values():
+        characterContainer = parse_item(characterContainer, "CharacterContainerSaveData")
+        with MappingCache.Updating('CharacterContainerSaveData', characterContainer):
+            for slotItem in characterContainer['value']['Slots']['value']['values']:
+                if slotItem['RawData']['value']['instance_id'] in characterIdSet:
+                    slotItem['PermissionTribeID']['value']['value'] = "EPalTribeID::None"
+                    slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+    for group in groups.values():
+        with MappingCache.Updating('GroupSaveDataMap', group):
+            group['value']['RawData']['value']['individual_character_handle_ids'] = \
+                [ind for ind in group['value']['RawData']['value']['individual_character_handle_ids'] if
+                 ind['instance_id'] not in characterIdSet]
     log.info(f"Deleted characters: {len(characterIds)}")
-    MappingCache.LoadCharacterSaveParameterMap()
-    BatchDeleteItemContainer(deleteItemContainers)
+    if item_containers is not None:
+        item_containers.update(deleteItemContainers)
+    else:
+        BatchDeleteItemContainer(deleteItemContainers)
     return True
 
 
 def GetReferencedCharacterContainerIdsByPlayer(player_uid):
-    err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid)
+    err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid, paths=PLAYER_CONTAINER_PATHS)
     if err:
         log.error(
             f"Player Sav file for {player_uid} Not exists: %s" % player_sav_file)
@@ -3978,19 +4084,14 @@ def GetReferencedCharacterContainerIdsByPlayer(player_uid):
 
 
 def FindReferenceCharacterContainerIds(with_character=True):
-    reference_ids = set()
-
-    for basecamp_id in MappingCache.BaseCampMapping:
-        basecamp = MappingCache.BaseCampMapping[basecamp_id]['value']
-        if 'WorkerDirector' in basecamp:
-            reference_ids.add(basecamp['WorkerDirector']['value']['RawData']['value']['container_id'])
-
+    graph = LoadAllUUID()
     if with_character:
-        for character in wsd['CharacterSaveParameterMap']['value']:
-            characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
-            if 'SlotID' in characterData:
-                reference_ids.add(characterData['SlotID']['value']['ContainerId']['value']['ID']['value'])
+        reference_ids = graph.ReferencedIds('container')
+    else:
+        reference_ids = graph.ReferencedIds('container', {section for section in wsd if
+                                                          section != 'CharacterSaveParameterMap'})
 
+    LoadPlayerSaves(paths=PLAYER_CONTAINER_PATHS)
     for playerUId in MappingCache.PlayerIdMapping:
         reference_ids.update(GetReferencedCharacterContainerIdsByPlayer(playerUId))
 
@@ -4010,27 +4111,25 @@ def BatchDeleteUnreferencedCharacterContainers():
 
 
 def BatchDeleteCharacterContainer(characterContainerIds, progressCallback: Optional[Callable] = None):
-    deleteCharacterContainerIds = []
+    deleteCharacterContainers = {}
     for characterContainerId in characterContainerIds:
         characterContainerId = toUUID(characterContainerId)
         if characterContainerId not in MappingCache.CharacterContainerSaveData:
             log.error(f"Error: Item Container {characterContainerId} not found")
             continue
 
-        deleteCharacterContainerIds.append(characterContainerId)
+        container = MappingCache.CharacterContainerSaveData[characterContainerId]
+        if id(container) in deleteCharacterContainers:
+            continue
+        deleteCharacterContainers[id(container)] = container
         if progressCallback is not None:
-            progressCallback(len(deleteCharacterContainerIds), len(characterContainerIds))
-        if len(deleteCharacterContainerIds) % 10000 == 0:
+            progressCallback(len(deleteCharacterContainers), len(characterContainerIds))
+        if len(deleteCharacterContainers) % 10000 == 0:
             log.info(
-                f"Deleting Character Containers: {len(deleteCharacterContainerIds)} / {len(characterContainerIds)}")
-        container = parse_item(MappingCache.CharacterContainerSaveData[characterContainerId],
-                               "CharacterContainerSaveData")
-        del MappingCache.CharacterContainerSaveData[characterContainerId]
+                f"Deleting Character Containers: {len(deleteCharacterContainers)} / {len(characterContainerIds)}")
 
-    wsd['CharacterContainerSaveData']['value'] = [MappingCache.CharacterContainerSaveData[container_id] for container_id
-                                                  in MappingCache.CharacterContainerSaveData]
-    log.info(f"Delete Character Containers: {len(deleteCharacterContainerIds)} / {len(characterContainerIds)}")
-    MappingCache.LoadCharacterContainerMaps()
+    MappingCache.RemoveEntries('CharacterContainerSaveData', deleteCharacterContainers.values())
+    log.info(f"Delete Character Containers: {len(deleteCharacterContainers)} / {len(characterContainerIds)}")
 
 
 def LoadItemContainerSlotItems(container_name, container_id, ItemReferenceContainer):
@@ -4056,14 +4155,14 @@ def FindItemIdReferenceContainers():
 
     load_skipped_decode(wsd, ['MapObjectSaveData'], False)
 
-    for mapObject in wsd['MapObjectSaveData']['value']['values']:
+    for mapObject in MappingCache.SectionValues('MapObjectSaveData'):
         for concrete in mapObject['ConcreteModel']['value']['ModuleMap']['value']:
             if concrete['key'] == "EPalMapObjectConcreteModelModuleType::ItemContainer":
                 LoadItemContainerSlotItems("MapObjectItem",
                                            concrete['value']['RawData']['value']['target_container_id'],
                                            ItemReferenceContainer)
 
-    for character in wsd['CharacterSaveParameterMap']['value']:
+    for character in MappingCache.SectionValues('CharacterSaveParameterMap'):
         characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
         if 'EquipItemContainerId' in characterData:
             LoadItemContainerSlotItems("CharacterEquipItem",
@@ -4075,7 +4174,7 @@ def FindItemIdReferenceContainers():
                                        ItemReferenceContainer)
 
     try:
-        for basecamp in wsd['BaseCampSaveData']['value']:
+        for basecamp in MappingCache.SectionValues('BaseCampSaveData'):
             for BaseCampModule in basecamp['value']['ModuleMap']['value']:
                 if BaseCampModule['key'] == "EPalBaseCampModuleType::ItemStorages":
                     pass
@@ -4094,9 +4193,10 @@ def FindItemIdReferenceContainers():
     except KeyError as e:
         traceback.print_exception(e)
 
+    LoadPlayerSaves(paths=PLAYER_CONTAINER_PATHS)
     for player_uid in MappingCache.PlayerIdMapping:
         try:
-            err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid)
+            err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid, paths=PLAYER_CONTAINER_PATHS)
             if err:
                 continue
             for key in ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
@@ -4114,33 +4214,22 @@ def FindItemIdReferenceContainers():
 
 
 def FindReferenceItemContainerIds():
-    load_skipped_decode(wsd, ['MapObjectSaveData'], False)
-    reference_ids = set()
-
-    for mapObject in wsd['MapObjectSaveData']['value']['values']:
-        for concrete in mapObject['ConcreteModel']['value']['ModuleMap']['value']:
-            if concrete['key'] == "EPalMapObjectConcreteModelModuleType::ItemContainer":
-                reference_ids.add(concrete['value']['RawData']['value']['target_container_id'])
-
-    for character in wsd['CharacterSaveParameterMap']['value']:
-        characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
-        if 'EquipItemContainerId' in characterData:
-            reference_ids.add(characterData['EquipItemContainerId']['value']['ID']['value'])
-        if 'ItemContainerId' in characterData:
-            reference_ids.add(characterData['ItemContainerId']['value']['ID']['value'])
-    for basecamp in wsd['BaseCampSaveData']['value']:
-        for BaseCampModule in basecamp['value']['ModuleMap']['value']:
-            if BaseCampModule['key'] == "EPalBaseCampModuleType::ItemStorages":
-                pass
-
-    #     reference_ids.append(baseCamp['value']['WorkerDirector']['value']['RawData']['value']['container_id'])
-    for uuid in MappingCache.ItemContainerSaveData:
-        containers = MappingCache.ItemContainerSaveData[uuid]
-        belongInfo = parse_item(containers['value']['BelongInfo'], "ItemContainerSaveData.Value.BelongInfo")
-        if 'GroupID' in belongInfo['value'] and belongInfo['value']['GroupID']['value'] != PalObject.EmptyUUID and \
-                belongInfo['value']['GroupID']['value'] in MappingCache.GroupSaveDataMap:
-            reference_ids.add(uuid)
-
+    """
+    Item containers still in use: every container GUID of the reference graph (any REFERENCE_EDGE_FIELDS
+    'container' field in any section, a superset of the map object ItemContainer modules and the character
+    equip / item containers checked before), the containers belonging to an existing group and the player saves.
+    A container referred only by another field is kept by the unreferenced container cleanup.
+    """
+    graph = LoadAllUUID()
+    reference_ids = graph.ReferencedIds('container')
+
+    # containers belong to an existing group
+    for group_id in MappingCache.GroupSaveDataMap:
+        for section, container_id, container in graph.Referrers(group_id, 'group'):
+            if section == 'ItemContainerSaveData':
+                reference_ids.add(container_id)
+
+    LoadPlayerSaves(paths=PLAYER_CONTAINER_PATHS)
     for playerId in MappingCache.PlayerIdMapping:
         reference_ids.update(GetReferencedItemContainerIdsByPlayer(playerId))
 
@@ -4195,12 +4284,13 @@ def CleanupCharacterContainer(container_id):
         log.info(
             f"Clenaup Character Container {tcl(32)}{container_id}{tcl(0)}: {len(container['value']['Slots']['value']['values'])} -> {len(new_containerSlots)}")
     for instanceId in characterSlotIndexMapping:
-        characterData = \
-            MappingCache.CharacterSaveParameterMap[instanceId]['value']['RawData']['value']['object']['SaveParameter'][
-                'value']
-        characterData['SlotID'] = PalObject.PalCharacterSlotId(container_id,
-                                                               characterSlotIndexMapping[instanceId])
-    container['value']['Slots']['value']['values'] = new_containerSlots
+        character = MappingCache.CharacterSaveParameterMap[instanceId]
+        characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
+        with MappingCache.Updating('CharacterSaveParameterMap', character):
+            characterData['SlotID'] = PalObject.PalCharacterSlotId(container_id,
+                                                                   characterSlotIndexMapping[instanceId])
+    with MappingCache.Updating('CharacterContainerSaveData', container):
+        container['value']['Slots']['value']['values'] = new_containerSlots
 
 
 def CleanupAllCharacterContainer():
@@ -4231,6 +4321,7 @@ def FindDamageRefContainer(dry_run=False):
         }
     }
 
+    LoadPlayerSaves(paths=PLAYER_CONTAINER_PATHS)
     for playerId in MappingCache.PlayerIdMapping:
         container_ids = GetReferencedItemContainerIdsByPlayer(playerId)
         if container_ids == []:
@@ -4279,6 +4370,10 @@ def FindDamageRefContainer(dry_run=False):
     #         foliage_item = MappingCache.FoliageGridSaveDataMap[map_id]
     #     InvalidObjects['FoliageGrid'].add(map_id)
 
+    # every distinct base camp / builder / group id referred by map objects is checked once
+    invalid_base_camps = MappingCache.MapObjectsByBaseCamp.keys() - MappingCache.BaseCampMapping.keys()
+    invalid_builders = MappingCache.MapObjectsByBuilder.keys() - MappingCache.PlayerIdMapping.keys()
+    invalid_groups = MappingCache.MapObjectsByGroup.keys() - MappingCache.GuildSaveDataMap.keys()
     for map_id in MappingCache.MapObjectSaveData:
         mapObject = MappingCache.MapObjectSaveData[map_id]
         basecamp_id = mapObject['Model']['value']['RawData']['value']['base_camp_id_belong_to']
@@ -4303,15 +4398,15 @@ def FindDamageRefContainer(dry_run=False):
                     if not dry_run:
                         mapObject['ConcreteModel']['value']['ModuleMap']['value'].pop(con_idx)
                     # InvalidObjects['MapObject'].add(map_id)
-        if basecamp_id != PalObject.EmptyUUID and basecamp_id not in MappingCache.BaseCampMapping:
+        if basecamp_id in invalid_base_camps:
             log.info(
                 f"MapObject {tcl(33)}{map_id}{tcl(0)}  -> Basecamp {tcl(33)}{basecamp_id}{tcl(0)} invalid {map_object_debug_msg}")
             InvalidObjects['MapObject'].add(map_id)
-        elif build_player_uid != PalObject.EmptyUUID and build_player_uid not in MappingCache.PlayerIdMapping:
+        elif build_player_uid in invalid_builders:
             log.info(
                 f"MapObject {tcl(33)}{map_id}{tcl(0)}  -> Build Player {tcl(33)}{build_player_uid}{tcl(0)} invalid {map_object_debug_msg}")
             InvalidObjects['MapObject'].add(map_id)
-        elif group_id != PalObject.EmptyUUID and group_id not in MappingCache.GuildSaveDataMap:
+        elif group_id in invalid_groups:
             log.info(
                 f"MapObject {tcl(33)}{map_id}{tcl(0)}  -> Group {tcl(33)}{group_id}{tcl(0)} invalid {map_object_debug_msg}")
             InvalidObjects['MapObject'].add(map_id)
@@ -4353,7 +4448,7 @@ def FindDamageRefContainer(dry_run=False):
                     f"MapObjectSpawnerInStage {tcl(33)}{spawn_id}{tcl(0)}  -> Map {tcl(33)}{map_id}{tcl(0)} invalid")
                 InvalidObjects['MapObjectSpawnerInStage'].add(spawn_id)
 
-    for character in wsd['CharacterSaveParameterMap']['value']:
+    for character in MappingCache.SectionValues('CharacterSaveParameterMap'):
         characterData = character['value']['RawData']['value']['object']['SaveParameter']['value']
         # Ignored for Boss, Boss will have empty EquipItemContainerId but work
         if 'OwnerPlayerUId' in characterData and 'CharacterID' not in characterData:
@@ -4406,17 +4501,9 @@ def FixBrokenDamageRefContainer(withInvalidEqualItemContainer=False, withInvalid
     delete_sets.update(BrokenObjects['Character']['CharacterContainer'])
     BatchDeleteCharacter(delete_sets)
 
-    for objId in BrokenObjects['MapObjectSpawnerInStage']:
-        del MappingCache.MapObjectSpawnerInStageSaveData[objId]
-    wsd['MapObjectSpawnerInStageSaveData']['value'][0]['value']['SpawnerDataMapByLevelObjectInstanceId']['value'] = \
-        [MappingCache.MapObjectSpawnerInStageSaveData[x] for x in MappingCache.MapObjectSpawnerInStageSaveData]
+    _BatchDeleteMapObjectSpawner(BrokenObjects['MapObjectSpawnerInStage'])
 
     BatchDeleteMapObject(BrokenObjects['MapObject'])
-    MappingCache.LoadItemContainerMaps()
-    MappingCache.LoadGroupSaveDataMap()
-    MappingCache.LoadCharacterSaveParameterMap()
-    MappingCache.LoadCharacterContainerMaps()
-    MappingCache.LoadMapObjectMaps()
 
 
 def FixBrokenObject(dry_run=False):
@@ -4433,12 +4520,11 @@ def FixBrokenObject(dry_run=False):
                      f"{tcl(0)}")
     if len(delete_map_objects) > 0 and not dry_run:
         BatchDeleteMapObject(delete_map_objects)
-        MappingCache.LoadMapObjectMaps()
     return delete_map_objects
 
 
 def GetReferencedItemContainerIdsByPlayer(player_uid):
-    err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid)
+    err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid, paths=PLAYER_CONTAINER_PATHS)
     if err:
         log.error(
             f"Player Sav file for {player_uid} Not exists: %s" % player_sav_file)
@@ -4474,11 +4560,11 @@ def DoubleCheckForUnreferenceItemContainers():
 
         DoubleCheckForDeleteItemContainers(itemContainerId)
 
-    LoadAllUUID()
+    graph = LoadAllUUID()
     for id in unreferencedContainerIds:
-        if id in guid_mapping and len(guid_mapping[id]) > 1:
+        if len(graph.Referrers(id)) > 0:
             log.info("Error: ID %s:" % id)
-            gp(guid_mapping[id])
+            gp(graph.ReferencePaths(id))
             print()
 
 
@@ -4495,11 +4581,11 @@ def DoubleCheckForUnreferenceCharacterContainers():
 
         DoubleCheckForDeleteCharacterContainers(characterContainerId)
 
-    LoadAllUUID()
+    graph = LoadAllUUID()
     for id in unreferencedContainerIds:
-        if id in guid_mapping and len(guid_mapping[id]) > 1:
+        if len(graph.Referrers(id)) > 0:
             log.info("Error: ID %s:" % id)
-            gp(guid_mapping[id])
+            gp(graph.ReferencePaths(id))
             print()
 
 
@@ -4510,20 +4596,22 @@ def BatchDeleteUnreferencedItemContainers():
 
 
 def BatchDeleteItemContainer(itemContainerIds, progressCallback: Optional[Callable] = None):
-    deleteDynamicIds = []
-    deleteItemContainerIds = []
+    deleteDynamicItems = {}
+    deleteItemContainers = {}
     for itemContainerId in itemContainerIds:
         itemContainerId = toUUID(itemContainerId)
         if itemContainerId not in MappingCache.ItemContainerSaveData:
             log.error(f"Error: Item Container {itemContainerId} not found")
             continue
 
-        deleteItemContainerIds.append(itemContainerId)
-        if len(deleteItemContainerIds) % 10000 == 0:
-            log.info(f"Deleting Item Containers: {len(deleteItemContainerIds)} / {len(itemContainerIds)}")
-        if progressCallback is not None:
-            progressCallback(len(deleteItemContainerIds), len(itemContainerIds))
         container = parse_item(MappingCache.ItemContainerSaveData[itemContainerId], "ItemContainerSaveData")
+        if id(container) in deleteItemContainers:
+            continue
+        deleteItemContainers[id(container)] = container
+        if len(deleteItemContainers) % 10000 == 0:
+            log.info(f"Deleting Item Containers: {len(deleteItemContainers)} / {len(itemContainerIds)}")
+        if progressCallback is not None:
+            progressCallback(len(deleteItemContainers), len(itemContainerIds))
         containerSlots = container['value']['Slots']['value']['values']
         for slotItem in containerSlots:
             dynamicItemId = slotItem['ItemId']['value']['DynamicId']['value']['LocalIdInCreatedWorld']['value']
@@ -4533,29 +4621,29 @@ def BatchDeleteItemContainer(itemContainerIds, progressCallback: Optional[Callab
                 log.info(
                     f"{tcl(31)}  Error missed DynamicItemContainer UUID [{tcl(33)} {str(dynamicItemId)}{tcl(0)}]  Item {tcl(32)} {slotItem['ItemId']['value']['StaticId']['value']} {tcl(0)}")
                 continue
-            del MappingCache.DynamicItemSaveData[dynamicItemId]
-            deleteDynamicIds.append(dynamicItemId)
-
-        del MappingCache.ItemContainerSaveData[itemContainerId]
-
-    # print("batch delete itemc onta")
-    # print(len(MappingCache.ItemContainerSaveData.keys()))
-    wsd['ItemContainerSaveData']['value'] = [MappingCache.ItemContainerSaveData[container_id] for container_id in
-                                             MappingCache.ItemContainerSaveData]
-    wsd['DynamicItemSaveData']['value']['values'] = [MappingCache.DynamicItemSaveData[dynamicItemId] for dynamicItemId
-                                                     in MappingCache.DynamicItemSaveData]
-    log.info(f"Delete Dynamic Containers: {len(deleteDynamicIds)}")
-    log.info(f"Delete Item Containers: {len(deleteItemContainerIds)} / {len(itemContainerIds)}")
-    MappingCache.LoadItemContainerMaps()
+            dynamicItem = MappingCache.DynamicItemSaveData[dynamicItemId]
+            deleteDynamicItems[id(dynamicItem)] = dynamicItem
 
+    MappingCache.RemoveEntries('ItemContainerSaveData', deleteItemContainers.values())
+    MappingCache.RemoveEntries('DynamicItemSaveData', deleteDynamicItems.values())
+    log.info(f"Delete Dynamic Containers: {len(deleteDynamicItems)}")
+    log.info(f"Delete Item Containers: {len(deleteItemContainers)} / {len(itemContainerIds)}")
 
-def DeleteItemContainer(itemContainerId, isBatch=False):
-    itemContainerId = toUUID(itemContainerId)
-    if itemContainerId not in MappingCache.ItemContainerSaveData:
-        log.error(f"Error: Item Container {itemContainerId} not found")
-        return False
 
-    container = parse_item(MappingCache.ItemContainerSaveData[itemContainerId], "ItemContainerSaveData")
+def DeleteItemContainer(itemContainerId):
+    itemContainerId = toUUID(itemContainerId)
+    # Section still skipped, decode only the target container from the entry index
+    entry_index = MappingCache.GetSkipEntryIndex("ItemContainerSaveData")
+    if entry_index is not None:
+        if itemContainerId not in entry_index:
+            log.error(f"Error: Item Container {itemContainerId} not found")
+            return False
+        container = entry_index.decode(itemContainerId)
+    else:
+        if itemContainerId not in MappingCache.ItemContainerSaveData:
+            log.error(f"Error: Item Container {itemContainerId} not found")
+            return False
+        container = parse_item(MappingCache.ItemContainerSaveData[itemContainerId], "ItemContainerSaveData")
     containerSlots = container['value']['Slots']['value']['values']
     for slotItem in containerSlots:
         dynamicItemId = slotItem['ItemId']['value']['DynamicId']['value']['LocalIdInCreatedWorld']['value']
@@ -4566,26 +4654,45 @@ def DeleteItemContainer(itemContainerId, isBatch=False):
                 f"{tcl(31)}  Error missed DynamicItemContainer UUID [{tcl(33)} {str(dynamicItemId)}{tcl(0)}]  Item {tcl(32)} {slotItem['ItemId']['value']['StaticId']['value']} {tcl(0)}")
             continue
         log.info(f"  Delete DynamicItemId {dynamicItemId}")
-        try:
-            wsd['DynamicItemSaveData']['value']['values'].remove(MappingCache.DynamicItemSaveData[dynamicItemId])
-        except ValueError:
-            pass
+        MappingCache.RemoveEntry('DynamicItemSaveData', MappingCache.DynamicItemSaveData[dynamicItemId])
 
-    try:
-        wsd['ItemContainerSaveData']['value'].remove(container)
-    except ValueError:
-        pass
-    if not isBatch:
-        MappingCache.LoadItemContainerMaps()
+    if entry_index is not None:
+        entry_index.remove(itemContainerId)
+        return
+    MappingCache.RemoveEntry('ItemContainerSaveData', container)
 
 
 def LoadMapByRange(x, y):
-    for map_id in MappingCache.MapObjectSaveData:
-        mapObject = parse_item(MappingCache.MapObjectSaveData[map_id], "MapObjectSaveData.MapObjectSaveData")
-        vector = mapObject['WorldLocation']['value']
-        if (x[0] <= vector['x'] / 305 and vector['x'] / 305 <= x[1] and
-                y[0] <= vector['y'] / 1125 and vector['y'] / 1125 <= y[1]):
-            gp(mapObject)
+    for kind, map_id in MappingCache.SpatialIndex.Box(x, y, ['MapObject']):
+        gp(parse_item(MappingCache.MapObjectSaveData[map_id], "MapObjectSaveData.MapObjectSaveData"))
+
+
+def ShowNearby(x, y, radius=None, k=10):
+    spatial = MappingCache.SpatialIndex
+    for distance, kind, key in spatial.Nearest(x, y, k) if radius is None else spatial.Radius(x, y, radius):
+        if kind == 'BaseCamp':
+            name = MappingCache.BaseCampMapping[key]['value']['RawData']['value']['name']
+        else:
+            name = MappingCache.MapObjectSaveData[key]['MapObjectId']['value']
+        location = spatial.Location(kind, key)
+        print(f"  %7.1f  {tcl(33)}%-9s{tcl(0)} {tcl(32)}{key}{tcl(0)}  %4.0f, %4.0f  %s" % (
+            distance, kind, location[0], location[1], name))
+
+
+def DeleteMapObjectsInRange(x, y, radius, dry_run=False):
+    map_ids = [key for distance, kind, key in MappingCache.SpatialIndex.Radius(x, y, radius, ['MapObject'])]
+    log.info(f"{tcl(31)}Delete {len(map_ids)} map objects{tcl(0)} within {radius} of %d, %d" % (x, y))
+    if not dry_run:
+        BatchDeleteMapObject(map_ids)
+
+
+def ShowOverlappingBaseCamps():
+    for base_id, other_id, distance in MappingCache.SpatialIndex.OverlappingBaseCamps():
+        print(f"Base camp {tcl(32)}{base_id}{tcl(0)} {tcl(33)}%s{tcl(0)} overlaps {tcl(32)}{other_id}{tcl(0)} "
+              f"{tcl(33)}%s{tcl(0)}  distance %.1f" % (
+                  MappingCache.BaseCampMapping[base_id]['value']['RawData']['value']['name'],
+                  MappingCache.BaseCampMapping[other_id]['value']['RawData']['value']['name'], distance))
+
 
 def DeletePlayer(player_uid, InstanceId=None, dry_run=False):
     load_skipped_decode(wsd, ['ItemContainerSaveData', 'CharacterContainerSaveData', 'MapObjectSaveData',
@@ -4625,7 +4732,13 @@ def DeletePlayer(player_uid, InstanceId=None, dry_run=False):
     # Remove item from CharacterSaveParameterMap
     deleteCharacters = []
     log.info(f"{tcl(32)}Scan for remain item in CharacterSaveParameterMap{tcl(0)}")
-    for item in wsd['CharacterSaveParameterMap']['value']:
+    candidates = {}
+    for item in MappingCache.EntriesOf('PlayersByUId', player_uid) + \
+            MappingCache.EntriesOf('CharactersByOwner', player_uid) + \
+            [item for container_id in player_container_ids
+             for item in MappingCache.EntriesOf('CharactersBySlotContainer', container_id)]:
+        candidates[id(item)] = item
+    for item in candidates.values():
         player = item['value']['RawData']['value']['object']['SaveParameter']['value']
         if item['key']['PlayerUId']['value'] == player_uid \
                 and 'IsPlayer' in player and player['IsPlayer']['value'] \
@@ -4656,7 +4769,7 @@ def DeletePlayer(player_uid, InstanceId=None, dry_run=False):
     log.info(f"{tcl(32)}Delete from guild{tcl(0)}")
     # Remove Item from GroupSaveDataMap
     remove_guilds = []
-    for group_id in MappingCache.GuildSaveDataMap:
+    for group_id in list(MappingCache.GuildSaveDataMap):
         group_data = MappingCache.GuildSaveDataMap[group_id]
         item = group_data['value']['RawData']['value']
         for player in item['players']:
@@ -4667,7 +4780,8 @@ def DeletePlayer(player_uid, InstanceId=None, dry_run=False):
                         item['guild_name'], str(player['player_uid']),
                         player['player_info']['last_online_real_time']))
                 if not dry_run:
-                    item['players'].remove(player)
+                    with MappingCache.Updating('GroupSaveDataMap', group_data):
+                        item['players'].remove(player)
                     if len(item['players']) == 0:
                         remove_guilds.append(item['group_id'])
                 break
@@ -4676,15 +4790,10 @@ def DeletePlayer(player_uid, InstanceId=None, dry_run=False):
         for guild in remove_guilds:
             DeleteGuild(guild)
 
-    MappingCache.LoadGroupSaveDataMap()
-    MappingCache.LoadCharacterSaveParameterMap()
-    MappingCache.LoadCharacterContainerMaps()
-
     delete_map_ids = []
     if InstanceId is None:
-        for map_data in wsd['MapObjectSaveData']['value']['values']:
-            if map_data['Model']['value']['RawData']['value']['build_player_uid'] == player_uid:
-                delete_map_ids.append(map_data['MapObjectInstanceId']['value'])
+        for map_data in MappingCache.EntriesOf('MapObjectsByBuilder', player_uid):
+            delete_map_ids.append(map_data['MapObjectInstanceId']['value'])
     if not dry_run:
         BatchDeleteMapObject(delete_map_ids)
     if InstanceId is None:
@@ -4693,6 +4802,160 @@ def DeletePlayer(player_uid, InstanceId=None, dry_run=False):
         log.info("Finish to remove player from Save")
 
 
+def BatchDeletePlayers(player_uids, dry_run=False):
+    """
+    Delete several players at once: the closure of player containers, pals, guild memberships, map objects,
+    work data and player saves is collected for all players first, then every section is compacted once
+    """
+    t1 = time.time()
+    load_skipped_decode(wsd, ['ItemContainerSaveData', 'CharacterContainerSaveData', 'MapObjectSaveData',
+                              'MapObjectSpawnerInStageSaveData', 'DynamicItemSaveData'], False)
+    targets = []
+    for player_uid in player_uids:
+        if isinstance(player_uid, int):
+            player_uid = str(uuid.UUID("%08x-0000-0000-0000-000000000000" % player_uid))
+        player_uid = toUUID(player_uid)
+        if player_uid not in targets:
+            targets.append(player_uid)
+    target_set = set(targets)
+    LoadPlayerSaves(paths=PLAYER_CONTAINER_PATHS)
+
+    delete_character_containers = set()
+    delete_item_containers = set()
+    delete_characters = {}
+    delete_map_ids = set()
+    player_files = []
+    summary = {}
+    for player_uid in targets:
+        err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_uid, paths=PLAYER_CONTAINER_PATHS)
+        player_container_ids = []
+        if err:
+            log.error(f"Player Sav file Not exists: %s" % player_sav_file)
+        else:
+            for key in ['OtomoCharacterContainerId', 'PalStorageContainerId']:
+                player_container_ids.append(player_gvas[key]['value']['ID']['value'])
+            delete_character_containers.update(player_container_ids)
+            for key in ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
+                        'PlayerEquipArmorContainerId', 'WeaponLoadOutContainerId']:
+                delete_item_containers.add(player_gvas['InventoryInfo']['value'][key]['value']['ID']['value'])
+            player_files.append(player_sav_file)
+        pal_count = 0
+        for item in MappingCache.EntriesOf('PlayersByUId', player_uid) + \
+                MappingCache.EntriesOf('CharactersByOwner', player_uid) + \
+                [item for container_id in player_container_ids
+                 for item in MappingCache.EntriesOf('CharactersBySlotContainer', container_id)]:
+            # same checks as DeletePlayer, the index hits are only candidates
+            player = item['value']['RawData']['value']['object']['SaveParameter']['value']
+            if item['key']['PlayerUId']['value'] == player_uid \
+                    and 'IsPlayer' in player and player['IsPlayer']['value']:
+                is_pal = False
+            elif 'OwnerPlayerUId' in player and str(player['OwnerPlayerUId']['value']) == player_uid:
+                is_pal = True
+            elif 'SlotID' in player and player['SlotID']['value']['ContainerId']['value']['ID'][
+                'value'] in player_container_ids:
+                is_pal = True
+            else:
+                continue
+            instance_id = item['key']['InstanceId']['value']
+            if instance_id not in delete_characters:
+                delete_characters[instance_id] = item
+                if is_pal:
+                    pal_count += 1
+        # characters only referenced from the slots of the deleted containers
+        for container_id in player_container_ids:
+            if container_id not in MappingCache.CharacterContainerSaveData:
+                continue
+            try:
+                container = parse_item(MappingCache.CharacterContainerSaveData[container_id]['value']['Slots'],
+                                       "CharacterContainerSaveData.Value.Slots")
+            except KeyError:
+                continue
+            for slotItem in container['value']['values']:
+                instance_id = slotItem['RawData']['value']['instance_id']
+                if instance_id != PalObject.EmptyUUID and instance_id in MappingCache.CharacterSaveParameterMap \
+                        and instance_id not in delete_characters:
+                    delete_characters[instance_id] = MappingCache.CharacterSaveParameterMap[instance_id]
+                    pal_count += 1
+        map_count = 0
+        for map_data in MappingCache.EntriesOf('MapObjectsByBuilder', player_uid):
+            delete_map_ids.add(map_data['MapObjectInstanceId']['value'])
+            map_count += 1
+        summary[player_uid] = [pal_count, map_count]
+
+    # guild memberships of all targets, one scan over the guilds
+    guild_updates = []
+    remove_guilds = []
+    for group_id in MappingCache.GuildSaveDataMap:
+        group_data = MappingCache.GuildSaveDataMap[group_id]
+        item = group_data['value']['RawData']['value']
+        members = [player for player in item['players'] if player['player_uid'] in target_set]
+        if len(members) == 0:
+            continue
+        for player in members:
+            log.info(
+                f"{tcl(31)}  Delete User {tcl(93)} %s {tcl(0)} from Guild{tcl(0)} {tcl(93)} %s {tcl(0)}   [{tcl(92)}%s{tcl(0)}] Last Online: %d" % (
+                    player['player_info']['player_name'],
+                    item['guild_name'], str(player['player_uid']),
+                    player['player_info']['last_online_real_time']))
+        guild_updates.append(group_data)
+        if len(members) == len(item['players']):
+            remove_guilds.append(item['group_id'])
+
+    reference_ids = None
+    for map_object_id in delete_map_ids:
+        if map_object_id in MappingCache.MapObjectSaveData:
+            reference_ids = FindReferenceMapObject(map_object_id, reference_ids)
+    if reference_ids is None:
+        reference_ids = {"MapObject": set(), "ItemContainer": set(), "WorkData": set(), "Spawner": set()}
+    delete_item_containers.update(reference_ids['ItemContainer'])
+    for item in delete_characters.values():
+        characterData = item['value']['RawData']['value']['object']['SaveParameter']['value']
+        for key in ['EquipItemContainerId', 'ItemContainerId']:
+            if key in characterData:
+                delete_item_containers.add(characterData[key]['value']['ID']['value'])
+
+    for player_uid in targets:
+        print(f"Player {tcl(93)}%s{tcl(0)}  Pals: %d  Map Objects: %d" % (
+            str(player_uid), summary[player_uid][0], summary[player_uid][1]))
+    report = {
+        'Players': len(targets),
+        'PlayerFiles': len(player_files),
+        'Characters': len(delete_characters),
+        'CharacterContainers': len(delete_character_containers),
+        'ItemContainers': len(delete_item_containers),
+        'GuildMemberships': len(guild_updates),
+        'Guilds': len(remove_guilds),
+        'MapObjects': len(reference_ids['MapObject']),
+        'WorkData': len(reference_ids['WorkData']),
+        'Spawners': len(reference_ids['Spawner'])
+    }
+    for key in report:
+        print(f"  {tcl(32)}%-20s{tcl(0)} %d" % (key, report[key]))
+    if dry_run:
+        print("Dry run, nothing deleted in %.2fs" % (time.time() - t1))
+        return report
+
+    BatchDeleteCharacter(list(delete_characters), item_containers=delete_item_containers)
+    BatchDeleteCharacterContainer(list(delete_character_containers))
+    _BatchDeleteMapObject(list(reference_ids['MapObject']))
+    _BatchDeleteWorkSaveData(list(reference_ids['WorkData']))
+    BatchDeleteItemContainer(list(delete_item_containers))
+    _BatchDeleteMapObjectSpawner(list(reference_ids['Spawner']))
+    for group_data in guild_updates:
+        with MappingCache.Updating('GroupSaveDataMap', group_data):
+            item = group_data['value']['RawData']['value']
+            item['players'] = [player for player in item['players'] if player['player_uid'] not in target_set]
+    if len(remove_guilds) > 0:
+        log.info(f"{tcl(32)}Delete guilds{tcl(0)}")
+        for guild in remove_guilds:
+            DeleteGuild(guild)
+    for player_sav_file in player_files:
+        backup_file(player_sav_file, True)
+        delete_files.append(player_sav_file)
+    print("Delete %d players in %.2fs" % (len(targets), time.time() - t1))
+    return report
+
+
 def search_keys(dicts, key, level=""):
     if isinstance(dicts, dict):
         if key in dicts:
@@ -4818,8 +5081,9 @@ def LoadPlayers(data_source=None):
     if data_source is None:
         data_source = wsd
 
+    srcMapping = MappingCacheObject.get(data_source, use_mp=not getattr(args, "reduce_memory", False))
     l_playerMapping = {}
-    for item in data_source['CharacterSaveParameterMap']['value']:
+    for item in srcMapping.SectionValues('CharacterSaveParameterMap'):
         playerStruct = item['value']['RawData']['value']['object']['SaveParameter']
         playerParams = playerStruct['value']
         # if "00000000-0000-0000-0000-000000000000" != str(item['key']['PlayerUId']['value']):
@@ -4830,7 +5094,8 @@ def LoadPlayers(data_source=None):
                         f"{tcl(33)}Warning: Corrupted player struct{tcl(0)} UUID {tcl(32)} %s {tcl(0)} Owner {tcl(32)} %s {tcl(0)}" % (
                             str(item['key']['PlayerUId']['value']), str(playerParams['OwnerPlayerUId']['value'])))
                     pp.pprint(playerParams)
-                    playerParams['IsPlayer']['value'] = False
+                    with srcMapping.Updating('CharacterSaveParameterMap', item):
+                        playerParams['IsPlayer']['value'] = False
                 elif 'NickName' in playerParams:
                     try:
                         playerParams['NickName']['value'].encode('utf-8')
@@ -4887,7 +5152,7 @@ def ShowPlayers(data_source=None):
 def FixDuplicateUser(dry_run=False):
     # Remove Unused in CharacterSaveParameterMap
     removeItems = []
-    for item in wsd['CharacterSaveParameterMap']['value']:
+    for item in MappingCache.SectionValues('CharacterSaveParameterMap'):
         if PalObject.EmptyUUID != item['key']['PlayerUId']['value']:
             player_meta = item['value']['RawData']['value']['object']['SaveParameter']['value']
             if item['key']['PlayerUId']['value'] not in MappingCache.GuildInstanceMapping:
@@ -4904,10 +5169,7 @@ def FixDuplicateUser(dry_run=False):
                         CharacterDescription(item)))
                 removeItems.append(item)
     if not dry_run:
-        for item in removeItems:
-            wsd['CharacterSaveParameterMap']['value'].remove(item)
-        MappingCache.LoadGuildInstanceMapping()
-        MappingCache.LoadCharacterSaveParameterMap()
+        MappingCache.RemoveEntries('CharacterSaveParameterMap', removeItems)
 
 
 def TickToHuman(tick):
@@ -4935,14 +5197,15 @@ def TickToLocal(tick):
 def BindGuildInstanceId(uid, instance_id):
     uid = toUUID(uid)
     instance_id = toUUID(instance_id)
-    for group_data in wsd['GroupSaveDataMap']['value']:
+    for group_data in MappingCache.SectionValues('GroupSaveDataMap'):
         if str(group_data['value']['GroupType']['value']['value']) == "EPalGroupType::Guild":
             item = group_data['value']['RawData']['value']
             for ind_char in item['individual_character_handle_ids']:
                 if ind_char['guid'] == uid:
                     log.info("Update Guild %s binding guild UID %s  %s -> %s" % (
                         item['guild_name'], uid, ind_char['instance_id'], instance_id))
-                    ind_char['instance_id'] = instance_id
+                    with MappingCache.Updating('GroupSaveDataMap', group_data):
+                        ind_char['instance_id'] = instance_id
                     MappingCache.GuildInstanceMapping[ind_char['guid']] = ind_char['instance_id']
             print()
 
@@ -4957,8 +5220,7 @@ def CopyCharacterContainer(containerId, src_wsd, dry_run=False, new_container_id
             containers['key']['ID']['value'] = toUUID(new_container_id)
             containerId = new_container_id
         if not dry_run:
-            wsd['CharacterContainerSaveData']['value'].append(containers)
-            MappingCache.CharacterContainerSaveData[containerId] = containers
+            MappingCache.InsertEntry('CharacterContainerSaveData', containers)
     else:
         log.error(f"Error: Character Container {containerId} not found")
         return []
@@ -4971,38 +5233,39 @@ def CopyCharacterContainer(containerId, src_wsd, dry_run=False, new_container_id
         log.error(f"Copy Character Container failed, invalid containerId: {containerId}")
         raise KeyError(f"Copy Character Container failed, invalid containerId: {containerId}")
 
-    if container_only:
-        for idx, containerSlot in enumerate(containerSlots):
-            containerSlots[idx] = PalObject.PalCharacterSlotSaveData_Array(
-                PalObject.EmptyUUID,
-                PalObject.EmptyUUID,
-                PalObject.EmptyUUID)
-    else:
-        copyItemList = set()
-        for slotItem in containerSlots:
-            if slotItem['IndividualId']['value']['InstanceId']['value'] != PalObject.EmptyUUID:
-                copyItemList.add(slotItem['RawData']['value']['instance_id'])
-            if slotItem['RawData']['value']['instance_id'] != PalObject.EmptyUUID:
-                copyItemList.add(slotItem['RawData']['value']['instance_id'])
-                slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+    copyItemList = set()
+    with srcMappingCache.Updating('CharacterContainerSaveData', srcMappingCache.CharacterContainerSaveData[containerId]):
+        if container_only:
+            for idx, containerSlot in enumerate(containerSlots):
+                containerSlots[idx] = PalObject.PalCharacterSlotSaveData_Array(
+                    PalObject.EmptyUUID,
+                    PalObject.EmptyUUID,
+                    PalObject.EmptyUUID)
+        else:
+            for slotItem in containerSlots:
+                if slotItem['IndividualId']['value']['InstanceId']['value'] != PalObject.EmptyUUID:
+                    copyItemList.add(slotItem['RawData']['value']['instance_id'])
+                if slotItem['RawData']['value']['instance_id'] != PalObject.EmptyUUID:
+                    copyItemList.add(slotItem['RawData']['value']['instance_id'])
+                    slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+    if not container_only:
         for characterId in copyItemList:
             new_uuid = CopyCharacter(characterId, src_wsd, target_container=containerId, dry_run=dry_run)
 
-    MappingCache.LoadCharacterContainerMaps()
     return list(copyItemList)
 
 
-def DeleteCharacterContainer(containerId, isBatch=False):
+def DeleteCharacterContainer(containerId):
     containerId = toUUID(containerId)
     if containerId in MappingCache.CharacterContainerSaveData:
-        wsd['CharacterContainerSaveData']['value'].remove(MappingCache.CharacterContainerSaveData[containerId])
+        characterContainer = MappingCache.CharacterContainerSaveData[containerId]
+        MappingCache.RemoveEntry('CharacterContainerSaveData', characterContainer)
     else:
         log.error(f"Error: Character Container {containerId} not found")
         return []
 
     try:
-        container = parse_item(MappingCache.CharacterContainerSaveData[containerId]['value']['Slots'],
-                               "CharacterContainerSaveData.Value.Slots")
+        container = parse_item(characterContainer['value']['Slots'], "CharacterContainerSaveData.Value.Slots")
         containerSlots = container['value']['values']
     except KeyError:
         return
@@ -5013,26 +5276,29 @@ def DeleteCharacterContainer(containerId, isBatch=False):
         if slotItem['RawData']['value']['instance_id'] != PalObject.EmptyUUID:
             removeItemList.add(slotItem['RawData']['value']['instance_id'])
     BatchDeleteCharacter(removeItemList)
-    if not isBatch:
-        MappingCache.LoadCharacterContainerMaps()
     return list(removeItemList)
 
 
-guid_mapping = None
-
-
-def LoadAllUUID():
-    global guid_mapping
+def LoadAllUUID() -> ReferenceGraph:
     load_skipped_decode(wsd, ['MapObjectSaveData', 'FoliageGridSaveDataMap', 'MapObjectSpawnerInStageSaveData',
                               'ItemContainerSaveData', 'DynamicItemSaveData', 'CharacterContainerSaveData'])
-    if guid_mapping is None:
-        print("Loading GUID Mapping")
-        guid_mapping = search_guid(wsd, printout=False)
-        print("Done")
+    return MappingCache.ReferenceGraph
+
+
+def ShowReferences(guid):
+    graph = LoadAllUUID()
+    guid = toUUID(guid)
+    for section in graph.DefinedIn(guid):
+        print(f"Defined in {tcl(32)}{section}{tcl(0)}")
+    for section, key, entry in graph.Referrers(guid):
+        for guid_type in set(edge_type for ref_guid, edge_type in graph.References(entry) if ref_guid == guid):
+            print(f"Referred as {tcl(33)}{guid_type}{tcl(0)} by {tcl(32)}{section}{tcl(0)} {key}")
+    for path in graph.ReferencePaths(guid):
+        print("wsd%s" % path)
 
 
 def DoubleCheckForDeleteItemContainers(itemContainerId, printout=True):
-    LoadAllUUID()
+    graph = LoadAllUUID()
     container = parse_item(MappingCache.ItemContainerSaveData[itemContainerId], "ItemContainerSaveData")
     guids = set(search_guid(container, printout=False).keys())
     guids.remove(itemContainerId)
@@ -5048,9 +5314,11 @@ def DoubleCheckForDeleteItemContainers(itemContainerId, printout=True):
             continue
         guids.update(search_guid(MappingCache.DynamicItemSaveData[dynamicItemId], printout=False))
         guids.remove(dynamicItemId)
-        if dynamicItemId in guid_mapping and len(guid_mapping[dynamicItemId]) > 3:
+        # outside its own entry a dynamic item is only found once, in the slot of its container
+        referrer_paths = graph.ReferencePaths(dynamicItemId)
+        if len(referrer_paths) > 1:
             log.error("Error: Dynamic Item ID %s:" % dynamicItemId)
-            gp(guid_mapping[dynamicItemId])
+            gp(referrer_paths)
     belongInfo = parse_item(container['value']['BelongInfo'], "ItemContainerSaveData.Value.BelongInfo")
     if 'GroupID' in belongInfo['value'] and belongInfo['value']['GroupID']['value'] != PalObject.EmptyUUID:
         guids.remove(belongInfo['value']['GroupID']['value'])
@@ -5105,46 +5373,32 @@ def _DoubleCheckForDeleteModel(modelId):
 def _DeleteWorkSaveData(wrk_id):
     try:
         if wrk_id in MappingCache.WorkSaveData:
-            wsd['WorkSaveData']['value']['values'].remove(MappingCache.WorkSaveData[wrk_id])
+            MappingCache.RemoveEntry('WorkSaveData', MappingCache.WorkSaveData[wrk_id])
     except ValueError:
         log.error(f"Failed to Delete WorkSave Data {wrk_id}")
 
 
 def _BatchDeleteWorkSaveData(wrk_ids):
-    for wrk_id in wrk_ids:
-        try:
-            del MappingCache.WorkSaveData[wrk_id]
-        except KeyError:
-            pass
-    wsd['WorkSaveData']['value']['values'] = [MappingCache.WorkSaveData[x] for x in MappingCache.WorkSaveData]
-    MappingCache.LoadWorkSaveData()
+    MappingCache.RemoveEntries('WorkSaveData', [MappingCache.WorkSaveData[wrk_id] for wrk_id in set(wrk_ids)
+                                                if wrk_id in MappingCache.WorkSaveData])
 
 
 def _BatchDeleteMapObject(map_ids):
-    for map_id in map_ids:
-        try:
-            del MappingCache.MapObjectSaveData[map_id]
-        except KeyError:
-            pass
-    wsd['MapObjectSaveData']['value']['values'] = [MappingCache.MapObjectSaveData[x] for x in
-                                                   MappingCache.MapObjectSaveData]
+    MappingCache.RemoveEntries('MapObjectSaveData', [MappingCache.MapObjectSaveData[map_id] for map_id in set(map_ids)
+                                                     if map_id in MappingCache.MapObjectSaveData])
 
 
 def _BatchDeleteMapObjectSpawner(spawner_ids):
-    for spawner_id in spawner_ids:
-        try:
-            del MappingCache.MapObjectSpawnerInStageSaveData[spawner_id]
-        except KeyError:
-            pass
-    wsd['MapObjectSpawnerInStageSaveData']['value'][0]['value']['SpawnerDataMapByLevelObjectInstanceId']['value'] = \
-        [MappingCache.MapObjectSpawnerInStageSaveData[x] for x in MappingCache.MapObjectSpawnerInStageSaveData]
+    MappingCache.RemoveEntries('MapObjectSpawnerInStageSaveData',
+                               [MappingCache.MapObjectSpawnerInStageSaveData[spawner_id] for spawner_id in
+                                set(spawner_ids) if spawner_id in MappingCache.MapObjectSpawnerInStageSaveData])
 
 
 def _CopyWorkSaveData(wrk_id, old_wsd):
     OldMappingCache = MappingCacheObject.get(old_wsd, use_mp=not getattr(args, "reduce_memory", False))
     try:
         if wrk_id in OldMappingCache.WorkSaveData:
-            wsd['WorkSaveData']['value']['values'].append(copy.deepcopy(OldMappingCache.WorkSaveData[wrk_id]))
+            MappingCache.InsertEntry('WorkSaveData', copy.deepcopy(OldMappingCache.WorkSaveData[wrk_id]))
     except ValueError:
         log.error(f"Failed to Clone WorkSave Data {wrk_id}")
 
@@ -5184,7 +5438,8 @@ def CopyBaseCamp(base_id, group_id, old_wsd, dry_run=False):
         log.error(f"Error: Base id {base_id} is duplicated on target")
         return False
     if not dry_run:
-        group_data['base_ids'].append(base_id)
+        with MappingCache.Updating('GroupSaveDataMap', MappingCache.GroupSaveDataMap[group_id]):
+            group_data['base_ids'].append(base_id)
 
     if baseCamp['RawData']['value']['owner_map_object_instance_id'] in \
             src_group_data['map_object_instance_ids_base_camp_points']:
@@ -5192,8 +5447,9 @@ def CopyBaseCamp(base_id, group_id, old_wsd, dry_run=False):
             f"Copy Group UUID {baseCamp['RawData']['value']['group_id_belong_to']}  Map Instance ID {baseCamp['RawData']['value']['owner_map_object_instance_id']}")
         CopyMapObject(baseCamp['RawData']['value']['owner_map_object_instance_id'], old_wsd, dry_run)
         if not dry_run:
-            group_data['map_object_instance_ids_base_camp_points'].append(
-                baseCamp['RawData']['value']['owner_map_object_instance_id'])
+            with MappingCache.Updating('GroupSaveDataMap', MappingCache.GroupSaveDataMap[group_id]):
+                group_data['map_object_instance_ids_base_camp_points'].append(
+                    baseCamp['RawData']['value']['owner_map_object_instance_id'])
     for wrk_id in baseCamp['WorkCollection']['value']['RawData']['value']['work_ids']:
         if wrk_id in srcMappingCache.WorkSaveData:
             modelId = srcMappingCache.WorkSaveData[wrk_id]['RawData']['value']['owner_map_object_model_id']
@@ -5212,56 +5468,56 @@ def CopyBaseCamp(base_id, group_id, old_wsd, dry_run=False):
             log.info(
                 f"Clone Character Instance {instance['guid']}  {instance['instance_id']} from Group individual_character_handle_ids")
             if not dry_run:
-                group_data['individual_character_handle_ids'].append(copy.deepcopy(instance))
+                with MappingCache.Updating('GroupSaveDataMap', MappingCache.GroupSaveDataMap[group_id]):
+                    group_data['individual_character_handle_ids'].append(copy.deepcopy(instance))
 
     copy_map_objs = []
-    for model in old_wsd['MapObjectSaveData']['value']['values']:
-        if model['Model']['value']['RawData']['value']['base_camp_id_belong_to'] == base_id:
-            copy_map_objs.append(model['MapObjectInstanceId']['value'])
+    for model in srcMappingCache.EntriesOf('MapObjectsByBaseCamp', base_id):
+        copy_map_objs.append(model['MapObjectInstanceId']['value'])
     for modelId in copy_map_objs:
         if not dry_run:
             CopyMapObject(modelId, old_wsd, dry_run)
     if not dry_run:
-        wsd['BaseCampSaveData']['value'].append(srcMappingCache.BaseCampMapping[base_id])
-    MappingCache.LoadMapObjectMaps()
-    MappingCache.LoadWorkSaveData()
-    MappingCache.LoadBaseCampMapping()
-    MappingCache.LoadGroupSaveDataMap()
+        MappingCache.InsertEntry('BaseCampSaveData', srcMappingCache.BaseCampMapping[base_id])
     return True
 
 
 def DeleteBaseCamp(base_id, group_id=None):
     base_id = toUUID(base_id)
+    group = None
     group_data = None
     if group_id is not None and toUUID(group_id) in MappingCache.GroupSaveDataMap:
-        group_data = MappingCache.GroupSaveDataMap[toUUID(group_id)]['value']['RawData']['value']
+        group = MappingCache.GroupSaveDataMap[toUUID(group_id)]
+        group_data = group['value']['RawData']['value']
         log.info(f"Delete Group UUID {group_id}  Base Camp ID {base_id}")
         if base_id in group_data['base_ids']:
             idx = group_data['base_ids'].index(base_id)
-            if len(group_data['base_ids']) == len(group_data['map_object_instance_ids_base_camp_points']):
-                group_data['base_ids'].remove(base_id)
-                group_data['map_object_instance_ids_base_camp_points'].pop(idx)
-            else:
-                group_data['base_ids'].remove(base_id)
+            with MappingCache.Updating('GroupSaveDataMap', group):
+                if len(group_data['base_ids']) == len(group_data['map_object_instance_ids_base_camp_points']):
+                    group_data['base_ids'].remove(base_id)
+                    group_data['map_object_instance_ids_base_camp_points'].pop(idx)
+                else:
+                    group_data['base_ids'].remove(base_id)
     if base_id not in MappingCache.BaseCampMapping:
         log.error(f"Error: Base camp {base_id} not found")
         return False
     baseCamp = MappingCache.BaseCampMapping[base_id]['value']
     if baseCamp['RawData']['value']['group_id_belong_to'] in MappingCache.GroupSaveDataMap:
-        group_data = \
-            MappingCache.GroupSaveDataMap[baseCamp['RawData']['value']['group_id_belong_to']]['value']['RawData'][
-                'value']
+        group = MappingCache.GroupSaveDataMap[baseCamp['RawData']['value']['group_id_belong_to']]
+        group_data = group['value']['RawData']['value']
         if base_id in group_data['base_ids']:
             log.info(
                 f"  Delete Group UUID {baseCamp['RawData']['value']['group_id_belong_to']}  Base Camp ID {base_id}")
-            group_data['base_ids'].remove(base_id)
+            with MappingCache.Updating('GroupSaveDataMap', group):
+                group_data['base_ids'].remove(base_id)
         if baseCamp['RawData']['value']['owner_map_object_instance_id'] in group_data[
             'map_object_instance_ids_base_camp_points']:
             log.info(
                 f"  Delete Group UUID {baseCamp['RawData']['value']['group_id_belong_to']}  Map Instance ID {baseCamp['RawData']['value']['owner_map_object_instance_id']}")
             DeleteMapObject(baseCamp['RawData']['value']['owner_map_object_instance_id'])
-            group_data['map_object_instance_ids_base_camp_points'].remove(
-                baseCamp['RawData']['value']['owner_map_object_instance_id'])
+            with MappingCache.Updating('GroupSaveDataMap', group):
+                group_data['map_object_instance_ids_base_camp_points'].remove(
+                    baseCamp['RawData']['value']['owner_map_object_instance_id'])
     for wrk_id in baseCamp['WorkCollection']['value']['RawData']['value']['work_ids']:
         if wrk_id in MappingCache.WorkSaveData:
             modelId = MappingCache.WorkSaveData[wrk_id]['RawData']['value']['owner_map_object_model_id']
@@ -5275,41 +5531,32 @@ def DeleteBaseCamp(base_id, group_id=None):
     if not group_data is None:
         instance_lists = \
             list(filter(lambda x: x['instance_id'] in instanceIds, group_data['individual_character_handle_ids']))
-        for instance in instance_lists:
-            log.info(
-                f"  Remove Character Instance {instance['guid']}  {instance['instance_id']} from Group individual_character_handle_ids")
-            group_data['individual_character_handle_ids'].remove(instance)
+        with MappingCache.Updating('GroupSaveDataMap', group):
+            for instance in instance_lists:
+                log.info(
+                    f"  Remove Character Instance {instance['guid']}  {instance['instance_id']} from Group individual_character_handle_ids")
+                group_data['individual_character_handle_ids'].remove(instance)
 
-    IsDynamicItemDeleted = False
+    deleteDynamicItems = []
     for BaseCampModule in baseCamp['ModuleMap']['value']:
         if BaseCampModule['key'] == "EPalBaseCampModuleType::TransportItemDirector":
             for transport_item in BaseCampModule['value']['RawData']['value']['transport_item_character_infos']:
                 for item_info in transport_item['item_infos']:
-                    if item_info['item_id']['dynamic_id']['local_id_in_created_world'] != PalObject.EmptyUUID:
-                        IsDynamicItemDeleted = True
-                        del MappingCache.DynamicItemSaveData[
-                            item_info['item_id']['dynamic_id']['local_id_in_created_world']]
-
-    if IsDynamicItemDeleted:
-        wsd['DynamicItemSaveData']['value']['values'] = [MappingCache.DynamicItemSaveData[dynamicItemId] for
-                                                         dynamicItemId in MappingCache.DynamicItemSaveData]
-        MappingCache.LoadItemContainerMaps()
+                    dynamic_id = item_info['item_id']['dynamic_id']['local_id_in_created_world']
+                    if dynamic_id != PalObject.EmptyUUID and dynamic_id in MappingCache.DynamicItemSaveData:
+                        deleteDynamicItems.append(MappingCache.DynamicItemSaveData[dynamic_id])
+    MappingCache.RemoveEntries('DynamicItemSaveData', deleteDynamicItems)
 
     delete_map_objs = []
-    for model in wsd['MapObjectSaveData']['value']['values']:
-        if model['Model']['value']['RawData']['value']['base_camp_id_belong_to'] == base_id:
-            delete_map_objs.append(model['MapObjectInstanceId']['value'])
+    for model in MappingCache.EntriesOf('MapObjectsByBaseCamp', base_id):
+        delete_map_objs.append(model['MapObjectInstanceId']['value'])
     BatchDeleteMapObject(delete_map_objs)
-    wsd['BaseCampSaveData']['value'].remove(MappingCache.BaseCampMapping[base_id])
-    MappingCache.LoadMapObjectMaps()
-    MappingCache.LoadWorkSaveData()
-    MappingCache.LoadBaseCampMapping()
-    MappingCache.LoadGroupSaveDataMap()
+    MappingCache.RemoveEntry('BaseCampSaveData', MappingCache.BaseCampMapping[base_id])
     return True
 
 
 def DoubleCheckForDeleteBaseCamp(base_id):
-    LoadAllUUID()
+    graph = LoadAllUUID()
     base_id = toUUID(base_id)
     if base_id not in MappingCache.BaseCampMapping:
         log.error(f"Error: Base camp {base_id} not found")
@@ -5359,27 +5606,23 @@ def DoubleCheckForDeleteBaseCamp(base_id):
         gp(baseCamp)
 
     DeleteBaseCamp(base_id)
-    global guid_mapping
-    guid_mapping = None
-    LoadAllUUID()
     for guid in full_guids:
-        if guid in guid_mapping:
+        if len(graph.Referrers(guid)) > 0 or len(graph.DefinedIn(guid)) > 0:
             log.error(f"Error after delete uuid {guid}")
-            gp(guid_mapping[guid])
+            gp(graph.DefinedIn(guid) + graph.ReferencePaths(guid))
     return full_guids
 
 
 def DeleteGuild(group_id):
-    groupMapping = {str(group['key']): group for group in wsd['GroupSaveDataMap']['value']}
-    if str(group_id) not in groupMapping:
+    group = MappingCache.GroupSaveDataMap.get(toUUID(group_id), None)
+    if group is None:
         return False
-    group_info = groupMapping[str(group_id)]['value']['RawData']['value']
-    for base_id in group_info['base_ids']:
+    group_info = group['value']['RawData']['value']
+    for base_id in list(group_info['base_ids']):
         DeleteBaseCamp(base_id, group_id)
     log.info(f"{tcl(31)}Delete Guild{tcl(0)} {tcl(93)} %s {tcl(0)}  UUID: %s" % (
         group_info['guild_name'], str(group_info['group_id'])))
-    wsd['GroupSaveDataMap']['value'].remove(groupMapping[str(group_id)])
-    return True
+    return MappingCache.RemoveEntry('GroupSaveDataMap', group)
 
 
 def ShowGuild(data_src=None):
@@ -5553,46 +5796,227 @@ def PrettyPrint(data, level=0):
 
 
 def backup_file(file, isPlayerSave=False):
+    """Pin file before it is replaced and queue it to the deduplicating backup store, return the job future"""
     if not os.path.exists(file):
+        return None
+    store = BackupStore.get(os.path.join(os.path.dirname(backup_path), "store"))
+    print(
+        f"Backup file {tcl(32)}{file}{tcl(0)} to {tcl(32)}backup/store {os.path.basename(backup_path)}{tcl(0)}...",
+        flush=True, end="")
+    mtime = os.path.getmtime(file)
+    pinned_path = store.pin(file)
+    job = store.submit(os.path.basename(backup_path), ("Players/" if isPlayerSave else "") + os.path.basename(file),
+                       pinned_path, mtime, log_io.getvalue())
+    if not isPlayerSave and getattr(args, "snapshot_chain", False):
+        store.executor.submit(snapshot_chain_add, SnapshotChain.for_file(file), pinned_path, mtime)
+    store.executor.submit(store.unpin, pinned_path)
+    print("Queued")
+    return job
+
+
+def backup_store(path=None):
+    if path is None:
+        if backup_path is None:
+            log.error("No save loaded, give the backup store path")
+            return None
+        path = os.path.join(os.path.dirname(backup_path), "store")
+    elif os.path.isdir(os.path.join(path, "backup", "store")):
+        path = os.path.join(path, "backup", "store")
+    return BackupStore.get(path)
+
+
+def ListBackups(path=None):
+    store = backup_store(path)
+    if store is None:
+        return
+    store.wait()
+    for name in store.names():
+        manifest = store.load_manifest(name)
+        print("%s  %s  %d files  %10.1f MB  %8.2f MB new" % (
+            name, datetime.datetime.fromtimestamp(manifest['time']).strftime("%Y-%m-%d %H:%M:%S"),
+            len(manifest['files']), sum(entry['size'] for entry in manifest['files'].values()) / 1048576,
+            manifest['stored'] / 1048576))
+        for arcname, entry in manifest['files'].items():
+            print("    %-60s %10.1f MB  %s" % (arcname, entry['size'] / 1048576, entry['format']))
+    print("Backup store %s: %.1f MB" % (store.root, store.stored_size() / 1048576))
+
+
+def RestoreBackup(name, target_dir=None, files=None, path=None):
+    """
+    Restore the files of backup name, Sav files are compressed again from the backed up GVAS,
+    they load the same but are not byte identical to the original files
+    """
+    store = backup_store(path)
+    if store is None:
         return
-    if not os.path.exists(os.path.dirname(backup_path)):
-        os.mkdir(os.path.dirname(backup_path))
-    backup_tar = tarfile.open(f"{backup_path}.tar", mode='a')
+    store.wait()
+    if name not in store.names():
+        log.error(f"Backup {name} not found in {store.root}")
+        return
+    if target_dir is None:
+        target_dir = os.path.join(os.path.dirname(store.root), "restore", name)
+    print(f"Restore backup {tcl(32)}{name}{tcl(0)} to {tcl(32)}{target_dir}{tcl(0)}...", end="", flush=True)
+    start_time = time.time()
+    restored = store.restore(name, target_dir, files, getattr(args, "compress_threads", None))
+    print("Done in %.2fs" % (time.time() - start_time))
+    for restored_file in restored:
+        print("  %s" % restored_file)
 
-    info = tarfile.TarInfo("log.txt")
-    log_byteio = io.BytesIO()
-    log_byteio.write(log_io.getvalue().encode('utf-8'))
-    info.size = log_byteio.tell()
-    log_byteio.seek(0, io.SEEK_SET)
-    backup_tar.addfile(info, log_byteio)
 
-    print(
-        f"Backup file {tcl(32)}{file}{tcl(0)} to {tcl(32)}backup/{os.path.basename(backup_path)}.tar{tcl(0)}...",
-        flush=True, end="")
-    with open(file, "rb") as f:
-        info = tarfile.TarInfo(("Players/" if isPlayerSave else "") + os.path.basename(file))
-        info.size = os.path.getsize(file)
-        backup_tar.addfile(info, f)
-        backup_tar.close()
+def snapshot_chain_add(chain, path, mtime):
+    try:
+        with open(path, "rb") as f:
+            raw_gvas, save_type = decompress_sav_to_gvas(f.read())
+        return chain.add(raw_gvas, save_type, datetime.datetime.fromtimestamp(mtime).strftime("%Y%m%d-%H%M%S"), mtime)
+    except Exception as e:
+        log.error(f"Snapshot chain {chain.root} failed: {e}")
 
-    print("Done")
 
+def snapshot_filename(filename=None):
+    return os.path.abspath(filename if filename is not None else args.filename)
 
-def Save(exit_now=True):
-    print("processing GVAS to Sav file...", end="", flush=True)
-    if "Pal.PalWorldSaveGame" in gvas_file.header.save_game_class_name or "Pal.PalLocalWorldSaveGame" in gvas_file.header.save_game_class_name:
+
+def SnapshotSave(filename=None, chain=None):
+    filename = snapshot_filename(filename)
+    if chain is None:
+        chain = SnapshotChain.for_file(filename)
+    print(f"Snapshot {tcl(32)}{filename}{tcl(0)}...", end="", flush=True)
+    start_time = time.time()
+    mtime = os.path.getmtime(filename)
+    with open(filename, "rb") as f:
+        raw_gvas, save_type = decompress_sav_to_mmap(f)
+    entry = chain.add(raw_gvas, save_type, datetime.datetime.fromtimestamp(mtime).strftime("%Y%m%d-%H%M%S"), mtime)
+    if entry is None:
+        print("Unchanged in %.2fs" % (time.time() - start_time))
+    else:
+        print("Done in %.2fs, %s %s %.2f MB" % (time.time() - start_time, entry['name'], entry['kind'],
+                                                entry['stored'] / 1048576))
+    return chain
+
+
+def WatchSnapshots(filename=None, interval=60):
+    filename = snapshot_filename(filename)
+    chain = SnapshotChain.for_file(filename)
+    last_mtime = None
+    print(f"Watching {filename} every {interval}s, Ctrl-C to stop")
+    try:
+        while True:
+            mtime = os.path.getmtime(filename)
+            # wait one more interval when the server is still writing the file
+            if mtime != last_mtime and time.time() - mtime >= 1:
+                try:
+                    SnapshotSave(filename, chain)
+                    last_mtime = mtime
+                except Exception as e:
+                    log.error(f"Snapshot {filename} failed: {e}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def ListSnapshots(filename=None):
+    chain = SnapshotChain.for_file(snapshot_filename(filename))
+    total_size = 0
+    total_stored = 0
+    for entry in chain.index['entries']:
+        print("%-20s  %s  %-5s  %10.1f MB  %8.2f MB" % (
+            entry['name'], datetime.datetime.fromtimestamp(entry['time']).strftime("%Y-%m-%d %H:%M:%S"),
+            entry['kind'], entry['size'] / 1048576, entry['stored'] / 1048576))
+        total_size += entry['size']
+        total_stored += entry['stored']
+    print("Snapshot chain %s: %d versions, %.1f MB of GVAS stored in %.1f MB" % (
+        chain.root, len(chain.index['entries']), total_size / 1048576, total_stored / 1048576))
+
+
+def OpenSnapshot(name, filename=None):
+    chain = SnapshotChain.for_file(snapshot_filename(filename))
+    OpenBackup(chain.entry_path(chain.entry(name)))
+
+
+def MaterializeSnapshot(name, output=None, filename=None):
+    filename = snapshot_filename(filename)
+    chain = SnapshotChain.for_file(filename)
+    if output is None:
+        output = os.path.join(os.path.dirname(filename), "backup", "restore", name, os.path.basename(filename))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    print(f"Materialize snapshot {tcl(32)}{name}{tcl(0)} to {tcl(32)}{output}{tcl(0)}...", end="", flush=True)
+    start_time = time.time()
+    raw_gvas, save_type = chain.materialize(name)
+    with SavStreamWriter(output, save_type, getattr(args, "compress_threads", None)) as f:
+        f.write(raw_gvas)
+    raw_gvas.close()
+    print("Done in %.2fs" % (time.time() - start_time))
+    return output
+
+
+def write_sav_file(_gvas_file, filename, custom_properties):
+    """Stream the encoded GVAS through the compressor into filename, return the DirtyTracker with save stats"""
+    if "Pal.PalWorldSaveGame" in _gvas_file.header.save_game_class_name or \
+            "Pal.PalLocalWorldSaveGame" in _gvas_file.header.save_game_class_name:
         save_type = 0x32
     else:
         save_type = 0x31
-    sav_file = compress_gvas_to_sav(gvas_file.write(SKP_PALWORLD_CUSTOM_PROPERTIES), save_type)
-    print("Done")
-
-    print("Saving Sav file...", end="", flush=True)
-    backup_file(output_path, False)
-    with open(output_path, "wb") as f:
-        f.write(sav_file)
-    print("Done")
+    PlayerSaveCache.get().Invalidate(filename)
+    with SavStreamWriter(filename, save_type, getattr(args, "compress_threads", None)) as f:
+        return write_gvas_stream(_gvas_file, f, custom_properties, getattr(_gvas_file, "tracker", None))
+
+
+def BenchmarkCompress(threads=None):
+    """Compare compress_gvas_to_sav with the streaming single thread and parallel compressor on the loaded save"""
+    import tempfile
+    if "Pal.PalWorldSaveGame" in gvas_file.header.save_game_class_name or \
+            "Pal.PalLocalWorldSaveGame" in gvas_file.header.save_game_class_name:
+        save_type = 0x32
+    else:
+        save_type = 0x31
+    threads = SAV_COMPRESS_THREADS if threads is None else threads
+    print("Encoding GVAS...", end="", flush=True)
+    start_time = time.time()
+    MappingCache.Compact()
+    stream = io.BytesIO()
+    write_gvas_stream(gvas_file, stream, SKP_PALWORLD_CUSTOM_PROPERTIES, getattr(gvas_file, "tracker", None))
+    raw_gvas = stream.getvalue()
+    del stream
+    print("Done in %.2fs, %.1f MB" % (time.time() - start_time, len(raw_gvas) / 1048576))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_file = os.path.join(tmp_dir, "Level.sav")
+        results = []
+        start_time = time.time()
+        with open(tmp_file, "wb") as f:
+            f.write(compress_gvas_to_sav(raw_gvas, save_type))
+        results.append(("compress_gvas_to_sav", time.time() - start_time, os.path.getsize(tmp_file)))
+        for name, n in [("stream 1 thread", 1), ("stream %d threads" % threads, threads)]:
+            start_time = time.time()
+            with SavStreamWriter(tmp_file, save_type, n) as f:
+                f.write(raw_gvas)
+            results.append((name, time.time() - start_time, os.path.getsize(tmp_file)))
+            with open(tmp_file, "rb") as f:
+                if decompress_sav_to_gvas(f.read()) != (raw_gvas, save_type):
+                    log.error(f"{name} output mismatch")
+    for name, elapsed, size in results:
+        print("%-24s %8.2fs %8.1f MB/s %10.1f MB" % (name, elapsed, len(raw_gvas) / 1048576 / max(elapsed, 1e-6),
+                                                    size / 1048576))
+
+
+def Save(exit_now=True):
+    backup_job = backup_file(output_path, False)
+    print("Saving GVAS to Sav file...", end="", flush=True)
+    start_time = time.time()
+    # deleted entries are tombstones until here, one pass over each section they were removed from
+    MappingCache.Compact()
+    tracker = write_sav_file(gvas_file, output_path, SKP_PALWORLD_CUSTOM_PROPERTIES)
+    print("Done in %.2fs, %d / %d sections and %d / %d entries re-encoded" % (
+        time.time() - start_time, tracker.stats['encoded'], tracker.stats['sections'],
+        tracker.stats['encoded_entries'], tracker.stats['entries']))
     print("File saved to %s" % output_path)
+    if backup_job is not None:
+        try:
+            stats = backup_job.result()
+            print("Backup done in %.2fs, %d / %d chunks new, %.2f MB stored" % (
+                stats['time'], stats['new_chunks'], stats['chunks'], stats['stored'] / 1048576))
+        except Exception as e:
+            log.error(f"Backup {output_path} failed: {e}")
     for del_file in delete_files:
         try:
             os.unlink(del_file)
@@ -5778,6 +6202,7 @@ def buildDotImage():
 
         for group_id in MappingCache.GuildSaveDataMap:
             dot_guild(f, group_id)
+        LoadPlayerSaves(paths=PLAYER_CONTAINER_PATHS)
         for player_id in MappingCache.PlayerIdMapping:
             character = MappingCache.PlayerIdMapping[player_id]
             f.write(f'  "{character["value"]["RawData"]["value"]["group_id"]}" -> "{str(player_id)}"\n')
@@ -5785,7 +6210,7 @@ def buildDotImage():
             f.write(
                 f'  "{str(player_id)}" [shape="rect" fillcolor="orange" label="Player %s" style="filled" weight="40"]\n' %
                 characterData['NickName']['value'])
-            err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_id)
+            err, player_gvas, player_sav_file, player_gvas_file = GetPlayerGvas(player_id, paths=PLAYER_CONTAINER_PATHS)
             if err:
                 continue
             for idx_key in ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
@@ -6,6 +6,8 @@ from functools import reduce
 from palworld_save_tools.archive import *
 from palworld_save_tools.paltypes import *
 import palworld_save_tools.rawdata.group as palworld_save_group
+from palworld_save_tools.gvas import GvasFile, GvasHeader
+from palworld_save_tools.palsav import MAGIC_BYTES, decompress_sav_to_gvas
 import json
 import copy
 import multiprocessing
@@ -15,6 +17,19 @@ import msgpack
 import ctypes
 import sys
 import pprint
+import mmap
+import zlib
+import hashlib
+import concurrent.futures
+import threading
+import weakref
+import atexit
+import contextlib
+import math
+import struct
+import palworld_coord
+import shutil
+import logging
 
 try:
     from setproctitle import setproctitle
@@ -22,6 +37,8 @@ except ImportError:
     def setproctitle(name):
         pass
 
+log = logging.getLogger("save-editor")
+
 module_dir = os.path.dirname(os.path.realpath(__file__))
 if not os.path.exists("%s/resources/gui.json" % module_dir) and getattr(sys, 'frozen', False):
     module_dir = os.path.dirname(sys.executable)
@@ -78,7 +95,7 @@ class GvasPrettyPrint(pprint.PrettyPrinter):
                     if 'skip_type' in object:
                         write(f"{tcl(91)}**Skip Load Size: {len(object['value'])}**{tcl(0)}")
                     elif rep == "Array:ByteProperty" and 'values' in object['value'] and isinstance(
-                            object['value']['values'], tuple):
+                            object['value']['values'], (tuple, bytes)):
                         write(f"{tcl(91)}**Unparsed Size: {len(object['value']['values'])}**{tcl(0)}")
                     else:
                         self._format(object['value'], stream, indent + len(repr) + 1, allowance,
@@ -479,40 +496,63 @@ def encode_uuid(obj):
     return obj
 
 
+def unpack_view(data):
+    """Unpack msgpack from bytes or share memory view, the view is released after unpacked or failed"""
+    try:
+        return msgpack.unpackb(data, object_hook=decode_uuid, raw=False)
+    finally:
+        if isinstance(data, memoryview):
+            data.release()
+
+
+def detach_view(data):
+    if isinstance(data, memoryview):
+        copied = data.tobytes()
+        data.release()
+        return copied
+    return data
+
+
 class MPMapObject(dict):
-    def __init__(self, key, obj):
+    def __init__(self, key, obj, owner=None):
         self.parsed_key = False
         self.parsed_value = False
         self.key = key
         self.value = obj
+        # MPMapProperty to notify when key and value both parsed
+        self.owner = owner
         self.update({
             'key': None,
             'value': None
         })
 
+    @staticmethod
+    def unpack(data):
+        """Unpack the key or value view, the view is kept for detach() when it fails to unpack"""
+        value = unpack_view(data[:])
+        if isinstance(data, memoryview):
+            data.release()
+        return value
+
     def __getitem__(self, key):
         if key == 'key':
             if not self.parsed_key:
+                self.key = MPMapObject.unpack(self.key)
                 self.parsed_key = True
-                self.key = msgpack.unpackb(self.key, object_hook=decode_uuid, raw=False)
                 self.update({
                     'key': self.key
                 })
-            if self.parsed_value:
-                self.__getitem__ = super().__getitem__
-                self.__iter__ = super().__iter__
+                self.parsed()
             return self.key
         if key == 'value':
             if not self.parsed_value:
-                self.parsed_value = True
                 # pickle.loads
-                self.value = msgpack.unpackb(self.value, object_hook=decode_uuid, raw=False)
+                self.value = MPMapObject.unpack(self.value)
+                self.parsed_value = True
                 self.update({
                     'value': self.value
                 })
-            if self.parsed_key:
-                self.__getitem__ = super().__getitem__
-                self.__iter__ = super().__iter__
+                self.parsed()
             return self.value
         return super().__getitem__(key)
 
@@ -524,6 +564,45 @@ class MPMapObject(dict):
         if 'value' not in self:
             yield 'value'
 
+    def parsed(self):
+        if self.parsed_key and self.parsed_value:
+            self.__getitem__ = super().__getitem__
+            self.__iter__ = super().__iter__
+            if self.owner is not None:
+                owner = self.owner
+                self.owner = None
+                owner.item_parsed()
+
+    def fill(self, key, value):
+        """Set the unparsed parts from bulk loaded objects"""
+        if not self.parsed_key:
+            detach_view(self.key)
+            self.parsed_key = True
+            self.key = key
+            self.update({'key': key})
+        if not self.parsed_value:
+            detach_view(self.value)
+            self.parsed_value = True
+            self.value = value
+            self.update({'value': value})
+        self.owner = None
+        self.parsed()
+
+    def detach(self):
+        """Copy unparsed share memory views before the share memory closed"""
+        self.owner = None
+        if not self.parsed_key:
+            self.key = detach_view(self.key)
+        if not self.parsed_value:
+            self.value = detach_view(self.value)
+
+
+class MPOverflowError(ValueError):
+    pass
+
+
+ENTRY_DIGEST_SIZE = 16
+
 
 class MMapProperty(ctypes.Structure):
     _fields_ = [("current", ctypes.c_ulong),
@@ -542,13 +621,23 @@ class MPMapProperty(list):
         count = kwargs.get("count", 0)
         data = kwargs.get("data", None)
         self.data = None
+        intsize = ctypes.sizeof(ctypes.c_ulong)
+        struct_head_size = ctypes.sizeof(MMapProperty)
+        struct_content_size = intsize * count * (4 if self.__class__.WithKeys else 3)
         if data is None:
             size = kwargs.get("size", 0)
         else:
-            size = len(data) * 3
-        intsize = ctypes.sizeof(ctypes.c_ulong)
+            # entry tables on top, maps of tiny entries need more than the data size for them
+            size = len(data) * 3 + struct_head_size + struct_content_size
         self.closed = False
         self.loaded = False
+        # opened by name in decode worker
+        self.attached = kwargs.get("name", None) is not None
+        # materialized objects and digest of their packed bytes by original position, for DirtyTracker
+        self.origins = [None] * count
+        self.digests = bytearray(ENTRY_DIGEST_SIZE * count)
+        self.source_offsets = None
+        self.source_crc = None
         if kwargs.get("name", None) is not None:
             self.shm = shared_memory.SharedMemory(name=kwargs.get("name", None))
         else:
@@ -557,8 +646,6 @@ class MPMapProperty(list):
         # int_objects = np.frombuffer(self.shm.buf.obj, dtype=np.uint64)
         self.memaddr = ctypes.addressof(ctypes.c_void_p.from_buffer(self.shm.buf.obj))
         self.prop = MMapProperty.from_address(self.memaddr)
-        struct_head_size = ctypes.sizeof(MMapProperty)
-        struct_content_size = intsize * count * (3 if self.__class__.WithKeys else 2)
         if kwargs.get("name", None) is None:
             ctypes.memset(self.memaddr, 0, struct_head_size + struct_content_size)
             self.prop.count = count
@@ -573,6 +660,9 @@ class MPMapProperty(list):
                 self.memaddr + struct_head_size + intsize * self.prop.count * 2)
         else:
             self.key_size = None
+        # start offset of each entry in the source data, entries are continuous
+        self.source = (ctypes.c_ulong * self.prop.count).from_address(
+            self.memaddr + struct_head_size + intsize * self.prop.count * (3 if self.__class__.WithKeys else 2))
         if kwargs.get("name", None) is None and not data is None:
             ctypes.memmove(self.memaddr + self.prop.size - self.prop.datasize, data, self.prop.datasize)
             self.data = ((ctypes.c_byte * self.prop.datasize).
@@ -580,38 +670,55 @@ class MPMapProperty(list):
         elif kwargs.get("name", None) is not None:
             self.data = ((ctypes.c_byte * self.prop.datasize).
                          from_address(self.memaddr + self.prop.size - self.prop.datasize))
+        self.datasize = self.prop.datasize
         super().extend([None] * self.prop.count)
 
     def close(self):
         if self.closed:
             return
         self.closed = True
+        if self.__class__.WithKeys:
+            # materialized items replaced in the list are only left in origins
+            for obj in self.origins:
+                if isinstance(obj, MPMapObject):
+                    obj.detach()
+        if not self.attached:
+            self.source_offsets = (ctypes.c_ulong * len(self.source))()
+            ctypes.memmove(self.source_offsets, self.source, ctypes.sizeof(self.source))
         del self.prop
         del self.index
         del self.key_size
         del self.value_size
+        del self.source
         self.shm.buf.release()
         self.shm.close()
 
     def release(self):
         self.shm.unlink()
 
+    def put(self, item, offset, obj, limit=None):
+        """Pack obj as entry item at offset of the share memory, return the packed size"""
+        if self.__class__.WithKeys:
+            key = msgpack.packb(obj['key'], default=encode_uuid, use_bin_type=True)
+            val = msgpack.packb(obj['value'], default=encode_uuid, use_bin_type=True)
+        else:
+            key = b""
+            val = msgpack.packb(obj, default=encode_uuid, use_bin_type=True)
+        if offset + len(key) + len(val) > (self.prop.size if limit is None else limit):
+            raise MPOverflowError(f"Share Memory overflow on item {item}")
+        self.index[item] = offset
+        if self.__class__.WithKeys:
+            self.key_size[item] = len(key)
+            ctypes.memmove(self.memaddr + offset, key, len(key))
+        self.value_size[item] = len(val)
+        ctypes.memmove(self.memaddr + offset + len(key), val, len(val))
+        return len(key) + len(val)
+
     def append(self, obj):
         if self.closed and not self.loaded:
             raise ValueError("Share Memory closed")
         if not self.closed and self.prop.current < self.prop.count:
-            self.index[self.prop.current] = self.prop.last
-            if self.__class__.WithKeys:
-                key = msgpack.packb(obj['key'], default=encode_uuid, use_bin_type=True)
-                val = msgpack.packb(obj['value'], default=encode_uuid, use_bin_type=True)
-                self.key_size[self.prop.current] = len(key)
-                ctypes.memmove(self.memaddr + self.prop.last, key, len(key))
-            else:
-                key = ()
-                val = msgpack.packb(obj, default=encode_uuid, use_bin_type=True)
-            self.value_size[self.prop.current] = len(val)
-            ctypes.memmove(self.memaddr + self.prop.last + len(key), val, len(val))
-            self.prop.last += len(key) + len(val)
+            self.prop.last += self.put(self.prop.current, self.prop.last, obj)
             self.prop.current += 1
         else:
             super().append(obj)
@@ -625,39 +732,231 @@ class MPMapProperty(list):
             if self.closed:
                 raise ValueError("Share Memory closed")
             k_s = self.index[item]
+            self.track(item, k_s, self.item_end(item))
             if self.__class__.WithKeys:
                 v_s = self.index[item] + self.key_size[item]
-                self[item] = MPMapObject(bytes(self.shm.buf[k_s:v_s]),
-                                         bytes(self.shm.buf[v_s:v_s + self.value_size[item]]))
+                # views into the share memory, unpacked on first access without copy
+                self[item] = MPMapObject(self.shm.buf[k_s:v_s], self.shm.buf[v_s:v_s + self.value_size[item]], self)
             else:
                 v_s = self.index[item]
                 v_e = self.index[item] + self.value_size[item]
-                self[item] = msgpack.unpackb(bytes(self.shm.buf[v_s:v_e]), object_hook=decode_uuid, raw=False)
-            self.prop.parsed_count += 1
-            if self.prop.parsed_count == self.prop.count:
-                self.loaded = True
-                self.close()
+                self[item] = unpack_view(self.shm.buf[v_s:v_e])
+                self.item_parsed()
+            self.origins[item] = super().__getitem__(item)
         return super().__getitem__(item)
 
-    def load_all_items(self):
+    def track(self, item, start, end):
+        with self.shm.buf[start:end] as view:
+            self.digests[item * ENTRY_DIGEST_SIZE:(item + 1) * ENTRY_DIGEST_SIZE] = \
+                hashlib.blake2b(view, digest_size=ENTRY_DIGEST_SIZE).digest()
+
+    def entry_digest(self, obj):
+        """Digest of the object as put() would pack it, unparsed parts of MPMapObject are hashed as is"""
+        h = hashlib.blake2b(digest_size=ENTRY_DIGEST_SIZE)
+        packer = msgpack.Packer(default=encode_uuid, use_bin_type=True)
+        if isinstance(obj, MPMapObject):
+            h.update(packer.pack(obj.key) if obj.parsed_key else obj.key)
+            h.update(packer.pack(obj.value) if obj.parsed_value else obj.value)
+        elif self.__class__.WithKeys:
+            h.update(packer.pack(obj['key']))
+            h.update(packer.pack(obj['value']))
+        else:
+            h.update(packer.pack(obj))
+        return h.digest()
+
+    def rebaseline(self):
+        """Take the current state of materialized items as unchanged, used after custom decoder rewrite items"""
+        for item, obj in enumerate(self.origins):
+            if obj is not None:
+                self.digests[item * ENTRY_DIGEST_SIZE:(item + 1) * ENTRY_DIGEST_SIZE] = self.entry_digest(obj)
+
+    def source_range(self, item):
+        """Byte range of the original entry in the source data"""
+        offsets = self.source if self.source_offsets is None else self.source_offsets
+        return offsets[item], offsets[item + 1] if item + 1 < len(offsets) else self.datasize
+
+    def origin_positions(self):
+        """
+        Original position of every current item, None for new or modified items
+        """
+        origin_ids = {id(obj): item for item, obj in enumerate(self.origins) if obj is not None}
+        positions = []
+        for pos in range(len(self)):
+            obj = super().__getitem__(pos)
+            if obj is None:
+                # never materialized, still at the original position
+                positions.append(pos)
+                continue
+            item = origin_ids.get(id(obj), None)
+            if item is None or self.origins[item] is not obj:
+                positions.append(None)
+            elif isinstance(obj, MPMapObject) and not obj.parsed_key and not obj.parsed_value:
+                positions.append(item)
+            elif self.entry_digest(obj) == self.digests[item * ENTRY_DIGEST_SIZE:(item + 1) * ENTRY_DIGEST_SIZE]:
+                positions.append(item)
+            else:
+                positions.append(None)
+        return positions
+
+    def item_parsed(self):
+        if self.closed:
+            return
+        self.prop.parsed_count += 1
+        if self.prop.parsed_count == self.prop.count:
+            self.loaded = True
+            self.close()
+
+    def item_end(self, item):
+        return self.index[item] + (self.key_size[item] if self.__class__.WithKeys else 0) + self.value_size[item]
+
+    def load_all_items(self, chunk_size=16 * 1048576):
+        """Unpack all remain items by one msgpack Unpacker stream over each continuous run of the share memory"""
         if self.loaded:
             return
         if self.closed:
             raise ValueError("Share Memory closed")
-        for i in range(self.prop.current):
-            self.__getitem__(i)
+        item = 0
+        while item < self.prop.current:
+            # items decoded by one range are continuous
+            run_start = item
+            start = self.index[item]
+            end = self.item_end(item)
+            item += 1
+            while item < self.prop.current and self.index[item] == end:
+                end = self.item_end(item)
+                item += 1
+            for idx in range(run_start, item):
+                if super().__getitem__(idx) is None:
+                    self.track(idx, self.index[idx], self.item_end(idx))
+            unpacker = msgpack.Unpacker(object_hook=decode_uuid, raw=False, max_buffer_size=0)
+            idx = run_start
+            key = None
+            for pos in range(start, end, chunk_size):
+                with self.shm.buf[pos:min(pos + chunk_size, end)] as view:
+                    unpacker.feed(view)
+                for obj in unpacker:
+                    if self.__class__.WithKeys and key is None:
+                        key = (obj,)
+                        continue
+                    existing = super().__getitem__(idx)
+                    if self.__class__.WithKeys:
+                        if existing is None:
+                            super().__setitem__(idx, {'key': key[0], 'value': obj})
+                        elif isinstance(existing, MPMapObject):
+                            existing.fill(key[0], obj)
+                        key = None
+                    elif existing is None:
+                        super().__setitem__(idx, obj)
+                    if existing is None:
+                        self.origins[idx] = super().__getitem__(idx)
+                    idx += 1
+        self.prop.parsed_count = self.prop.count
+        self.loaded = True
+        self.close()
+
+    def forget(self, removed):
+        """Drop removed items from origins, share memory views they still hold are copied out and released"""
+        removed = {id(obj): obj for obj in removed if obj is not None}
+        for obj in removed.values():
+            if isinstance(obj, MPMapObject):
+                obj.detach()
+        for item, obj in enumerate(self.origins):
+            if obj is not None and id(obj) in removed:
+                self.origins[item] = None
+
+    def __setitem__(self, item, value):
+        if not isinstance(item, slice):
+            return super().__setitem__(item, value)
+        # positions of unparsed items are their share memory entries, load them before the list shifts
+        self.load_all_items()
+        value = list(value)
+        kept = set(map(id, value))
+        removed = [obj for obj in super().__getitem__(item) if id(obj) not in kept]
+        super().__setitem__(item, value)
+        self.forget(removed)
 
     def __delitem__(self, item):
         self.load_all_items()
-        if not self.loaded:
-            self.prop.current -= 1
-        return super().__delitem__(item)
+        removed = super().__getitem__(item)
+        super().__delitem__(item)
+        self.forget(removed if isinstance(item, slice) else [removed])
+
+    def remove(self, obj):
+        self.load_all_items()
+        del self[super().index(obj)]
+
+    def pop(self, item=-1):
+        self.load_all_items()
+        obj = super().__getitem__(item)
+        del self[item]
+        return obj
 
 
 class MPArrayProperty(MPMapProperty):
     WithKeys = False
 
 
+class LazyProperty:
+    __slots__ = ("name", "type_name", "size", "offset")
+
+    def __init__(self, name, type_name, size, offset):
+        self.name = name
+        self.type_name = type_name
+        self.size = size
+        self.offset = offset
+
+    def __repr__(self):
+        return f"LazyProperty({self.type_name}, size={self.size})"
+
+
+class LazyPropertyMap(dict):
+    """
+    Top-level property mapping built by header-only pre-scan, each property is keep as the byte offset in the
+    reader and decoded on first access.
+    """
+
+    def __init__(self, reader, path, loaded=None):
+        super().__init__()
+        self.reader = reader
+        self.path = path
+        if loaded is not None:
+            super().update(loaded)
+
+    def is_loaded(self, key):
+        return not isinstance(super().__getitem__(key), LazyProperty)
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, LazyProperty):
+            t1 = time.time()
+            self.reader.load_lazy_property(self, value, self.path)
+            value = super().__getitem__(key)
+            print("Lazy loading %s.%s in %.2fs" % (self.path, key, time.time() - t1))
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            value = self[key]
+            super().__delitem__(key)
+            return value
+        return super().pop(key, *args)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def load_all(self):
+        for key in self:
+            self.__getitem__(key)
+
+
 def skip_decode(
         reader: FArchiveReader, type_name: str, size: int, path: str
 ) -> dict[str, Any]:
@@ -736,88 +1035,826 @@ def skip_encode(
         )
 
 
-class MPMapPropertyProcess(multiprocessing.Process):
-    def __init__(self, reader, properties, count, path):
-        super().__init__()
-        self.type_hints = reader.type_hints
-        self.custom_properties = reader.custom_properties
-        self.allow_nan = reader.allow_nan
-        self.properties = properties
-        self.count = count
-        self.path = path
+# Split a large MapProperty / struct ArrayProperty into ranges of at least MP_DECODE_RANGE_SIZE bytes,
+# decoded by the DecodeWorkerPool of MP_DECODE_WORKERS processes
+MP_DECODE_WORKERS = os.cpu_count() or 1
+MP_DECODE_RANGE_SIZE = 8 * 1048576
 
-    def run(self) -> None:
-        setproctitle(f"{self.__class__.__name__}:{self.path}")
-        prop_val = MPMapProperty(name=self.properties['value'])
-        key_type = self.properties['key_type']
-        key_struct_type = self.properties['key_struct_type']
-        value_type = self.properties['value_type']
-        value_struct_type = self.properties['value_struct_type']
-        key_path = self.path + ".Key"
-        value_path = self.path + ".Value"
-        with FArchiveReader(
-                bytes(prop_val.data),
-                type_hints=self.type_hints,
-                custom_properties=self.custom_properties,
-                allow_nan=self.allow_nan,
-        ) as reader:
-            for _ in range(self.count):
-                key = reader.prop_value(key_type, key_struct_type, key_path)
-                value = reader.prop_value(value_type, value_struct_type, value_path)
-                prop_val.append({
-                    "key": key,
-                    "value": value
-                })
+_mp_decode_context = None
+
+
+def mp_decode_init(type_hints, tables):
+    global _mp_decode_context
+    _mp_decode_context = {
+        'type_hints': type_hints,
+        'tables': tables,
+        'resolved': {},
+        'started': time.time()
+    }
+
+
+def mp_decode_ping(_=None):
+    return os.getpid(), _mp_decode_context['started']
+
+
+def mp_decode_custom_properties(table_ref):
+    name, removed, extra = table_ref
+    if name is None:
+        return extra
+    key = (name, removed, tuple(extra.keys()))
+    if key not in _mp_decode_context['resolved']:
+        custom_properties = dict(_mp_decode_context['tables'][name])
+        for path in removed:
+            del custom_properties[path]
+        custom_properties.update(extra)
+        _mp_decode_context['resolved'][key] = custom_properties
+    return _mp_decode_context['resolved'][key]
+
+
+def mp_decode_open(shm_name, properties):
+    if properties['skip_type'] == "MapProperty":
+        return MPMapProperty(name=shm_name)
+    return MPArrayProperty(name=shm_name)
+
+
+def mp_source_reader(prop_val, table_ref, allow_nan, start, end=None):
+    """Reader on the source data of share memory from start, in place by the mmap or a copy up to end"""
+    if end is not None:
+        return FProgressArchiveReader(bytes(prop_val.shm.buf[start:end]), _mp_decode_context['type_hints'],
+                                      mp_decode_custom_properties(table_ref), allow_nan=allow_nan,
+                                      reduce_memory=True)
+    reader = FProgressArchiveReader(prop_val.shm.buf.obj, _mp_decode_context['type_hints'],
+                                    mp_decode_custom_properties(table_ref), allow_nan=allow_nan,
+                                    reduce_memory=True, offset=start)
+    # the mmap is owned by the share memory
+    reader.keep_open = True
+    return reader
+
+
+def mp_split_ranges(shm_name, properties, table_ref, count, parts):
+    """Walk entry boundaries once without decoding, split entries into contiguous ranges of similar size"""
+    prop_val = mp_decode_open(shm_name, properties)
+    ranges = []
+    first = 0
+    byte_start = 0
+    try:
+        datasize = prop_val.prop.datasize
+        tail = prop_val.prop.size - datasize
+        with mp_source_reader(prop_val, table_ref, True, tail) as reader:
+            for item in range(count):
+                if properties['skip_type'] == "MapProperty":
+                    reader.skip_prop_value(properties['key_type'], properties['key_struct_type'])
+                    reader.skip_prop_value(properties['value_type'], properties['value_struct_type'])
+                else:
+                    reader.skip_struct_value(properties['type_name'])
+                pos = reader.data.tell() - tail
+                if len(ranges) < parts - 1 and pos >= datasize * (len(ranges) + 1) // parts:
+                    ranges.append((first, item + 1, byte_start, pos))
+                    first = item + 1
+                    byte_start = pos
+        if first < count:
+            ranges.append((first, count, byte_start, datasize))
+    finally:
+        prop_val.close()
+    return ranges
+
+
+def mp_decode_range(shm_name, path, properties, table_ref, allow_nan, first, last, byte_start, byte_end,
+                    out_start, out_end):
+    """
+    Decode entries [first, last) from source bytes [byte_start, byte_end) in worker process,
+    packed entries are written into [out_start, out_end) of the share memory and indexed by entry number.
+    """
+    t1 = time.time()
+    prop_val = mp_decode_open(shm_name, properties)
+    offset = out_start
+    try:
+        tail = prop_val.prop.size - prop_val.prop.datasize
+        # read the source in place when the output can not reach it, otherwise copy it out first
+        with mp_source_reader(prop_val, table_ref, allow_nan, tail + byte_start,
+                              None if out_end <= tail else tail + byte_end) as reader:
+            if properties['skip_type'] == "MapProperty":
+                key_path = path + ".Key"
+                value_path = path + ".Value"
+                decode_func = lambda: {
+                    "key": reader.prop_value(properties['key_type'], properties['key_struct_type'], key_path),
+                    "value": reader.prop_value(properties['value_type'], properties['value_struct_type'], value_path)
+                }
+            elif properties['array_type'] == "StructProperty":
+                prop_path = f"{path}.{properties['prop_name']}"
+                decode_func = lambda: reader.struct_value(properties['type_name'], prop_path)
+            elif properties['array_type'] in ["EnumProperty", "NameProperty"]:
+                decode_func = reader.fstring
+            elif properties['array_type'] == "Guid":
+                decode_func = reader.guid
+            elif properties['array_type'] == "ByteProperty":
+                decode_func = reader.byte
+            else:
+                raise Exception(f"Unknown array type: {properties['array_type']} ({path})")
+            # reader position of the in place reader is absolute in the share memory
+            source_base = tail if out_end <= tail else -byte_start
+            for item in range(first, last):
+                prop_val.source[item] = reader.data.tell() - source_base
+                offset += prop_val.put(item, offset, decode_func(), out_end)
+                # Shared progress counter only, overwritten after all ranges done
+                prop_val.prop.current += 1
+    finally:
         prop_val.close()
-        os._exit(0)
+    return offset, t1, time.time(), peak_rss()
 
 
-class MPArrayPropertyProcess(multiprocessing.Process):
-    def __init__(self, reader, properties, count, size, path):
-        super().__init__()
-        self.type_hints = reader.type_hints
-        self.custom_properties = reader.custom_properties
-        self.allow_nan = reader.allow_nan
+class DecodeWorkerPool:
+    """
+    Long-lived process pool for the share memory decode jobs of the editor session.
+    Workers are pre-warmed with PALWORLD_TYPE_HINTS and the custom property tables,
+    jobs only carry the table name and the difference to it.
+    """
+    _instance = None
+
+    @staticmethod
+    def capable(reduce_memory=False):
+        """share memory multiprocess decode is not usable in frozen build"""
+        return not reduce_memory and not getattr(sys, 'frozen', False) and \
+            sys.platform in ['linux', 'darwin', 'win32']
+
+    @staticmethod
+    def get() -> "DecodeWorkerPool":
+        if DecodeWorkerPool._instance is None:
+            DecodeWorkerPool._instance = DecodeWorkerPool()
+            atexit.register(DecodeWorkerPool.shutdown)
+        return DecodeWorkerPool._instance
+
+    @staticmethod
+    def shutdown():
+        if DecodeWorkerPool._instance is not None:
+            DecodeWorkerPool._instance.executor.shutdown(wait=True, cancel_futures=True)
+            DecodeWorkerPool._instance = None
+
+    def __init__(self, workers=None):
+        self.workers = MP_DECODE_WORKERS if workers is None else workers
+        self.tables = {
+            'PALWORLD': PALWORLD_CUSTOM_PROPERTIES,
+            'SKP': SKP_PALWORLD_CUSTOM_PROPERTIES
+        }
+        self.jobs = 0
+        self.dispatch_time = 0.0
+        self.decode_time = 0.0
+        self.worker_rss = 0
+        self.lock = threading.Lock()
+        t1 = time.time()
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                               initializer=mp_decode_init,
+                                                               initargs=(PALWORLD_TYPE_HINTS, self.tables))
+        # fork / import / initializer cost paid once here instead of per decode job
+        list(self.executor.map(mp_decode_ping, range(self.workers)))
+        self.startup_time = time.time() - t1
+        print("Decode worker pool: %d workers ready in %.2fs" % (self.workers, self.startup_time))
+
+    def table_ref(self, custom_properties):
+        """Describe custom_properties as (table name, removed paths, extra properties) of a pre-warmed table"""
+        for name, table in self.tables.items():
+            if custom_properties is table:
+                return name, (), {}
+        for name, table in self.tables.items():
+            if not all(custom_properties[path] == table[path] for path in table if path in custom_properties):
+                continue
+            removed = tuple(sorted(path for path in table if path not in custom_properties))
+            extra = {path: custom_properties[path] for path in custom_properties if path not in table}
+            if len(removed) + len(extra) < 8:
+                return name, removed, extra
+        return None, (), custom_properties
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def record(self, dispatch_time, decode_time, worker_rss):
+        with self.lock:
+            self.jobs += 1
+            self.dispatch_time += dispatch_time
+            self.decode_time += decode_time
+            self.worker_rss = max(self.worker_rss, worker_rss)
+
+    @staticmethod
+    def print_stats():
+        self = DecodeWorkerPool._instance
+        if self is None or self.jobs == 0:
+            return
+        print("Decode worker pool: %d jobs, startup %.2fs, avg dispatch overhead %.1fms, decode %.2fs" % (
+            self.jobs, self.startup_time, 1000 * self.dispatch_time / self.jobs, self.decode_time))
+
+
+class MPDecodeJob(threading.Thread):
+    """
+    One share memory property decode on the DecodeWorkerPool,
+    same join() / is_alive() interface as the multiprocessing.Process it replaces.
+    """
+
+    def __init__(self, pool, share_mp, properties, count, path, custom_properties, allow_nan):
+        super().__init__(daemon=True)
+        self.pool = pool
+        self.share_mp = share_mp
         self.properties = properties
         self.count = count
-        self.size = size
         self.path = path
+        self.table_ref = pool.table_ref(custom_properties)
+        self.allow_nan = allow_nan
+        self.dispatch_time = 0.0
+        self.decode_time = 0.0
+        self.worker_rss = 0
+        self.error = None
 
     def run(self) -> None:
-        setproctitle(f"{self.__class__.__name__}:{self.path}")
-        prop_values = MPArrayProperty(name=self.properties['value']['values'])
-        with FArchiveReader(
-                bytes(prop_values.data),
-                type_hints=self.type_hints,
-                custom_properties=self.custom_properties,
-                allow_nan=self.allow_nan,
-        ) as reader:
-            array_type = self.properties['array_type']
-            if array_type == "StructProperty":
-                type_name = self.properties['value']['type_name']
-                prop_path = f"{self.path}.{self.properties['value']['prop_name']}"
-                for _ in range(self.count):
-                    prop_values.append(reader.struct_value(type_name, prop_path))
-            else:
-                decode_func: Callable
-                if array_type == "EnumProperty":
-                    decode_func = reader.fstring
-                elif array_type == "NameProperty":
-                    decode_func = reader.fstring
-                elif array_type == "Guid":
-                    decode_func = reader.guid
-                elif array_type == "ByteProperty":
-                    if self.size == self.count:
-                        # Special case this and read faster in one go
-                        return reader.byte_list(self.count)
-                    else:
-                        raise Exception("Labelled ByteProperty not implemented")
+        try:
+            self.decode()
+        except Exception as e:
+            print(f"\033[31mDecodeing Failed on {self.path} -> {type(e)}: {str(e)}\033[0m")
+            self.error = e
+
+    def join(self, timeout=None) -> None:
+        """Raise the decode error of the job in the joining thread once it is done"""
+        super().join(timeout)
+        if self.error is not None and not self.is_alive():
+            error, self.error = self.error, None
+            raise error
+
+    def submit_ranges(self, ranges, head, end):
+        datasize = self.share_mp.prop.datasize
+        t1 = time.time()
+        # each range owns a share of the free space in proportion to its source size
+        jobs = [self.pool.submit(mp_decode_range, self.share_mp.shm.name, self.path, self.properties,
+                                 self.table_ref, self.allow_nan, first, last, byte_start, byte_end,
+                                 head + (end - head) * byte_start // datasize,
+                                 head + (end - head) * byte_end // datasize)
+                for first, last, byte_start, byte_end in ranges]
+        results = [job.result() for job in jobs]
+        self.dispatch_time += min(result[1] for result in results) - t1
+        self.decode_time += sum(result[2] - result[1] for result in results)
+        self.worker_rss = max([self.worker_rss] + [result[3] or 0 for result in results])
+        return results[-1][0]
+
+    def decode(self):
+        prop = self.share_mp.prop
+        head = prop.last
+        tail = prop.size - prop.datasize
+        ranges = []
+        parts = min(self.pool.workers, prop.datasize // MP_DECODE_RANGE_SIZE)
+        if parts > 1 and (self.properties['skip_type'] == "MapProperty" or
+                          self.properties['array_type'] == "StructProperty"):
+            ranges = self.pool.submit(mp_split_ranges, self.share_mp.shm.name, self.properties, self.table_ref,
+                                      self.count, parts).result()
+        last = None
+        if len(ranges) > 1:
+            try:
+                # ranges must not overwrite the source data of others, keep outputs before the tail
+                last = self.submit_ranges(ranges, head, tail)
+            except MPOverflowError:
+                print(f"{self.path} range decode overflow, fallback to single range")
+                prop.current = 0
+        if last is None:
+            last = self.submit_ranges([(0, self.count, 0, prop.datasize)], head, prop.size)
+        prop.current = self.count
+        prop.last = last
+        self.pool.record(self.dispatch_time, self.decode_time, self.worker_rss)
+
+
+SAV_MAGIC_BYTES = b"PlZ"
+SAV_STREAM_CHUNK_SIZE = 16 * 1048576
+
+
+def _inflate_stream(chunks, max_length=SAV_STREAM_CHUNK_SIZE):
+    """Inflate an iterable of zlib chunks, each yielded block is at most max_length bytes"""
+    decompressor = zlib.decompressobj()
+    for chunk in chunks:
+        while chunk:
+            block = decompressor.decompress(chunk, max_length)
+            if block:
+                yield block
+            chunk = decompressor.unconsumed_tail
+    block = decompressor.flush()
+    if block:
+        yield block
+    if not decompressor.eof:
+        raise Exception("truncated zlib stream")
+
+
+def _counting_stream(chunks, counter):
+    for chunk in chunks:
+        counter[0] += len(chunk)
+        yield chunk
+
+
+def decompress_sav_to_mmap(f, output=None) -> tuple[mmap.mmap, int]:
+    """
+    Streaming version of palsav.decompress_sav_to_gvas, inflate the Sav file chunk by chunk into a mmap buffer,
+    only one copy of the GVAS data is kept in memory.
+
+    :param f: Opened Sav file object
+    :param output: Optional path for a file-backed mmap, anonymous mmap is used by default
+    :return: (mmap of raw GVAS, save_type)
+    """
+    header = f.read(12)
+    uncompressed_len = int.from_bytes(header[0:4], byteorder="little")
+    compressed_len = int.from_bytes(header[4:8], byteorder="little")
+    magic_bytes = header[8:11]
+    save_type = header[11] if len(header) == 12 else None
+    if magic_bytes != SAV_MAGIC_BYTES:
+        if magic_bytes == b"\x00\x00\x00" and uncompressed_len == 0 and compressed_len == 0:
+            raise Exception(
+                f"not a compressed Palworld save, found too many null bytes, this is likely corrupted"
+            )
+        raise Exception(f"not a compressed Palworld save, found {magic_bytes!r} instead of {SAV_MAGIC_BYTES!r}")
+    if save_type not in [0x31, 0x32]:
+        raise Exception(f"unhandled compression type: {save_type}")
+    if save_type == 0x31:
+        remain = os.fstat(f.fileno()).st_size - f.tell()
+        if compressed_len != remain:
+            raise Exception(f"incorrect compressed length: {compressed_len}")
+
+    if uncompressed_len == 0:
+        # mmap can not map zero length buffer
+        return b"", save_type
+    if output is None:
+        raw_mmap = mmap.mmap(-1, uncompressed_len)
+    else:
+        with open(output, "w+b") as out_f:
+            out_f.truncate(uncompressed_len)
+            raw_mmap = mmap.mmap(out_f.fileno(), 0)
+
+    try:
+        stream = _inflate_stream(iter(lambda: f.read(SAV_STREAM_CHUNK_SIZE), b""))
+        inner_len = [0]
+        if save_type == 0x32:
+            stream = _inflate_stream(_counting_stream(stream, inner_len))
+        written = 0
+        for block in stream:
+            if written + len(block) > uncompressed_len:
+                raise Exception(f"incorrect uncompressed length: {uncompressed_len}")
+            raw_mmap.write(block)
+            written += len(block)
+        if save_type == 0x32 and compressed_len != inner_len[0]:
+            raise Exception(f"incorrect compressed length: {compressed_len}")
+        if written != uncompressed_len:
+            raise Exception(f"incorrect uncompressed length: {uncompressed_len}")
+    except Exception:
+        raw_mmap.close()
+        raise
+    raw_mmap.seek(0)
+    return raw_mmap, save_type
+
+
+class GvasFileCache:
+    """
+    Managed cache directory for decompressed GVAS data, entry is keyed by the size, mtime and content hash
+    of the Sav file, least recently used entries are evicted when total size over max_size.
+    """
+    DefaultCacheDir = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                                   "palworld-server-toolkit", "gvas")
+
+    def __init__(self, cache_dir=None, max_size=4096 * 1048576):
+        self.cache_dir = cache_dir if cache_dir is not None else GvasFileCache.DefaultCacheDir
+        self.max_size = max_size
+
+    @staticmethod
+    def fingerprint(filename):
+        stat = os.stat(filename)
+        content_hash = hashlib.blake2b(digest_size=16)
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(SAV_STREAM_CHUNK_SIZE), b""):
+                content_hash.update(chunk)
+        return "%d-%d-%s" % (stat.st_size, stat.st_mtime_ns, content_hash.hexdigest())
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.gvas")
+
+    def open(self, filename, key=None) -> tuple[mmap.mmap, int, bool]:
+        """
+        Open the decompressed GVAS of filename, decompress and store to cache when not cached
+
+        :param key: GvasFileCache.fingerprint of filename when the caller already has it
+        :return: (mmap of raw GVAS, save_type, cache hit)
+        """
+        if key is None:
+            key = GvasFileCache.fingerprint(filename)
+        cache_path = self.path(key)
+        with open(filename, "rb") as f:
+            if os.path.exists(cache_path):
+                save_type = f.read(12)[11]
+                os.utime(cache_path, None)
+                with open(cache_path, "rb") as cache_f:
+                    return mmap.mmap(cache_f.fileno(), 0, access=mmap.ACCESS_READ), save_type, True
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            try:
+                raw_gvas, save_type = decompress_sav_to_mmap(f, tmp_path)
+                if not isinstance(raw_gvas, mmap.mmap):
+                    return raw_gvas, save_type, False
+                raw_gvas.flush()
+                raw_gvas.close()
+                os.replace(tmp_path, cache_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        self.evict(keep=cache_path)
+        with open(cache_path, "rb") as cache_f:
+            return mmap.mmap(cache_f.fileno(), 0, access=mmap.ACCESS_READ), save_type, False
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".gvas"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(self.cache_dir, name)))
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        entries = self.entries()
+        total_size = reduce(lambda x, y: x + y[1], entries, 0)
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+                total_size -= size
+            except (FileNotFoundError, PermissionError):
+                pass
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except (FileNotFoundError, PermissionError):
+                pass
+
+
+def projection_tree(paths):
+    """Nested {name: subtree} of the dotted property paths, None marks a requested property"""
+    tree = {}
+    for path in paths:
+        node = tree
+        names = path.strip(".").split(".")
+        for name in names[:-1]:
+            if node.get(name, {}) is None:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+def projection_size(tree):
+    """Count of the requested properties of a projection tree or subtree"""
+    return 1 if tree is None else sum(projection_size(subtree) for subtree in tree.values())
+
+
+def project_properties(reader, tree, properties, path, remain):
+    """
+    Scan the property list at the reader position, decode the requested properties of tree into properties and
+    descend into the struct of a partially requested one. Other properties are skipped by their encoded size.
+
+    :return: count of the requested properties still not found, 0 stops the scan
+    """
+    while remain > 0:
+        name = reader.fstring()
+        if name == "None":
+            break
+        type_name = reader.fstring()
+        size = reader.u64()
+        prop_path = f"{path}.{name}"
+        if name in tree and (tree[name] is None or type_name != "StructProperty" or
+                             prop_path in reader.custom_properties):
+            properties[name] = reader.property(type_name, size, prop_path)
+            remain -= projection_size(tree[name])
+        elif name in tree:
+            struct_type = reader.fstring()
+            struct_id = reader.guid()
+            _id = reader.optional_guid()
+            end = reader.data.tell() + size
+            value = {}
+            properties[name] = {"struct_type": struct_type, "struct_id": struct_id, "id": _id, "value": value,
+                                "type": type_name}
+            requested = projection_size(tree[name])
+            remain -= requested - project_properties(reader, tree[name], value, prop_path, requested)
+            if remain > 0:
+                reader.data.seek(end)
+        else:
+            if type_name == "StructProperty":
+                reader.fstring()
+                reader.skip(16)
+            elif type_name == "MapProperty":
+                reader.fstring()
+                reader.fstring()
+            elif type_name in ("ArrayProperty", "SetProperty", "EnumProperty", "ByteProperty"):
+                reader.fstring()
+            elif type_name == "BoolProperty":
+                reader.skip(1)
+            reader.optional_guid()
+            reader.skip(size)
+    return remain
+
+
+def project_gvas(raw_gvas, paths, type_hints=PALWORLD_TYPE_HINTS, custom_properties=PALWORLD_CUSTOM_PROPERTIES):
+    """
+    GvasFile with only the properties of paths decoded, e.g. "SaveData.InventoryInfo.CommonContainerId",
+    the structs on the way hold only the requested members. The scan stops once every path is found.
+    """
+    gvas_file = GvasFile()
+    tree = projection_tree(paths)
+    with FArchiveReader(raw_gvas, type_hints=type_hints, custom_properties=custom_properties) as reader:
+        gvas_file.header = GvasHeader.read(reader)
+        gvas_file.properties = {}
+        project_properties(reader, tree, gvas_file.properties, "", projection_size(tree))
+    gvas_file.trailer = b""
+    return gvas_file
+
+
+def decode_player_sav(filename, paths=None):
+    """(size, mtime_ns, GvasFile) of a player Sav file, only the properties of paths when given"""
+    stat = os.stat(filename)
+    with open(filename, "rb") as f:
+        raw_gvas, _ = decompress_sav_to_gvas(f.read())
+    if paths is not None:
+        return stat.st_size, stat.st_mtime_ns, project_gvas(raw_gvas, paths)
+    return stat.st_size, stat.st_mtime_ns, GvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES)
+
+
+class PlayerSaveCache:
+    """
+    Decoded Players/<UID>.sav files of the editor session keyed by path and projected property paths, an entry
+    is decoded again when the size or mtime of its file changes. The cached GvasFile is shared, callers must not
+    modify it.
+    """
+    _instance = None
+
+    @staticmethod
+    def get() -> "PlayerSaveCache":
+        if PlayerSaveCache._instance is None:
+            PlayerSaveCache._instance = PlayerSaveCache()
+        return PlayerSaveCache._instance
+
+    def __init__(self):
+        # (absolute path, projected paths or None for the whole file) -> (size, mtime_ns, GvasFile)
+        self.files = {}
+
+    def __len__(self):
+        return len(self.files)
+
+    @staticmethod
+    def Key(filename, paths=None):
+        return os.path.abspath(filename), None if paths is None else tuple(sorted(paths))
+
+    def IsCurrent(self, key):
+        if key not in self.files:
+            return False
+        try:
+            stat = os.stat(key[0])
+        except FileNotFoundError:
+            return False
+        return self.files[key][:2] == (stat.st_size, stat.st_mtime_ns)
+
+    def Get(self, filename, paths=None):
+        """The cached GvasFile of filename projected to paths, None when the file not exists"""
+        key = PlayerSaveCache.Key(filename, paths)
+        if not self.IsCurrent(key):
+            self.files.pop(key, None)
+            if not os.path.exists(key[0]):
+                return None
+            self.files[key] = decode_player_sav(*key)
+        return self.files[key][2]
+
+    def Invalidate(self, filename=None):
+        if filename is None:
+            self.files.clear()
+        else:
+            filename = os.path.abspath(filename)
+            for key in [key for key in self.files if key[0] == filename]:
+                del self.files[key]
+
+    def LoadDirectory(self, directory, use_mp=True, paths=None):
+        """Decode every changed or new .sav file of directory projected to paths, on the DecodeWorkerPool when use_mp"""
+        if not os.path.isdir(directory):
+            return 0
+        t1 = time.time()
+        keys = [PlayerSaveCache.Key(os.path.join(directory, name), paths) for name in os.listdir(directory)
+                if name.lower().endswith(".sav")]
+        stale = [key for key in keys if not self.IsCurrent(key)]
+        if len(stale) == 0:
+            return 0
+        if use_mp and DecodeWorkerPool.capable() and MP_DECODE_WORKERS > 1 and len(stale) > 1:
+            pool = DecodeWorkerPool.get()
+            jobs = {key: pool.submit(decode_player_sav, *key) for key in stale}
+            for key in jobs:
+                try:
+                    self.files[key] = jobs[key].result()
+                except Exception as e:
+                    log.error(f"Decode player save {key[0]} failed -> {type(e)}: {str(e)}")
+        else:
+            for key in stale:
+                try:
+                    self.files[key] = decode_player_sav(*key)
+                except Exception as e:
+                    log.error(f"Decode player save {key[0]} failed -> {type(e)}: {str(e)}")
+        print("Load %d player saves in %.2fs" % (len(stale), time.time() - t1))
+        return len(stale)
+
+
+def encode_snapshot(obj):
+    if isinstance(obj, UUID):
+        return {'__uuid__': obj.raw_bytes}
+    elif isinstance(obj, tuple):
+        return {'__tuple__': list(obj)}
+    elif isinstance(obj, MPMapObject):
+        return {'key': obj['key'], 'value': obj['value']}
+    elif isinstance(obj, LazyPropertyMap):
+        return dict(obj.items())
+    elif isinstance(obj, dict):
+        return dict(obj)
+    elif isinstance(obj, list):
+        return list(iter(obj))
+    raise TypeError(f"Can not serialize {type(obj)} to snapshot")
+
+
+def decode_snapshot(obj):
+    if '__uuid__' in obj:
+        obj = UUID(obj['__uuid__'])
+    elif '__tuple__' in obj:
+        obj = tuple(obj['__tuple__'])
+    return obj
+
+
+class GvasSnapshot:
+    """
+    Msgpack sidecar of the decoded GVAS properties (skipped raw blobs included), keyed by the source file
+    fingerprint, loading the snapshot is much faster than run the property decoder again.
+    The loaded GvasFile has no DirtyTracker and the share memory sections come back fully decoded,
+    so it is only for sessions saved with a full re-encode.
+    """
+    Version = 1
+
+    @staticmethod
+    def save(path, gvas_file, source_key):
+        packer = msgpack.Packer(default=encode_snapshot, use_bin_type=True, strict_types=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(packer.pack({
+                    'version': GvasSnapshot.Version,
+                    'source': source_key,
+                    'header': gvas_file.header.dump(),
+                    'trailer': gvas_file.trailer,
+                    'keys': list(gvas_file.properties.keys())
+                }))
+                properties = gvas_file.properties
+                f.write(packer.pack(
+                    {key: properties[key] for key in properties if key != 'worldSaveData'}))
+                if 'worldSaveData' in properties:
+                    wsd_property = {key: properties['worldSaveData'][key] for key in properties['worldSaveData']
+                                    if key != 'value'}
+                    f.write(packer.pack(wsd_property))
+                    f.write(packer.pack(len(properties['worldSaveData']['value'])))
+                    # Pack the top-level key one by one, avoid build the whole buffer of the world
+                    for key in properties['worldSaveData']['value']:
+                        f.write(packer.pack([key, properties['worldSaveData']['value'][key]]))
                 else:
-                    raise Exception(f"Unknown array type: {array_type} ({self.path})")
-                for _ in range(self.count):
-                    prop_values.append(decode_func())
-        prop_values.close()
-        os._exit(0)
+                    f.write(packer.pack(None))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def load(path, source_key):
+        """
+        :return: GvasFile, or None when snapshot not exists or not match the source_key
+        """
+        from palworld_save_tools.gvas import GvasFile, GvasHeader
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            unpacker = msgpack.Unpacker(f, object_hook=decode_snapshot, raw=False, max_buffer_size=0,
+                                        strict_map_key=False)
+            try:
+                meta = unpacker.unpack()
+            except Exception:
+                return None
+            if not isinstance(meta, dict) or meta.get('version', None) != GvasSnapshot.Version or \
+                    meta.get('source', None) != source_key:
+                return None
+            gvas_file = GvasFile()
+            gvas_file.header = GvasHeader.load(meta['header'])
+            gvas_file.trailer = meta['trailer']
+            properties = unpacker.unpack()
+            wsd_property = unpacker.unpack()
+            if wsd_property is not None:
+                wsd_property['value'] = {}
+                for _ in range(unpacker.unpack()):
+                    key, value = unpacker.unpack()
+                    wsd_property['value'][key] = value
+                properties['worldSaveData'] = wsd_property
+            gvas_file.properties = {key: properties[key] for key in meta['keys']}
+        return gvas_file
+
+
+def available_memory() -> Optional[int]:
+    """Available physical memory in bytes, None when unknown"""
+    if sys.platform == 'linux':
+        meminfo = {}
+        with open("/proc/meminfo", "r", encoding='utf-8') as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = value.strip().split(" ")
+        for key in ['MemAvailable', 'MemFree']:
+            if key in meminfo and len(meminfo[key]) == 2 and meminfo[key][1] == 'kB':
+                return int(meminfo[key][0]) * 1024
+        return None
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """Peak RSS in bytes of current process, None when unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kB on linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+class DecodePlanner:
+    """
+    Choose eager, share memory multiprocess (mp), skip or lazy decode for each top-level worldSaveData property
+    by its encoded size, keep the estimated memory of the whole load inside the budget.
+    """
+    # Estimated memory per encoded byte
+    EagerRatio = 10
+    MPRatio = 3
+    SkipRatio = 1
+    SmallSize = 1048576
+
+    def __init__(self, budget, raw_size):
+        self.budget = budget
+        # the raw GVAS buffer itself
+        self.used = raw_size
+        self.decisions = []
+
+    def plan(self, path, type_name, size, custom_properties, mp_capable):
+        skipped = path in custom_properties and custom_properties[path][0] is skip_decode
+        if skipped:
+            mode, estimate = "skip", size * DecodePlanner.SkipRatio
+        elif size <= DecodePlanner.SmallSize:
+            mode, estimate = "eager", size * DecodePlanner.EagerRatio
+        elif mp_capable and type_name in ["MapProperty", "ArrayProperty"] and \
+                self.used + size * DecodePlanner.MPRatio <= self.budget:
+            mode, estimate = "mp", size * DecodePlanner.MPRatio
+        else:
+            mode, estimate = "eager", size * DecodePlanner.EagerRatio
+        if size > DecodePlanner.SmallSize and self.used + estimate > self.budget:
+            mode, estimate = "lazy", 0
+        self.used += estimate
+        self.decisions.append((path, type_name, size, mode, estimate))
+        return mode
+
+    def report(self):
+        print("Decode plan: budget %.0f MB, estimated %.0f MB" % (self.budget / 1048576, self.used / 1048576))
+        small = 0
+        for path, type_name, size, mode, estimate in self.decisions:
+            if mode == "eager" and size <= DecodePlanner.SmallSize:
+                small += 1
+                continue
+            print("  %-5s %-13s %8.1f MB -> %8.1f MB  %s" % (mode, type_name, size / 1048576,
+                                                            estimate / 1048576, path))
+        if small > 0:
+            print("  eager %d small properties" % small)
+        rss = peak_rss()
+        if rss is not None:
+            pool = DecodeWorkerPool._instance
+            print("Peak RSS %.1f MB" % (rss / 1048576) +
+                  (", decode worker %.1f MB" % (pool.worker_rss / 1048576) if pool is not None and pool.worker_rss
+                   else ""))
+
+
+FSTRING_SIZE = struct.Struct("<i")
+
+# Fixed size struct values, Vector and Quat are stored as double
+STRUCT_VALUE_SIZES = {
+    "Vector": 24,
+    "DateTime": 8,
+    "Guid": 16,
+    "Quat": 32,
+    "LinearColor": 16,
+}
 
 
 class FProgressArchiveReader(FArchiveReader):
@@ -832,20 +1869,33 @@ class FProgressArchiveReader(FArchiveReader):
         if 'check_err' in kwargs:
             self.raise_error = kwargs['check_err']
             del kwargs['check_err']
-        super().__init__(*args, **kwargs)
+        self.lazy_loading = kwargs.pop('lazy_loading', False)
+        self.offset = kwargs.pop('offset', 0)
+        memory_budget = kwargs.pop('memory_budget', None)
+        track_changes = kwargs.pop('track_changes', False)
+        self.keep_open = False
+        self.scan_done = False
+        if len(args) > 0 and isinstance(args[0], mmap.mmap):
+            # mmap is file-like object, read it directly instead of copy to BytesIO
+            super().__init__(b"", *args[1:], **kwargs)
+            self.data = args[0]
+            self.size = len(args[0])
+        else:
+            super().__init__(*args, **kwargs)
         self.fallbackData = None
+        self.mp_capable = DecodeWorkerPool.capable(reduce_memory)
         self.mp_loading = False
-        if getattr(sys, 'frozen', False):
-            pass
-        elif sys.platform == 'linux':
-            with open("/proc/meminfo", "r", encoding='utf-8') as f:
-                for line in f:
-                    if 'MemFree:' == line[0:8]:
-                        remain = line.split(": ")[1].strip().split(" ")
-                        if remain[1] == 'kB' and int(remain[0]) > 1048576 > 4:  # Over 4 GB memory remains
-                            self.mp_loading = False if reduce_memory else True
-        elif sys.platform == 'darwin' or sys.platform == 'win32':
-            self.mp_loading = False if reduce_memory else True
+        if self.mp_capable:
+            avail = available_memory()
+            self.mp_loading = avail is None or avail > 4 * 1073741824  # Over 4 GB memory remains
+        self.planner = None
+        if memory_budget is not None and not self.lazy_loading:
+            self.planner = DecodePlanner(memory_budget, self.size)
+        self.tracker = None
+        if track_changes:
+            # DirtyTracker splice the original bytes on write
+            self.tracker = DirtyTracker(self.data)
+            self.keep_open = True
 
     def internal_copy(self, data, debug: bool) -> "FProgressArchiveReader":
         return FProgressArchiveReader(
@@ -857,6 +1907,60 @@ class FProgressArchiveReader(FArchiveReader):
             check_err=self.raise_error
         )
 
+    def __enter__(self):
+        self.data.seek(self.offset)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        # LazyPropertyMap still reference to the data
+        if not self.keep_open:
+            self.data.close()
+
+    def skip(self, size: int) -> None:
+        self.data.seek(size, os.SEEK_CUR)
+
+    def skip_property(self, type_name: str, size: int) -> None:
+        if type_name == "StructProperty":
+            self.fstring()
+            self.skip(16)
+        elif type_name in ["ArrayProperty", "EnumProperty", "ByteProperty"]:
+            self.fstring()
+        elif type_name == "MapProperty":
+            self.fstring()
+            self.fstring()
+        elif type_name == "BoolProperty":
+            self.skip(1)
+        self.optional_guid()
+        self.skip(size)
+
+    def skip_fstring(self) -> None:
+        (size,) = FArchiveReader.unpack_i32(self.data.read(4))
+        self.skip(-size * 2 if size < 0 else size)
+
+    def skip_struct_value(self, struct_type: str) -> None:
+        if struct_type in STRUCT_VALUE_SIZES:
+            self.skip(STRUCT_VALUE_SIZES[struct_type])
+            return
+        while True:
+            name = self.fstring()
+            if name == "None":
+                break
+            type_name = self.fstring()
+            size = self.u64()
+            self.skip_property(type_name, size)
+
+    def skip_prop_value(self, type_name: str, struct_type_name: str) -> None:
+        if type_name == "StructProperty":
+            self.skip_struct_value(struct_type_name)
+        elif type_name in ["EnumProperty", "NameProperty"]:
+            self.skip_fstring()
+        elif type_name == "IntProperty":
+            self.skip(4)
+        elif type_name == "BoolProperty":
+            self.skip(1)
+        else:
+            raise Exception(f"Unknown property value type: {type_name}")
+
     def fstring(self) -> str:
         # in the hot loop, avoid function calls
         reader = self.data
@@ -895,6 +1999,8 @@ class FProgressArchiveReader(FArchiveReader):
                     ) from e
 
     def progress_eof(self):
+        if self.keep_open and self.scan_done:
+            return len(self.processlist) == 0
         try:
             return self.eof() and len(self.processlist) == 0
         except ValueError:
@@ -959,7 +2065,13 @@ class FProgressArchiveReader(FArchiveReader):
             "count": count,
             "size": size
         }
-        p = MPMapPropertyProcess(self, properties, count, path)
+        p = MPDecodeJob(DecodeWorkerPool.get(), share_mp, {
+            'skip_type': "MapProperty",
+            'key_type': key_type,
+            'key_struct_type': key_struct_type,
+            'value_type': value_type,
+            'value_struct_type': value_struct_type
+        }, count, path, self.custom_properties, self.allow_nan)
         p.start()
         properties.update({
             'value': share_mp
@@ -972,6 +2084,16 @@ class FProgressArchiveReader(FArchiveReader):
 
         ext_data_offset = self.data.tell()
         count = self.u32()
+        if array_type != "StructProperty" or self.is_fixed_struct_array():
+            # Primitive and fixed size struct arrays bulk decode faster than the share memory round trip
+            self.data.seek(ext_data_offset)
+            properties.update({
+                "type": "ArrayProperty",
+                "array_type": array_type,
+                "id": _id,
+                "value": self.array_property(array_type, size - 4, path)
+            })
+            return None
 
         properties.update({
             "type": "ArrayProperty",
@@ -998,7 +2120,12 @@ class FProgressArchiveReader(FArchiveReader):
         data = self.read(size - (self.data.tell() - ext_data_offset))
         mp_ctx = MPArrayProperty(data=data, count=count)
         properties['value']['values'] = mp_ctx.shm.name
-        p = MPArrayPropertyProcess(self, properties, count, size, path)
+        p = MPDecodeJob(DecodeWorkerPool.get(), mp_ctx, {
+            'skip_type': "ArrayProperty",
+            'array_type': array_type,
+            'type_name': properties['value'].get('type_name', None),
+            'prop_name': properties['value'].get('prop_name', None)
+        }, count, path, self.custom_properties, self.allow_nan)
         p.start()
         properties['value'].update({
             'values': mp_ctx
@@ -1075,14 +2202,16 @@ class FProgressArchiveReader(FArchiveReader):
             type_name = self.fstring()
             _id = self.guid()
             self.skip(1)
-            prop_values = []
-            for _ in range(count):
-                try:
-                    prop_values.append(self.struct_value(type_name, f"{path}.{prop_name}"))
-                except Exception as e:
-                    if self.raise_error:
-                        print(f"\033[31mDecodeing Failed on ArrayProperty {path}.{prop_name}[{_}]\033[0m")
-                    raise e
+            prop_values = self.fixed_struct_list(type_name, count)
+            if prop_values is None:
+                prop_values = []
+                for _ in range(count):
+                    try:
+                        prop_values.append(self.struct_value(type_name, f"{path}.{prop_name}"))
+                    except Exception as e:
+                        if self.raise_error:
+                            print(f"\033[31mDecodeing Failed on ArrayProperty {path}.{prop_name}[{_}]\033[0m")
+                        raise e
             value = {
                 "prop_name": prop_name,
                 "prop_type": prop_type,
@@ -1096,27 +2225,100 @@ class FProgressArchiveReader(FArchiveReader):
             }
         return value
 
+    def array_value(self, array_type: str, count: int, size: int, path: str):
+        if array_type == "Guid":
+            data = self.read(count * 16)
+            return [UUID(data[i:i + 16]) for i in range(0, count * 16, 16)]
+        elif array_type in ["EnumProperty", "NameProperty"]:
+            return self.fstring_list(count)
+        elif array_type == "ByteProperty" and size == count:
+            # bytes-backed, indexing / iterating give int as the tuple of byte_list did
+            return self.read(count)
+        return super().array_value(array_type, count, size, path)
+
+    def fixed_struct_list(self, type_name: str, count: int) -> Optional[list]:
+        """Bulk unpack of fixed size struct array, None for other struct types"""
+        if type_name == "Guid":
+            data = self.read(count * 16)
+            return [UUID(data[i:i + 16]) for i in range(0, count * 16, 16)]
+        elif type_name == "Vector" and self.allow_nan:
+            return [{"x": x, "y": y, "z": z} for x, y, z in struct.iter_unpack("<3d", self.read(count * 24))]
+        elif type_name == "Quat" and self.allow_nan:
+            return [{"x": x, "y": y, "z": z, "w": w} for x, y, z, w in
+                    struct.iter_unpack("<4d", self.read(count * 32))]
+        elif type_name == "LinearColor" and self.allow_nan:
+            return [{"r": r, "g": g, "b": b, "a": a} for r, g, b, a in
+                    struct.iter_unpack("<4f", self.read(count * 16))]
+        elif type_name == "DateTime":
+            return [v for v, in struct.iter_unpack("<Q", self.read(count * 8))]
+        return None
+
+    def is_fixed_struct_array(self) -> bool:
+        """Peek the struct array header, True if fixed_struct_list can decode it"""
+        start = self.data.tell()
+        self.fstring()
+        self.fstring()
+        self.u64()
+        type_name = self.fstring()
+        self.data.seek(start)
+        return type_name in ["Guid", "DateTime"] or (self.allow_nan and type_name in STRUCT_VALUE_SIZES)
+
+    def fstring_list(self, count: int) -> list[str]:
+        """Decode count fstring from one buffer pass, fallback to fstring() for string need error handling"""
+        start = self.data.tell()
+        values = []
+        pos = start
+        buf = self.data.getbuffer() if isinstance(self.data, io.BytesIO) else memoryview(self.data)
+        try:
+            for _ in range(count):
+                (size,) = FSTRING_SIZE.unpack_from(buf, pos)
+                pos += 4
+                if size == 0:
+                    values.append("")
+                elif size < 0:
+                    values.append(str(buf[pos:pos - size * 2 - 2], "utf-16-le"))
+                    pos -= size * 2
+                else:
+                    values.append(str(buf[pos:pos + size - 1], "ascii"))
+                    pos += size
+        except UnicodeDecodeError:
+            values = None
+        finally:
+            buf.release()
+        if values is None:
+            self.data.seek(start)
+            return [self.fstring() for _ in range(count)]
+        self.data.seek(pos)
+        return values
+
     def properties_until_end(self, path: str = "") -> dict[str, Any]:
         properties = {}
         while True:
             try:
+                start = self.data.tell()
                 name = self.fstring()
                 if name == "None":
                     break
                 type_name = self.fstring()
+                size_offset = self.data.tell()
                 size = self.u64()
-                sub_path = f"{path}.{name}"
-                mp_loading = self.mp_loading
-                if sub_path in self.custom_properties and self.custom_properties[sub_path][0] is skip_decode:
-                    mp_loading = False
-                if mp_loading and path == ".worldSaveData" and type_name == "MapProperty" and size > 1048576:
-                    properties[name] = {}
-                    self.processlist[sub_path] = self.load_mp_map(properties[name], sub_path, size)
-                elif mp_loading and path == ".worldSaveData" and type_name == "ArrayProperty" and size > 1048576:
-                    properties[name] = {}
-                    self.processlist[sub_path] = self.load_mp_array(properties[name], sub_path, size)
+                mode = None
+                if self.lazy_loading and path == ".worldSaveData":
+                    mode = "lazy"
+                elif self.planner is not None and path == ".worldSaveData":
+                    mode = self.planner.plan(f"{path}.{name}", type_name, size, self.custom_properties,
+                                             self.mp_capable)
+                if mode == "lazy":
+                    if not isinstance(properties, LazyPropertyMap):
+                        properties = LazyPropertyMap(self, path, properties)
+                        self.keep_open = True
+                    dict.__setitem__(properties, name, LazyProperty(name, type_name, size, self.data.tell()))
+                    self.skip_property(type_name, size)
                 else:
-                    properties[name] = self.property(type_name, size, f"{path}.{name}")
+                    self.property_until_end(properties, name, type_name, size, path,
+                                            None if mode is None else mode == "mp")
+                if self.tracker is not None and path == ".worldSaveData":
+                    self.tracker.record(name, start, size_offset, self.data.tell(), size)
             except struct.error as e:
                 raise e
             except Exception as e:
@@ -1124,27 +2326,55 @@ class FProgressArchiveReader(FArchiveReader):
                 traceback.print_exception(e)
                 raise e
         if path == "":
-            for mp_path in self.processlist:
-                self.processlist[mp_path].join()
-                if mp_path in self.custom_properties and 'worldSaveData' in properties:
-                    try:
-                        self.fallbackData = properties['worldSaveData']['value'][mp_path[15:]]
-                        properties['worldSaveData']['value'][mp_path[15:]] = \
-                            self.custom_properties[mp_path][0](self,
-                                                               properties['worldSaveData']['value'][mp_path[15:]][
-                                                                   'type'],
-                                                               -1, mp_path)
-                        properties['worldSaveData']['value'][mp_path[15:]]["custom_type"] = mp_path
-                    except Exception as e:
-                        keyList = properties.keys()
-                        if 'worldSaveData' in properties:
-                            keyList = properties['worldSaveData']['value'].keys()
-                            PalObject.debug_wsd = properties['worldSaveData']['value']
-                        raise ValueError(f"Decode failed, path={path}.{mp_path}, property={keyList}") from e
-            self.processlist = {}
-            self.progresslist = {}
+            self.join_mp_properties(properties['worldSaveData']['value'] if 'worldSaveData' in properties else None)
+            self.scan_done = True
+            if self.tracker is not None and 'worldSaveData' in properties:
+                self.tracker.baseline_all(properties['worldSaveData']['value'])
         return properties
 
+    def property_until_end(self, properties, name, type_name, size, path, mp_loading=None):
+        sub_path = f"{path}.{name}"
+        if mp_loading is None:
+            mp_loading = self.mp_loading and path == ".worldSaveData" and size > 1048576
+            if sub_path in self.custom_properties and self.custom_properties[sub_path][0] is skip_decode:
+                mp_loading = False
+        if mp_loading and type_name == "MapProperty":
+            properties[name] = {}
+            self.processlist[sub_path] = self.load_mp_map(properties[name], sub_path, size)
+        elif mp_loading and type_name == "ArrayProperty":
+            properties[name] = {}
+            job = self.load_mp_array(properties[name], sub_path, size)
+            if job is not None:
+                self.processlist[sub_path] = job
+        else:
+            properties[name] = self.property(type_name, size, sub_path)
+
+    def join_mp_properties(self, worldSaveData):
+        for mp_path in self.processlist:
+            self.processlist[mp_path].join()
+            if mp_path in self.custom_properties and worldSaveData is not None:
+                try:
+                    self.fallbackData = worldSaveData[mp_path[15:]]
+                    worldSaveData[mp_path[15:]] = \
+                        self.custom_properties[mp_path][0](self, worldSaveData[mp_path[15:]]['type'], -1, mp_path)
+                    worldSaveData[mp_path[15:]]["custom_type"] = mp_path
+                except Exception as e:
+                    PalObject.debug_wsd = worldSaveData
+                    raise ValueError(f"Decode failed, path={mp_path}, property={worldSaveData.keys()}") from e
+        self.processlist = {}
+        self.progresslist = {}
+
+    def load_lazy_property(self, properties, lazy_prop, path):
+        self.data.seek(lazy_prop.offset)
+        try:
+            self.property_until_end(properties, lazy_prop.name, lazy_prop.type_name, lazy_prop.size, path)
+        except Exception as e:
+            print(f"\033[31mDecodeing Failed on Decodeing Path {path}.{lazy_prop.name} -> {type(e)}: {str(e)}\033[0m")
+            raise e
+        self.join_mp_properties(properties)
+        if self.tracker is not None:
+            self.tracker.baseline(lazy_prop.name, dict.__getitem__(properties, lazy_prop.name))
+
     def parse_item(self, properties, skip_path):
         if isinstance(properties, dict):
             if 'skip_type' in properties:
@@ -1244,7 +2474,7 @@ def group_encode(
             continue
         p = group["value"]["RawData"]["value"]
         encoded_bytes = palworld_save_group.encode_bytes(p)
-        group["value"]["RawData"]["value"] = {"values": [b for b in encoded_bytes]}
+        group["value"]["RawData"]["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
@@ -1263,6 +2493,8 @@ class CustomEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, UUID):
             return f"PalObject.toUUID('{str(obj)}')"
+        elif isinstance(obj, bytes):
+            return list(obj)
         elif isinstance(obj, JsonPalSimpleObject):
             if obj.custom_type is not None:
                 return f"PalObject.{obj.type}({repr(obj.value)}, {repr(obj.custom_type)})"
@@ -1300,12 +2532,34 @@ def AutoMakeStruct(struct):
                                                                                                                "\n        "))
     return structs
 
+
+def character_owner_uid(character):
+    parameter = character['value']['RawData']['value']['object']['SaveParameter']['value']
+    return parameter['OwnerPlayerUId']['value'] if 'OwnerPlayerUId' in parameter else None
+
+
+def character_slot_container_id(character):
+    parameter = character['value']['RawData']['value']['object']['SaveParameter']['value']
+    return parameter['SlotID']['value']['ContainerId']['value']['ID']['value'] if 'SlotID' in parameter else None
+
+
+def map_object_model_id(field):
+    """Key function of the map object Model RawData field, None for the empty uuid"""
+    def key_func(map_object):
+        value = map_object['Model']['value']['RawData']['value'].get(field, None)
+        return None if value is None or value == PalObject.EmptyUUID else value
+    return key_func
+
+
 class MappingCacheObject:
     __slots__ = ("_worldSaveData", "EnumOptions", "use_mp",
                  "PlayerIdMapping", "CharacterSaveParameterMap", "MapObjectSaveData", "MapObjectSpawnerInStageSaveData",
                  "ItemContainerSaveData", "DynamicItemSaveData", "CharacterContainerSaveData", "GroupSaveDataMap",
                  "WorkSaveData", "BaseCampMapping", "GuildSaveDataMap", "GuildInstanceMapping",
-                 "FoliageGridSaveDataMap")
+                 "FoliageGridSaveDataMap", "SkipEntryIndexes", "IndexShadows", "ReferenceGraph",
+                 "CharactersByOwner", "CharactersBySlotContainer", "CharactersByGroup", "PlayersByUId",
+                 "MapObjectsByBuilder", "MapObjectsByGroup", "MapObjectsByBaseCamp", "MapObjectsBySpawner",
+                 "SpatialIndex", "Tombstones", "MapObjectClusters")
 
     _MappingCacheInstances = {
 
@@ -1342,7 +2596,7 @@ class MappingCacheObject:
             self.LoadItemContainerMaps()
             return self.ItemContainerSaveData
         elif item == 'DynamicItemSaveData':
-            self.LoadItemContainerMaps()
+            self.LoadDynamicItemMaps()
             return self.DynamicItemSaveData
         elif item == 'CharacterContainerSaveData':
             self.LoadCharacterContainerMaps()
@@ -1362,27 +2616,311 @@ class MappingCacheObject:
         elif item == 'FoliageGridSaveDataMap':
             self.LoadMapObjectMaps()
             return self.FoliageGridSaveDataMap
+        elif item == 'SkipEntryIndexes':
+            self.SkipEntryIndexes = {}
+            return self.SkipEntryIndexes
+        elif item == 'IndexShadows':
+            self.IndexShadows = {}
+            return self.IndexShadows
+        elif item == 'Tombstones':
+            self.Tombstones = {}
+            return self.Tombstones
+        elif item in MappingCacheObject.MultiIndexes:
+            if MappingCacheObject.MultiIndexes[item][0] == 'MapObjectSaveData':
+                self.LoadMapObjectMaps()
+            else:
+                self.BuildIndex(item)
+            return object.__getattribute__(self, item)
+        elif item == 'SpatialIndex':
+            spatial = SpatialIndex(self)
+            spatial.Build()
+            self.SpatialIndex = spatial
+            return self.SpatialIndex
+        elif item == 'MapObjectClusters':
+            clusters = MapObjectClusters(self)
+            clusters.Build()
+            self.MapObjectClusters = clusters
+            return self.MapObjectClusters
+        elif item == 'ReferenceGraph':
+            graph = ReferenceGraph(self)
+            graph.Build(self.use_mp)
+            self.ReferenceGraph = graph
+            return self.ReferenceGraph
         elif item == "EnumOptions":
             with open(f"{module_dir}/resources/enum.json", "r", encoding="utf-8") as f:
                 self.EnumOptions = json.load(f)
             return self.EnumOptions
 
+    # index attribute -> (worldSaveData section, key of the entry, entry filter)
+    Indexes = {
+        'CharacterSaveParameterMap': ('CharacterSaveParameterMap', lambda x: x['key']['InstanceId']['value'], None),
+        'PlayerIdMapping': ('CharacterSaveParameterMap', lambda x: x['key']['PlayerUId']['value'],
+                            lambda x: 'IsPlayer' in x['value']['RawData']['value']['object']['SaveParameter']['value']),
+        'MapObjectSaveData': ('MapObjectSaveData', lambda x: x['MapObjectInstanceId']['value'], None),
+        'MapObjectSpawnerInStageSaveData': ('MapObjectSpawnerInStageSaveData', lambda x: x['key'], None),
+        'ItemContainerSaveData': ('ItemContainerSaveData', lambda x: x['key']['ID']['value'], None),
+        'DynamicItemSaveData': ('DynamicItemSaveData', lambda x: x['ID']['value']['LocalIdInCreatedWorld']['value'],
+                                None),
+        'CharacterContainerSaveData': ('CharacterContainerSaveData', lambda x: x['key']['ID']['value'], None),
+        'GroupSaveDataMap': ('GroupSaveDataMap', lambda x: x['key'], None),
+        'GuildSaveDataMap': ('GroupSaveDataMap', lambda x: x['key'],
+                             lambda x: x['value']['GroupType']['value']['value'] == "EPalGroupType::Guild"),
+        'BaseCampMapping': ('BaseCampSaveData', lambda x: x['key'], None),
+        'WorkSaveData': ('WorkSaveData', lambda x: x['RawData']['value']['id'], None),
+    }
+    # worldSaveData section -> index holding every entry of the section, for the O(1) membership test
+    PrimaryIndexes = {section: attr for attr, (section, key_func, entry_filter) in reversed(Indexes.items())
+                      if entry_filter is None}
+    # secondary index attribute -> (worldSaveData section, key of the entry or None, entry filter),
+    # each key maps to {id(entry): entry} of every entry with the key, duplicated entries included
+    MultiIndexes = {
+        'CharactersByOwner': ('CharacterSaveParameterMap', character_owner_uid, None),
+        'CharactersBySlotContainer': ('CharacterSaveParameterMap', character_slot_container_id, None),
+        'CharactersByGroup': ('CharacterSaveParameterMap', lambda x: x['value']['RawData']['value'].get('group_id'),
+                              None),
+        'PlayersByUId': ('CharacterSaveParameterMap', lambda x: x['key']['PlayerUId']['value'],
+                         lambda x: 'IsPlayer' in x['value']['RawData']['value']['object']['SaveParameter']['value']),
+        'MapObjectsByBuilder': ('MapObjectSaveData', map_object_model_id('build_player_uid'), None),
+        'MapObjectsByGroup': ('MapObjectSaveData', map_object_model_id('group_id_belong_to'), None),
+        'MapObjectsByBaseCamp': ('MapObjectSaveData', map_object_model_id('base_camp_id_belong_to'), None),
+        'MapObjectsBySpawner': ('MapObjectSaveData', map_object_model_id('owner_spawner_level_object_instance_id'),
+                                None),
+    }
+
+    def SectionValues(self, section):
+        """The list of entries of a worldSaveData section, the removed entries compacted out first"""
+        if section in self.Tombstones:
+            self.Compact(section)
+        return self.SectionList(section)
+
+    def SectionList(self, section):
+        """The list of entries of a worldSaveData section as stored, removed entries still pending compaction"""
+        if section == 'MapObjectSpawnerInStageSaveData':
+            return self._worldSaveData['MapObjectSpawnerInStageSaveData']['value'][0]['value'][
+                'SpawnerDataMapByLevelObjectInstanceId']['value']
+        values = self._worldSaveData[section]['value']
+        return values['values'] if isinstance(values, dict) else values
+
+    def LoadedIndex(self, attr) -> Optional[dict]:
+        """The index when already built, without building it"""
+        try:
+            return object.__getattribute__(self, attr)
+        except AttributeError:
+            return None
+
+    def BuildIndex(self, attr):
+        if attr in MappingCacheObject.MultiIndexes:
+            self.BuildIndexes(MappingCacheObject.MultiIndexes[attr][0], [attr])
+        else:
+            self.BuildIndexes(MappingCacheObject.Indexes[attr][0], [attr])
+
+    def BuildIndexes(self, section, attrs):
+        """Build the indexes and secondary indexes attrs of section in one pass over its entries"""
+        indexes = [(attr, MappingCacheObject.Indexes[attr][1], MappingCacheObject.Indexes[attr][2], {}, {})
+                   for attr in attrs if attr in MappingCacheObject.Indexes]
+        multi_indexes = [(attr, MappingCacheObject.MultiIndexes[attr][1], MappingCacheObject.MultiIndexes[attr][2], {})
+                         for attr in attrs if attr in MappingCacheObject.MultiIndexes]
+        for entry in self.SectionValues(section):
+            for attr, key_func, entry_filter, index, shadows in indexes:
+                if entry_filter is not None and not entry_filter(entry):
+                    continue
+                key = key_func(entry)
+                if key in index:
+                    # entries hidden by a later entry of the same key, brought back when that one is removed
+                    shadows.setdefault(key, []).append(index[key])
+                index[key] = entry
+            for attr, key_func, entry_filter, index in multi_indexes:
+                if entry_filter is not None and not entry_filter(entry):
+                    continue
+                key = key_func(entry)
+                if key is not None:
+                    index.setdefault(key, {})[id(entry)] = entry
+        for attr, key_func, entry_filter, index, shadows in indexes:
+            self.IndexShadows[attr] = shadows
+            setattr(self, attr, index)
+        for attr, key_func, entry_filter, index in multi_indexes:
+            setattr(self, attr, index)
+
+    def SectionIndexes(self, section) -> list:
+        """Attributes of every index and secondary index of section"""
+        return [attr for attr in MappingCacheObject.Indexes if MappingCacheObject.Indexes[attr][0] == section] + \
+            [attr for attr in MappingCacheObject.MultiIndexes if MappingCacheObject.MultiIndexes[attr][0] == section]
+
+    def OnInsert(self, section, entry):
+        """Index entry appended to section, O(1) for every built index"""
+        for attr, (index_section, key_func, entry_filter) in MappingCacheObject.Indexes.items():
+            if index_section != section:
+                continue
+            index = self.LoadedIndex(attr)
+            if index is None or (entry_filter is not None and not entry_filter(entry)):
+                continue
+            key = key_func(entry)
+            if key in index and index[key] is not entry:
+                self.IndexShadows[attr].setdefault(key, []).append(index[key])
+            index[key] = entry
+        for attr, (index_section, key_func, entry_filter) in MappingCacheObject.MultiIndexes.items():
+            if index_section != section:
+                continue
+            index = self.LoadedIndex(attr)
+            if index is None or (entry_filter is not None and not entry_filter(entry)):
+                continue
+            key = key_func(entry)
+            if key is not None:
+                index.setdefault(key, {})[id(entry)] = entry
+        if section == 'GroupSaveDataMap' and self.LoadedIndex('GuildInstanceMapping') is not None and \
+                MappingCacheObject.Indexes['GuildSaveDataMap'][2](entry):
+            item = parse_skiped_item(entry, "GroupSaveDataMap")['value']['RawData']['value']
+            self.GuildInstanceMapping.update(
+                {ind_char['guid']: ind_char['instance_id'] for ind_char in item['individual_character_handle_ids']})
+        if self.LoadedIndex('ReferenceGraph') is not None:
+            self.ReferenceGraph.AddEntry(section, entry)
+        if self.LoadedIndex('SpatialIndex') is not None:
+            self.SpatialIndex.AddEntry(section, entry)
+        if section == 'MapObjectSaveData' and self.LoadedIndex('MapObjectClusters') is not None:
+            self.MapObjectClusters.AddEntry(entry)
+
+    def OnRemove(self, section, entry):
+        """Drop entry removed from section from every built index, O(1) for every built index"""
+        for attr, (index_section, key_func, entry_filter) in MappingCacheObject.Indexes.items():
+            if index_section != section:
+                continue
+            index = self.LoadedIndex(attr)
+            if index is None or (entry_filter is not None and not entry_filter(entry)):
+                continue
+            key = key_func(entry)
+            shadows = self.IndexShadows[attr].get(key, None)
+            if index.get(key, None) is entry:
+                if shadows:
+                    index[key] = shadows.pop()
+                else:
+                    del index[key]
+            elif shadows:
+                for idx, shadow in enumerate(shadows):
+                    if shadow is entry:
+                        del shadows[idx]
+                        break
+            if shadows is not None and len(shadows) == 0:
+                del self.IndexShadows[attr][key]
+        for attr, (index_section, key_func, entry_filter) in MappingCacheObject.MultiIndexes.items():
+            if index_section != section:
+                continue
+            index = self.LoadedIndex(attr)
+            if index is None or (entry_filter is not None and not entry_filter(entry)):
+                continue
+            key = key_func(entry)
+            entries = index.get(key, None)
+            if entries is not None:
+                entries.pop(id(entry), None)
+                if len(entries) == 0:
+                    del index[key]
+        if section == 'GroupSaveDataMap' and self.LoadedIndex('GuildInstanceMapping') is not None and \
+                MappingCacheObject.Indexes['GuildSaveDataMap'][2](entry):
+            item = parse_skiped_item(entry, "GroupSaveDataMap")['value']['RawData']['value']
+            for ind_char in item['individual_character_handle_ids']:
+                if self.GuildInstanceMapping.get(ind_char['guid'], None) == ind_char['instance_id']:
+                    del self.GuildInstanceMapping[ind_char['guid']]
+        if self.LoadedIndex('ReferenceGraph') is not None:
+            self.ReferenceGraph.RemoveEntry(entry)
+        if self.LoadedIndex('SpatialIndex') is not None:
+            self.SpatialIndex.RemoveEntry(entry)
+        if section == 'MapObjectSaveData' and self.LoadedIndex('MapObjectClusters') is not None:
+            self.MapObjectClusters.RemoveEntry(entry)
+
+    @contextlib.contextmanager
+    def Updating(self, section, entry):
+        """Re-index entry of section after the keys or group members are changed in the with block"""
+        self.OnRemove(section, entry)
+        try:
+            yield entry
+        finally:
+            self.OnInsert(section, entry)
+
+    def InsertEntry(self, section, entry):
+        tombstones = self.Tombstones.get(section, None)
+        if tombstones is not None and tombstones.pop(id(entry), None) is not None:
+            # removed but still in the list, revive it in place
+            if len(tombstones) == 0:
+                del self.Tombstones[section]
+        else:
+            self.SectionList(section).append(entry)
+        self.OnInsert(section, entry)
+        return entry
+
+    def InSection(self, section, entry):
+        """entry is a live entry of section, O(1) by the primary index of section"""
+        if id(entry) in self.Tombstones.get(section, ()):
+            return False
+        attr = MappingCacheObject.PrimaryIndexes.get(section, None)
+        if attr is None:
+            return any(value is entry for value in self.SectionList(section))
+        index = getattr(self, attr)
+        key = MappingCacheObject.Indexes[attr][1](entry)
+        if index.get(key, None) is entry:
+            return True
+        return any(shadow is entry for shadow in self.IndexShadows[attr].get(key, ()))
+
+    def RemoveEntry(self, section, entry):
+        """
+        Remove entry from section by identity, return False when not in section
+        The entry is dropped from the indexes now and marked as tombstone, the list is compacted by Compact
+        """
+        if not self.InSection(section, entry):
+            if id(entry) in self.Tombstones.get(section, ()) or \
+                    not any(value is entry for value in self.SectionList(section)):
+                return False
+            # still in the list but not under its key, the key was changed outside Updating
+            log.warning(f"{tcl(33)}Entry of {section} changed without re-index, rebuild the indexes{tcl(0)}")
+            self.Tombstones.setdefault(section, {})[id(entry)] = entry
+            self.Invalidate(section)
+            return True
+        self.Tombstones.setdefault(section, {})[id(entry)] = entry
+        self.OnRemove(section, entry)
+        return True
+
+    def RemoveEntries(self, section, entries):
+        """Remove entries from section as tombstones, return the number removed"""
+        count = 0
+        for entry in entries:
+            if self.RemoveEntry(section, entry):
+                count += 1
+        return count
+
+    def Invalidate(self, section):
+        """Drop the indexes built over section after edits not wrapped in Updating, rebuilt on the next use"""
+        attrs = self.SectionIndexes(section) + ['ReferenceGraph']
+        if section == 'GroupSaveDataMap':
+            attrs.append('GuildInstanceMapping')
+        if section in SpatialIndex.Sections:
+            attrs.append('SpatialIndex')
+        if section == 'MapObjectSaveData':
+            attrs.append('MapObjectClusters')
+        for attr in attrs:
+            if self.LoadedIndex(attr) is not None:
+                delattr(self, attr)
+            self.IndexShadows.pop(attr, None)
+
+    def Compact(self, section=None):
+        """Drop the tombstones of section, or every section, from the list in one pass, return the number dropped"""
+        count = 0
+        for section in (list(self.Tombstones) if section is None else [section]):
+            tombstones = self.Tombstones.pop(section, None)
+            if not tombstones:
+                continue
+            values = self.SectionList(section)
+            if isinstance(values, MPMapProperty):
+                values.load_all_items()
+            values[:] = [entry for entry in values if id(entry) not in tombstones]
+            count += len(tombstones)
+        return count
+
     def LoadWorkSaveData(self):
         BatchParseItem(self._worldSaveData, ['WorkSaveData'], False, use_mp=self.use_mp)
-        self.WorkSaveData = {wrk['RawData']['value']['id']: wrk for wrk in
-                             self._worldSaveData['WorkSaveData']['value']['values']}
+        self.BuildIndex('WorkSaveData')
 
     def LoadMapObjectMaps(self):
         BatchParseItem(self._worldSaveData, ['MapObjectSaveData', 'MapObjectSpawnerInStageSaveData'], False, use_mp=self.use_mp)
-        self.MapObjectSaveData = {
-            mapobj['MapObjectInstanceId']['value']: mapobj for mapobj in
-            self._worldSaveData['MapObjectSaveData']['value']['values']}
-        self.MapObjectSpawnerInStageSaveData = {
-            mapObj['key']: mapObj
-            for mapObj in
-            self._worldSaveData['MapObjectSpawnerInStageSaveData']['value'][0]['value'][
-                'SpawnerDataMapByLevelObjectInstanceId']['value']
-        }
+        self.BuildIndexes('MapObjectSaveData', self.SectionIndexes('MapObjectSaveData'))
+        self.BuildIndex('MapObjectSpawnerInStageSaveData')
         self.FoliageGridSaveDataMap = {
 
         }
@@ -1394,34 +2932,34 @@ class MappingCacheObject:
         #         })
 
     def LoadCharacterSaveParameterMap(self):
-        self.CharacterSaveParameterMap = {character['key']['InstanceId']['value']: character for character in
-                                          self._worldSaveData['CharacterSaveParameterMap']['value']}
-        self.PlayerIdMapping = {character['key']['PlayerUId']['value']: character for character in
-                                filter(lambda x: 'IsPlayer' in
-                                                 x['value']['RawData']['value']['object']['SaveParameter']['value'],
-                                       self._worldSaveData['CharacterSaveParameterMap']['value'])}
+        self.BuildIndexes('CharacterSaveParameterMap',
+                          ['CharacterSaveParameterMap', 'PlayerIdMapping'] +
+                          [attr for attr in self.SectionIndexes('CharacterSaveParameterMap')
+                           if attr in MappingCacheObject.MultiIndexes and self.LoadedIndex(attr) is not None])
+
+    def EntriesOf(self, attr, key) -> list:
+        """Entries of the secondary index attr with key, an empty list when none"""
+        return list(getattr(self, attr).get(key, {}).values())
 
     def LoadItemContainerMaps(self):
         BatchParseItem(self._worldSaveData, ['ItemContainerSaveData', 'DynamicItemSaveData'], False, use_mp=self.use_mp)
-        self.ItemContainerSaveData = {container['key']['ID']['value']: container for container in
-                                      self._worldSaveData['ItemContainerSaveData']['value']}
-        self.DynamicItemSaveData = {dyn_item_data['ID']['value']['LocalIdInCreatedWorld']['value']: dyn_item_data
-                                    for
-                                    dyn_item_data in self._worldSaveData['DynamicItemSaveData']['value']['values']}
+        self.BuildIndex('ItemContainerSaveData')
+        self.LoadDynamicItemMaps()
+
+    def LoadDynamicItemMaps(self):
+        BatchParseItem(self._worldSaveData, ['DynamicItemSaveData'], False, use_mp=self.use_mp)
+        self.BuildIndex('DynamicItemSaveData')
 
     def LoadCharacterContainerMaps(self):
         BatchParseItem(self._worldSaveData, ['CharacterContainerSaveData'], False, use_mp=self.use_mp)
-        self.CharacterContainerSaveData = {container['key']['ID']['value']: container for container in
-                                           self._worldSaveData['CharacterContainerSaveData']['value']}
+        self.BuildIndex('CharacterContainerSaveData')
 
     def LoadGroupSaveDataMap(self):
-        self.GroupSaveDataMap = {group['key']: group for group in self._worldSaveData['GroupSaveDataMap']['value']}
-        self.GuildSaveDataMap = {group['key']: group for group in
-                                 filter(lambda x: x['value']['GroupType']['value']['value'] == "EPalGroupType::Guild",
-                                        self._worldSaveData['GroupSaveDataMap']['value'])}
+        self.BuildIndex('GroupSaveDataMap')
+        self.BuildIndex('GuildSaveDataMap')
 
     def LoadBaseCampMapping(self):
-        self.BaseCampMapping = {base['key']: base for base in self._worldSaveData['BaseCampSaveData']['value']}
+        self.BuildIndex('BaseCampMapping')
 
     def LoadGuildInstanceMapping(self):
         self.GuildInstanceMapping = {}
@@ -1431,8 +2969,23 @@ class MappingCacheObject:
             self.GuildInstanceMapping.update(
                 {ind_char['guid']: ind_char['instance_id'] for ind_char in item['individual_character_handle_ids']})
 
+    def GetSkipEntryIndex(self, skip_path, key_func: Optional[Callable] = None) -> Optional["SkipEntryIndex"]:
+        """Entry index of a section which still not parsed, None when the section already parsed"""
+        properties = self._worldSaveData[skip_path]
+        if 'skip_type' not in properties:
+            self.SkipEntryIndexes.pop(skip_path, None)
+            return None
+        if skip_path not in self.SkipEntryIndexes or self.SkipEntryIndexes[skip_path].properties is not properties:
+            t1 = time.time()
+            self.SkipEntryIndexes[skip_path] = SkipEntryIndex(properties, skip_path, key_func)
+            print("Index %d entries of .worldSaveData.%s in %.2fs" % (
+                len(self.SkipEntryIndexes[skip_path]), skip_path, time.time() - t1))
+        return self.SkipEntryIndexes[skip_path]
+
     def __del__(self):
         for key in self._worldSaveData:
+            if isinstance(self._worldSaveData, LazyPropertyMap) and not self._worldSaveData.is_loaded(key):
+                continue
             if isinstance(self._worldSaveData[key]['value'], MPMapProperty):
                 self._worldSaveData[key]['value'].close()
                 self._worldSaveData[key]['value'].release()
@@ -1443,6 +2996,655 @@ class MappingCacheObject:
                 self._worldSaveData[key]['value']['values'].release()
 
 
+# MappingCacheObject.ReferenceGraph edge type of a GUID field, by the innermost field name on its path
+REFERENCE_EDGE_FIELDS = {
+    'container': ('ContainerId', 'EquipItemContainerId', 'ItemContainerId', 'CharacterContainerId',
+                  'target_container_id', 'container_id'),
+    'instance': ('InstanceId', 'instance_id', 'owner_instance_id', 'hatched_character_guid'),
+    'work': ('WorkId', 'target_work_id', 'repair_work_id', 'work_ids', 'BuildProcess'),
+    'map_object': ('MapObjectInstanceId', 'Model', 'model_instance_id', 'map_object_instance_id',
+                   'connect_to_model_instance_id', 'owner_map_object_instance_id', 'owner_map_object_model_id',
+                   'target_map_object_model_id', 'map_object_instance_ids_base_camp_points'),
+    'concrete_model': ('MapObjectConcreteModelInstanceId', 'ConcreteModel', 'concrete_model_instance_id',
+                       'owner_map_object_concrete_model_id'),
+    'group': ('GroupID', 'GroupId', 'group_id', 'group_id_belong_to'),
+    'base_camp': ('BaseCampId', 'WorkerDirector', 'WorkCollection', 'base_ids', 'base_camp_id',
+                  'base_camp_id_belong_to'),
+    'player': ('PlayerUId', 'OwnerPlayerUId', 'OldOwnerPlayerUIds', 'guid', 'player_uid', 'admin_player_uid',
+               'build_player_uid', 'owner_player_uid'),
+    'dynamic_item': ('LocalIdInCreatedWorld', 'local_id_in_created_world'),
+    'spawner': ('owner_spawner_level_object_instance_id',),
+}
+REFERENCE_EDGE_TYPES = {field: edge_type for edge_type, fields in REFERENCE_EDGE_FIELDS.items() for field in fields}
+# generic field names, typed by the enclosing field when it has a type
+REFERENCE_EDGE_INHERITED_FIELDS = {'id': None, 'instance_id': 'instance'}
+REFERENCE_SCALAR_TYPES = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+def reference_edges(node, skip_path, own_key=None):
+    """
+    (GUID, edge type) of every GUID inside node except EmptyUUID and own_key.
+    skip_decode sub-properties on the way are parsed in place, skip_path is the path of node like parse_item.
+    """
+    edges = []
+    skip_bytes = (PalObject.EmptyUUID.raw_bytes, None if own_key is None else own_key.raw_bytes)
+    if isinstance(node, UUID):
+        if node.raw_bytes not in skip_bytes:
+            edges.append((node, None))
+        return edges
+    # path is kept as (parent path, name) pairs, only joined for a skip_decode sub-property
+    stack = [(node, None, (None, skip_path))]
+    while len(stack) > 0:
+        node, edge_type, path = stack.pop()
+        if isinstance(node, dict):
+            if 'skip_type' in node:
+                names = []
+                while path is not None:
+                    names.append(path[1])
+                    path = path[0]
+                parse_skiped_item(node, ".".join(reversed(names)))
+            for key, value in node.items():
+                cls = value.__class__
+                if cls is UUID or cls is dict or cls is list or \
+                        (cls not in REFERENCE_SCALAR_TYPES and isinstance(value, (UUID, dict, list))):
+                    if key in REFERENCE_EDGE_INHERITED_FIELDS:
+                        value_type = REFERENCE_EDGE_INHERITED_FIELDS[key] if edge_type is None else edge_type
+                    else:
+                        value_type = REFERENCE_EDGE_TYPES.get(key, edge_type)
+                    if isinstance(value, UUID):
+                        if value.raw_bytes not in skip_bytes:
+                            edges.append((value, value_type))
+                    else:
+                        stack.append((value, value_type, (path, key[0].upper() + key[1:] if key else key)))
+        elif isinstance(node, list):
+            for value in node:
+                cls = value.__class__
+                if cls is UUID:
+                    if value.raw_bytes not in skip_bytes:
+                        edges.append((value, edge_type))
+                elif cls is dict or cls is list or \
+                        (cls not in REFERENCE_SCALAR_TYPES and isinstance(value, (dict, list))):
+                    stack.append((value, edge_type, path[0]))
+    return edges
+
+
+def reference_paths(node, guid, prefix=""):
+    """Python paths like search_guid of every place guid is found inside node"""
+    paths = []
+    stack = [(node, prefix)]
+    while len(stack) > 0:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            items = node.items()
+            fmt = "%s['%s']"
+        elif isinstance(node, list):
+            items = enumerate(node)
+            fmt = "%s[%d]"
+        else:
+            continue
+        for key, value in items:
+            if isinstance(value, UUID):
+                if value == guid:
+                    paths.append(fmt % (path, key))
+            elif isinstance(value, (dict, list)):
+                stack.append((value, fmt % (path, key)))
+    return paths
+
+
+_reference_graph_source = None
+
+
+def reference_graph_section_edges(section):
+    """Edges of a section in a forked process sharing the worldSaveData of the parent, GUIDs as raw bytes"""
+    return [[(guid.raw_bytes, edge_type) for guid, edge_type in edges] for edges in
+            _reference_graph_source.SectionEdges(section)]
+
+
+class ReferenceGraph:
+    """
+    Typed GUID reference edges of the whole worldSaveData, referrer entry -> referred GUID.
+    Referrers are the entries of the map / array sections keyed like the MappingCacheObject indexes,
+    or the whole section for the other properties. Kept current by the MappingCacheObject insert / remove hooks.
+    """
+    # edge type -> MappingCacheObject indexes of the entries referred by it
+    Definitions = {
+        'container': ('ItemContainerSaveData', 'CharacterContainerSaveData'),
+        'instance': ('CharacterSaveParameterMap',),
+        'work': ('WorkSaveData',),
+        'map_object': ('MapObjectSaveData',),
+        'group': ('GroupSaveDataMap',),
+        'base_camp': ('BaseCampMapping',),
+        'player': ('PlayerIdMapping',),
+        'dynamic_item': ('DynamicItemSaveData',),
+        'spawner': ('MapObjectSpawnerInStageSaveData',),
+    }
+
+    def __init__(self, mapping: "MappingCacheObject"):
+        self.mapping = mapping
+        # id(entry) -> (section, key, entry, edges)
+        self.entries = {}
+        # GUID -> {id(entry): edge type}
+        self.reverse = {}
+        # edge type -> {GUID: edge count}
+        self.targets = {}
+        # (section, key) -> entry count, the GUID keys defined by each section
+        self.keys = {}
+        self.key_funcs = {}
+        for attr, (section, key_func, entry_filter) in MappingCacheObject.Indexes.items():
+            if entry_filter is None:
+                self.key_funcs.setdefault(section, key_func)
+
+    def __len__(self):
+        return sum(len(record[3]) for record in self.entries.values())
+
+    def EntryKey(self, section, entry, idx):
+        if section in self.key_funcs:
+            return self.key_funcs[section](entry)
+        if isinstance(entry, dict) and 'key' in entry:
+            return skip_entry_key(entry['key'])
+        return idx
+
+    def SectionEntries(self, section):
+        """(key, entry) of every entry of section, [(None, section)] when section is not a map / entry array"""
+        properties = self.mapping._worldSaveData[section]
+        if not isinstance(properties, dict) or 'skip_type' in properties:
+            return []
+        try:
+            values = self.mapping.SectionValues(section)
+        except (KeyError, IndexError, TypeError):
+            values = None
+        if not isinstance(values, list):
+            return [(None, properties)]
+        if isinstance(values, MPMapProperty):
+            values.load_all_items()
+        return [(self.EntryKey(section, entry, idx), entry) for idx, entry in enumerate(values)]
+
+    def SectionEdges(self, section, entries=None):
+        if entries is None:
+            entries = self.SectionEntries(section)
+        return [reference_edges(entry, section, key if isinstance(key, UUID) else None) for key, entry in entries]
+
+    def Build(self, use_mp=True):
+        global _reference_graph_source
+        t1 = time.time()
+        sections = {}
+        for section in self.mapping._worldSaveData:
+            sections[section] = self.SectionEntries(section)
+        if use_mp and MP_DECODE_WORKERS > 1 and len(sections) > 1 and \
+                'fork' in multiprocessing.get_all_start_methods():
+            # forked workers walk the sections on the copy-on-write worldSaveData, largest section first
+            _reference_graph_source = self
+            try:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=min(MP_DECODE_WORKERS, len(sections)),
+                                                            mp_context=multiprocessing.get_context('fork')) as pool:
+                    jobs = {section: pool.submit(reference_graph_section_edges, section) for section in
+                            sorted(sections, key=lambda x: len(sections[x]), reverse=True)}
+                    section_edges = {section: [[(UUID(raw_bytes), edge_type) for raw_bytes, edge_type in edges]
+                                               for edges in jobs[section].result()] for section in jobs}
+            finally:
+                _reference_graph_source = None
+        else:
+            section_edges = {section: self.SectionEdges(section, sections[section]) for section in sections}
+        for section in sections:
+            for (key, entry), edges in zip(sections[section], section_edges[section]):
+                self.Link(section, key, entry, edges)
+        print("Reference graph: %d edges of %d entries in %.2fs" % (len(self), len(self.entries), time.time() - t1))
+
+    def Link(self, section, key, entry, edges):
+        self.entries[id(entry)] = (section, key, entry, edges)
+        if isinstance(key, UUID):
+            self.keys[(section, key)] = self.keys.get((section, key), 0) + 1
+        for guid, edge_type in edges:
+            self.reverse.setdefault(guid, {})[id(entry)] = edge_type
+            targets = self.targets.setdefault(edge_type, {})
+            targets[guid] = targets.get(guid, 0) + 1
+
+    def AddEntry(self, section, entry):
+        key = self.EntryKey(section, entry, None)
+        self.Link(section, key, entry, reference_edges(entry, section, key if isinstance(key, UUID) else None))
+
+    def RemoveEntry(self, entry):
+        record = self.entries.pop(id(entry), None)
+        if record is None:
+            return
+        section, key, _, edges = record
+        if (section, key) in self.keys:
+            self.keys[(section, key)] -= 1
+            if self.keys[(section, key)] == 0:
+                del self.keys[(section, key)]
+        for guid, edge_type in edges:
+            referrers = self.reverse.get(guid, None)
+            if referrers is not None:
+                referrers.pop(id(entry), None)
+                if len(referrers) == 0:
+                    del self.reverse[guid]
+            targets = self.targets[edge_type]
+            targets[guid] -= 1
+            if targets[guid] == 0:
+                del targets[guid]
+                if len(targets) == 0:
+                    del self.targets[edge_type]
+
+    def Referrers(self, guid, edge_type=None):
+        """(section, key, entry) of every entry referring guid"""
+        guid = toUUID(guid)
+        return [self.entries[entry_id][:3] for entry_id, referrer_type in self.reverse.get(guid, {}).items() if
+                edge_type is None or referrer_type == edge_type]
+
+    def References(self, entry, edge_type=None):
+        """(GUID, edge type) of every GUID referred by entry"""
+        record = self.entries.get(id(entry), None)
+        if record is None:
+            return []
+        return [edge for edge in record[3] if edge_type is None or edge[1] == edge_type]
+
+    def ReferencedIds(self, edge_type, sections=None):
+        """GUIDs referred by an edge of edge_type, only from entries of sections when given"""
+        if sections is None:
+            return set(self.targets.get(edge_type, {}))
+        return {guid for guid in self.targets.get(edge_type, {}) if any(
+            referrer_type == edge_type and self.entries[entry_id][0] in sections for entry_id, referrer_type in
+            self.reverse[guid].items())}
+
+    def DanglingIds(self, edge_type):
+        """GUIDs referred by an edge of edge_type which no entry of its sections defines"""
+        guids = self.ReferencedIds(edge_type)
+        for attr in ReferenceGraph.Definitions[edge_type]:
+            guids.difference_update(getattr(self.mapping, attr).keys())
+        return guids
+
+    def UnreferencedIds(self, attr):
+        """Keys of the MappingCacheObject index attr not referred by any edge"""
+        return {guid for guid in getattr(self.mapping, attr) if guid not in self.reverse}
+
+    def DefinedIn(self, guid):
+        """Sections with an entry keyed by guid"""
+        guid = toUUID(guid)
+        return [section for section in self.mapping._worldSaveData if (section, guid) in self.keys]
+
+    def ReferencePaths(self, guid):
+        """worldSaveData paths of guid inside every referrer"""
+        guid = toUUID(guid)
+        paths = []
+        for section, key, entry in self.Referrers(guid):
+            paths += reference_paths(entry, guid, "['%s'][%s]" % (section, repr(str(key)) if key is not None else "*"))
+        return paths
+
+
+def map_object_location(map_object):
+    """Sav coordinates (x, y, z) of the map object WorldLocation, read from the skipped bytes when not decoded"""
+    location = map_object['WorldLocation']
+    if isinstance(location['value'], (bytes, bytearray, memoryview)):
+        return struct.unpack_from("<3d", location['value'])
+    return location['value']['x'], location['value']['y'], location['value']['z']
+
+
+def base_camp_location(base_camp):
+    translation = base_camp['value']['RawData']['value']['transform']['translation']
+    return translation['x'], translation['y'], translation['z']
+
+
+class SpatialIndex:
+    """
+    Uniform grid of the map object and base camp locations.
+    Points are kept in sav coordinates, queries take and return palworld_coord map units.
+    Kept current by the MappingCacheObject insert / remove hooks.
+    """
+    # section -> (kind, key of the entry, sav location of the entry)
+    Sections = {
+        'MapObjectSaveData': ('MapObject', lambda x: x['MapObjectInstanceId']['value'], map_object_location),
+        'BaseCampSaveData': ('BaseCamp', lambda x: x['key'], base_camp_location),
+    }
+    # grid cell edge in map units
+    CellSize = 16
+
+    def __init__(self, mapping: "MappingCacheObject"):
+        self.mapping = mapping
+        self.origin = palworld_coord.map_to_sav(0, 0)
+        # sav units of one map unit
+        self.scale = palworld_coord.map_to_sav(1, 0).y - self.origin.y
+        self.cell_size = SpatialIndex.CellSize * self.scale
+        # (cell x, cell y) -> {(kind, key): (x, y, z)}
+        self.cells = {}
+        # (kind, key) -> cell
+        self.points = {}
+        # id(entry) -> (kind, key)
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def Cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def Build(self):
+        t1 = time.time()
+        if self.mapping.LoadedIndex('MapObjectSaveData') is None:
+            self.mapping.LoadMapObjectMaps()
+        self.cells = {}
+        self.points = {}
+        self.entries = {}
+        for section in SpatialIndex.Sections:
+            for entry in self.mapping.SectionValues(section):
+                self.AddEntry(section, entry)
+        print("Spatial index: %d locations in %d cells in %.2fs" % (len(self.entries), len(self.cells),
+                                                                      time.time() - t1))
+
+    def AddEntry(self, section, entry):
+        if section not in SpatialIndex.Sections or id(entry) in self.entries:
+            return
+        kind, key_func, location_func = SpatialIndex.Sections[section]
+        try:
+            location = location_func(entry)
+        except (KeyError, TypeError, struct.error):
+            return
+        point = (kind, key_func(entry))
+        if point in self.points:
+            self.cells[self.points[point]].pop(point, None)
+        cell = self.Cell(location[0], location[1])
+        self.cells.setdefault(cell, {})[point] = tuple(location)
+        self.points[point] = cell
+        self.entries[id(entry)] = point
+
+    def RemoveEntry(self, entry):
+        point = self.entries.pop(id(entry), None)
+        if point is None or point not in self.points:
+            return
+        cell = self.points.pop(point)
+        points = self.cells[cell]
+        points.pop(point, None)
+        if len(points) == 0:
+            del self.cells[cell]
+
+    def ToMap(self, x, y):
+        """Sav coordinates to map units, palworld_coord.sav_to_map without the rounding"""
+        return (y - self.origin.y) / self.scale, (x - self.origin.x) / self.scale
+
+    def Location(self, kind, key):
+        """Map units (x, y) of the kind / key point, None when not indexed"""
+        if (kind, key) not in self.points:
+            return None
+        x, y, z = self.cells[self.points[(kind, key)]][(kind, key)]
+        return self.ToMap(x, y)
+
+    def _Cells(self, min_x, min_y, max_x, max_y):
+        """Cells overlapping the sav coordinates box, the occupied ones when the box spans more cells"""
+        min_cell, max_cell = self.Cell(min_x, min_y), self.Cell(max_x, max_y)
+        if (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1) > len(self.cells):
+            return [cell for cell in self.cells if min_cell[0] <= cell[0] <= max_cell[0] and
+                    min_cell[1] <= cell[1] <= max_cell[1]]
+        return [(cx, cy) for cx in range(min_cell[0], max_cell[0] + 1) for cy in range(min_cell[1], max_cell[1] + 1)]
+
+    def _Points(self, cells, kinds):
+        for cell in cells:
+            for (kind, key), location in self.cells.get(cell, {}).items():
+                if kinds is None or kind in kinds:
+                    yield kind, key, location
+
+    def Box(self, x_range, y_range, kinds=None) -> list:
+        """(kind, key) of the points inside the map units box x_range x y_range"""
+        corners = [palworld_coord.map_to_sav(x, y) for x in x_range for y in y_range]
+        min_x, max_x = min(p.x for p in corners), max(p.x for p in corners)
+        min_y, max_y = min(p.y for p in corners), max(p.y for p in corners)
+        return [(kind, key) for kind, key, (x, y, z) in self._Points(self._Cells(min_x, min_y, max_x, max_y), kinds)
+                if min_x <= x <= max_x and min_y <= y <= max_y]
+
+    def Radius(self, x, y, radius, kinds=None) -> list:
+        """(distance, kind, key) of the points within radius of the map units point x, y, nearest first"""
+        center = palworld_coord.map_to_sav(x, y)
+        sav_radius = radius * self.scale
+        cells = self._Cells(center.x - sav_radius, center.y - sav_radius, center.x + sav_radius, center.y + sav_radius)
+        found = []
+        for kind, key, (px, py, pz) in self._Points(cells, kinds):
+            distance = math.hypot(px - center.x, py - center.y)
+            if distance <= sav_radius:
+                found.append((distance / self.scale, kind, key))
+        found.sort(key=lambda x: x[0])
+        return found
+
+    def Nearest(self, x, y, k=1, kinds=None) -> list:
+        """(distance, kind, key) of the k points nearest to the map units point x, y"""
+        center = palworld_coord.map_to_sav(x, y)
+        center_cell = self.Cell(center.x, center.y)
+        if len(self.cells) == 0:
+            return []
+        max_ring = max(max(abs(cx - center_cell[0]), abs(cy - center_cell[1])) for cx, cy in self.cells)
+        found = []
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                cells = [center_cell]
+            else:
+                cells = [(center_cell[0] + dx, center_cell[1] + dy) for dx in range(-ring, ring + 1)
+                         for dy in (-ring, ring)] + \
+                        [(center_cell[0] + dx, center_cell[1] + dy) for dx in (-ring, ring)
+                         for dy in range(-ring + 1, ring)]
+            for kind, key, (px, py, pz) in self._Points(cells, kinds):
+                found.append((math.hypot(px - center.x, py - center.y) / self.scale, kind, key))
+            found.sort(key=lambda x: x[0])
+            # every point outside the rings walked is at least ring cells away
+            if len(found) >= k and found[k - 1][0] <= ring * SpatialIndex.CellSize:
+                break
+        return found[:k]
+
+    def OverlappingBaseCamps(self) -> list:
+        """(base camp id, base camp id, distance) of the base camps whose areas overlap, distance in map units"""
+        base_camps = self.mapping.BaseCampMapping
+        max_range = max([base_camps[base_id]['value']['RawData']['value']['area_range'] for base_id in base_camps],
+                        default=0)
+        overlapped = []
+        for base_id in base_camps:
+            raw = base_camps[base_id]['value']['RawData']['value']
+            x, y = self.ToMap(*base_camp_location(base_camps[base_id])[:2])
+            for distance, kind, other_id in self.Radius(x, y, (raw['area_range'] + max_range) / self.scale,
+                                                        ['BaseCamp']):
+                if other_id == base_id or str(other_id) < str(base_id):
+                    continue
+                other_range = base_camps[other_id]['value']['RawData']['value']['area_range']
+                if distance * self.scale < raw['area_range'] + other_range:
+                    overlapped.append((base_id, other_id, distance))
+        return overlapped
+
+
+def map_object_connections(map_object):
+    """Instance ids the map object connector links to, any_place and other_connectors"""
+    connector = map_object['Model']['value']['Connector']['value']['RawData']
+    connections = []
+    if 'value' not in connector:
+        return connections
+    if 'connect' in connector['value'] and 'any_place' in connector['value']['connect']:
+        connections += [item['connect_to_model_instance_id'] for item in connector['value']['connect']['any_place']]
+    if 'other_connectors' in connector['value']:
+        for other_connection_list in connector['value']['other_connectors']:
+            connections += [item['connect_to_model_instance_id'] for item in other_connection_list['connect']]
+    return connections
+
+
+class MapObjectClusters:
+    """
+    Structure clusters of the map objects joined by their connectors, links taken as undirected,
+    Reachable() follows the links in their direction for the deletes and copies.
+    Union-find over node numbers of the map object ids, built in one pass over MapObjectSaveData and kept current
+    by the MappingCacheObject insert / remove hooks, a cluster losing a map object is split again on its next lookup.
+    """
+
+    def __init__(self, mapping: "MappingCacheObject"):
+        self.mapping = mapping
+        # map object id -> node, node -> map object id
+        self.nodes = {}
+        self.ids = []
+        # node -> parent node, roots map to themselves, None for the nodes not in the section
+        self.parent = []
+        # root -> live nodes of the cluster
+        self.members = {}
+        # node -> nodes its connector links to
+        self.links = {}
+        # node -> nodes linking to it
+        self.backlinks = {}
+        # root -> {removed node still in the cluster tree: its links at removal}
+        self.removed = {}
+        # root of a cluster to split -> number of removals and dropped links since it was built
+        self.stale = {}
+
+    def __len__(self):
+        return len(self.members)
+
+    def Build(self):
+        t1 = time.time()
+        if self.mapping.LoadedIndex('MapObjectSaveData') is None:
+            self.mapping.LoadMapObjectMaps()
+        self.__init__(self.mapping)
+        for entry in self.mapping.SectionValues('MapObjectSaveData'):
+            self.AddEntry(entry)
+        print("Map object clusters: %d clusters of %d map objects in %.2fs" % (
+            len(self.members), sum(len(nodes) for nodes in self.members.values()), time.time() - t1))
+
+    def Node(self, map_object_id):
+        node = self.nodes.get(map_object_id, None)
+        if node is None:
+            node = self.nodes[map_object_id] = len(self.ids)
+            self.ids.append(map_object_id)
+            self.parent.append(None)
+        return node
+
+    def Find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def IsLive(self, node):
+        return self.parent[node] is not None and node in self.members[self.Find(node)]
+
+    def Union(self, a, b):
+        root_a, root_b = self.Find(a), self.Find(b)
+        if root_a == root_b:
+            return root_a
+        if len(self.members[root_a]) < len(self.members[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.members[root_a].update(self.members.pop(root_b))
+        if root_b in self.removed:
+            self.removed.setdefault(root_a, {}).update(self.removed.pop(root_b))
+        if root_b in self.stale:
+            self.stale[root_a] = self.stale.get(root_a, 0) + self.stale.pop(root_b)
+        return root_a
+
+    def Unstale(self, root):
+        self.stale[root] -= 1
+        if self.stale[root] == 0:
+            del self.stale[root]
+
+    def SetLinks(self, node, links):
+        for connect in self.links.pop(node, ()):
+            backlinks = self.backlinks[connect]
+            backlinks.discard(node)
+            if len(backlinks) == 0:
+                del self.backlinks[connect]
+        if len(links) > 0:
+            self.links[node] = links
+            for connect in links:
+                self.backlinks.setdefault(connect, set()).add(node)
+
+    def AddEntry(self, entry):
+        node = self.Node(entry['MapObjectInstanceId']['value'])
+        links = {self.Node(connect_id) for connect_id in map_object_connections(entry)}
+        links.discard(node)
+        if self.parent[node] is not None:
+            root = self.Find(node)
+            if node not in self.members[root]:
+                # inserted again before its cluster was split, e.g. re-indexed by MappingCacheObject.Updating
+                old_links = self.removed[root].pop(node)
+                if len(self.removed[root]) == 0:
+                    del self.removed[root]
+                self.members[root].add(node)
+                if not (old_links - links):
+                    self.Unstale(root)
+            elif self.links.get(node, set()) - links:
+                # links dropped from a live map object, the cluster may fall apart
+                self.stale[root] = self.stale.get(root, 0) + 1
+        else:
+            self.parent[node] = node
+            self.members[node] = {node}
+        self.SetLinks(node, links)
+        for connects in (links, self.backlinks.get(node, ())):
+            for connect in connects:
+                if self.IsLive(connect):
+                    self.Union(node, connect)
+
+    def RemoveEntry(self, entry):
+        map_object_id = entry['MapObjectInstanceId']['value']
+        node = self.nodes.get(map_object_id, None)
+        if node is None or not self.IsLive(node):
+            return
+        if map_object_id in self.mapping.MapObjectSaveData:
+            # a duplicated entry of the id is still in the section, its connector is the one in use now
+            self.AddEntry(self.mapping.MapObjectSaveData[map_object_id])
+            return
+        root = self.Find(node)
+        self.members[root].discard(node)
+        self.removed.setdefault(root, {})[node] = self.links.get(node, set())
+        self.stale[root] = self.stale.get(root, 0) + 1
+        self.SetLinks(node, set())
+        if len(self.members[root]) == 0:
+            self.Split(root)
+
+    def Split(self, root):
+        """Recompute the clusters of the live members of the cluster root by an iterative walk of their links"""
+        self.stale.pop(root, None)
+        for node in self.removed.pop(root, ()):
+            self.parent[node] = None
+        nodes = self.members.pop(root)
+        for node in nodes:
+            self.parent[node] = node
+        for node in nodes:
+            if self.parent[node] != node or node in self.members:
+                continue
+            cluster = {node}
+            pending = [node]
+            while pending:
+                current = pending.pop()
+                for connect in self.links.get(current, set()) | self.backlinks.get(current, set()):
+                    if connect in nodes and connect not in cluster:
+                        cluster.add(connect)
+                        self.parent[connect] = node
+                        pending.append(connect)
+            self.members[node] = cluster
+
+    def Cluster(self, map_object_id) -> set:
+        """Ids of the map objects connected to map_object_id, itself included, empty when not a map object"""
+        node = self.nodes.get(toUUID(map_object_id), None)
+        if node is None or self.parent[node] is None:
+            return set()
+        root = self.Find(node)
+        if root in self.stale:
+            self.Split(root)
+            if self.parent[node] is None:
+                return set()
+            root = self.Find(node)
+        if node not in self.members[root]:
+            return set()
+        return {self.ids[member] for member in self.members[root]}
+
+    def Reachable(self, map_object_id) -> set:
+        """
+        Ids of the map objects reached from map_object_id following the connector links in their direction,
+        itself included, the walk stays inside the cluster of map_object_id
+        """
+        node = self.nodes.get(toUUID(map_object_id), None)
+        if node is None or len(self.Cluster(map_object_id)) == 0:
+            return set()
+        members = self.members[self.Find(node)]
+        reached = {node}
+        pending = [node]
+        while pending:
+            for connect in self.links.get(pending.pop(), ()):
+                if connect in members and connect not in reached:
+                    reached.add(connect)
+                    pending.append(connect)
+        return {self.ids[member] for member in reached}
+
+
 def parse_skiped_item(properties, skip_path, progress: Optional[Callable]=None, recursive=True, mp=None):
     if "skip_type" not in properties:
         return properties
@@ -1481,12 +3683,18 @@ def parse_skiped_item(properties, skip_path, progress: Optional[Callable]=None,
     ) as reader:
         if progress is not None:
             progress(reader, len(properties['value']))
+        # DirtyTracker match the share memory section to the original bytes by the crc
         if reader.mp_loading and mp is not None and properties["skip_type"] == "MapProperty":
+            source_crc = (len(properties['value']), zlib.crc32(properties['value']))
             mp[f".worldSaveData.{skip_path}"] = reader.load_mp_map(properties, f".worldSaveData.{skip_path}",
                                                                    len(properties['value']))
+            properties['value'].source_crc = source_crc
         elif reader.mp_loading and mp is not None and properties["skip_type"] == "ArrayProperty":
-            mp[f".worldSaveData.{skip_path}"] = reader.load_mp_array(properties, f".worldSaveData.{skip_path}",
-                                                                     len(properties['value']))
+            source_crc = (len(properties['value']), zlib.crc32(properties['value']))
+            job = reader.load_mp_array(properties, f".worldSaveData.{skip_path}", len(properties['value']))
+            if job is not None:
+                mp[f".worldSaveData.{skip_path}"] = job
+                properties['value']['values'].source_crc = source_crc
         else:
             decoded_properties = reader.property(properties["skip_type"], len(properties['value']),
                                                  ".worldSaveData.%s" % skip_path)
@@ -1498,6 +3706,1140 @@ def parse_skiped_item(properties, skip_path, progress: Optional[Callable]=None,
     return properties
 
 
+def skip_entry_key(key):
+    if isinstance(key, dict):
+        if len(key) == 1:
+            return next(iter(key.values()))['value']
+        if 'InstanceId' in key:
+            return key['InstanceId']['value']
+    return key
+
+
+class SkipEntryIndex:
+    """
+    Byte offsets of every entry inside a skip_decode MapProperty or struct ArrayProperty blob,
+    single entry can be decoded, replaced or removed without parsing the whole blob.
+    MapProperty entries are keyed by skip_entry_key(key), ArrayProperty entries by position.
+    """
+
+    def __init__(self, properties, skip_path, key_func: Optional[Callable] = None):
+        self.properties = properties
+        self.skip_path = skip_path
+        self.path = ".worldSaveData.%s" % skip_path
+        self.key_func = skip_entry_key if key_func is None else key_func
+        self.is_map = properties['skip_type'] == "MapProperty"
+        self.keys = []
+        self.offsets = {}
+        self.decoded = {}
+        self.header_size = 0
+        self.size_offset = None
+        self.scan()
+
+    def scan(self):
+        if self.properties['skip_type'] == "ArrayProperty" and self.properties['array_type'] != "StructProperty":
+            raise Exception(f"Unsupported skip entry index on {self.properties['array_type']} {self.path}")
+        elif self.properties['skip_type'] not in ["MapProperty", "ArrayProperty"]:
+            raise Exception(f"Unsupported skip entry index on {self.properties['skip_type']} {self.path}")
+        with FProgressArchiveReader(self.properties['value'], PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES,
+                                    reduce_memory=True) as reader:
+            if self.is_map:
+                reader.u32()
+                count = reader.u32()
+                self.key_struct_type = reader.get_type_or(self.path + ".Key", "Guid") \
+                    if self.properties['key_type'] == "StructProperty" else None
+                self.value_struct_type = reader.get_type_or(self.path + ".Value", "StructProperty") \
+                    if self.properties['value_type'] == "StructProperty" else None
+                self.header_size = reader.data.tell()
+                for _ in range(count):
+                    start = reader.data.tell()
+                    key = self.key_func(reader.prop_value(self.properties['key_type'], self.key_struct_type,
+                                                          self.path + ".Key"))
+                    reader.skip_prop_value(self.properties['value_type'], self.value_struct_type)
+                    self.keys.append(key)
+                    self.offsets[key] = (start, reader.data.tell())
+            else:
+                count = reader.u32()
+                self.prop_name = reader.fstring()
+                reader.fstring()
+                self.size_offset = reader.data.tell()
+                reader.u64()
+                self.type_name = reader.fstring()
+                reader.guid()
+                reader.skip(1)
+                self.header_size = reader.data.tell()
+                for idx in range(count):
+                    start = reader.data.tell()
+                    reader.skip_struct_value(self.type_name)
+                    self.keys.append(idx)
+                    self.offsets[idx] = (start, reader.data.tell())
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def raw(self, key) -> bytes:
+        start, end = self.offsets[key]
+        return self.properties['value'][start:end]
+
+    def decode(self, key):
+        if key in self.decoded:
+            return self.decoded[key]
+        with FProgressArchiveReader(self.raw(key), PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES,
+                                    reduce_memory=True) as reader:
+            if self.is_map:
+                entry = {
+                    "key": reader.prop_value(self.properties['key_type'], self.key_struct_type, self.path + ".Key"),
+                    "value": reader.prop_value(self.properties['value_type'], self.value_struct_type,
+                                               self.path + ".Value")
+                }
+            else:
+                entry = reader.struct_value(self.type_name, f"{self.path}.{self.prop_name}")
+        self.decoded[key] = entry
+        return entry
+
+    def encode(self, entry) -> bytes:
+        writer = FArchiveWriter(PALWORLD_CUSTOM_PROPERTIES)
+        if self.is_map:
+            writer.prop_value(self.properties['key_type'], self.key_struct_type, entry['key'])
+            writer.prop_value(self.properties['value_type'], self.value_struct_type, entry['value'])
+        else:
+            writer.struct_value(self.type_name, entry)
+        return writer.bytes()
+
+    def commit(self, keys=None):
+        """Write decoded entries back into the blob"""
+        if keys is None:
+            keys = list(self.decoded.keys())
+        self.splice({key: self.encode(self.decoded[key]) for key in keys})
+
+    def remove(self, keys):
+        if not isinstance(keys, (list, set, tuple)):
+            keys = [keys]
+        self.splice({key: None for key in keys})
+
+    def splice(self, changes):
+        """Replace entries by new encoded bytes or drop them with None, rebuild the blob once"""
+        if len(changes) == 0:
+            return
+        blob = memoryview(self.properties['value'])
+        parts = []
+        last = self.header_size
+        for start, end, key in sorted((self.offsets[key][0], self.offsets[key][1], key) for key in changes):
+            parts.append(blob[last:start])
+            if changes[key] is not None:
+                parts.append(changes[key])
+            last = end
+        parts.append(blob[last:])
+        body = b"".join(parts)
+
+        keys = []
+        offsets = {}
+        decoded = {}
+        delta = 0
+        for key in self.keys:
+            start, end = self.offsets[key]
+            if key in changes:
+                if changes[key] is None:
+                    delta -= end - start
+                    continue
+                new_start = start + delta
+                delta += len(changes[key]) - (end - start)
+                new_end = new_start + len(changes[key])
+            else:
+                new_start, new_end = start + delta, end + delta
+            new_key = key if self.is_map else len(keys)
+            keys.append(new_key)
+            offsets[new_key] = (new_start, new_end)
+            if key in self.decoded:
+                decoded[new_key] = self.decoded[key]
+
+        if self.is_map:
+            header = bytes(blob[:4]) + struct.pack("<I", len(keys))
+        else:
+            header = struct.pack("<I", len(keys)) + bytes(blob[4:self.size_offset]) + \
+                     struct.pack("<Q", len(body)) + bytes(blob[self.size_offset + 8:self.header_size])
+        blob.release()
+        self.properties['value'] = header + body
+        self.keys = keys
+        self.offsets = offsets
+        self.decoded = decoded
+
+
+class DirtyTracker:
+    """
+    Original byte range of every top-level worldSaveData property and the digest of its decoded value,
+    write() re-emits untouched properties and map / array entries from the original bytes and only
+    re-encodes the changed parts.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        # name -> (start, size_offset, end, size)
+        self.offsets = {}
+        self.digests = {}
+        # skip_decode raw value as (size, crc32), share memory sections parsed later are matched by the crc
+        self.skip_values = {}
+        self.mp_values = {}
+        self.stats = {}
+
+    def record(self, name, start, size_offset, end, size):
+        self.offsets[name] = (start, size_offset, end, size)
+
+    @staticmethod
+    def digest(value) -> Optional[bytes]:
+        try:
+            return hashlib.blake2b(msgpack.packb(value, default=encode_uuid, use_bin_type=True),
+                                   digest_size=ENTRY_DIGEST_SIZE).digest()
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    @staticmethod
+    def mp_value(prop):
+        if not isinstance(prop, dict):
+            return None
+        if isinstance(prop.get('value', None), MPMapProperty):
+            return prop['value']
+        if isinstance(prop.get('value', None), dict) and isinstance(prop['value'].get('values', None), MPArrayProperty):
+            return prop['value']['values']
+        return None
+
+    def baseline(self, name, prop):
+        """Take the decoded value as unchanged, eager decoded property keep the digest of whole value"""
+        if name not in self.offsets or isinstance(prop, LazyProperty):
+            return
+        if 'skip_type' in prop:
+            self.skip_values[name] = (len(prop['value']), zlib.crc32(prop['value']))
+            return
+        mp_value = DirtyTracker.mp_value(prop)
+        if mp_value is not None:
+            if 'custom_type' in prop:
+                mp_value.rebaseline()
+            self.mp_values[name] = weakref.ref(mp_value)
+            return
+        digest = DirtyTracker.digest(prop)
+        if digest is not None:
+            self.digests[name] = digest
+
+    def baseline_all(self, worldSaveData):
+        for name in dict.keys(worldSaveData):
+            self.baseline(name, dict.__getitem__(worldSaveData, name))
+
+    def is_original_source(self, name, mp_value):
+        """The share memory section is decoded from the original bytes"""
+        if name in self.mp_values:
+            return self.mp_values[name]() is mp_value
+        if name in self.skip_values and mp_value.source_crc is not None:
+            return self.skip_values[name] == mp_value.source_crc
+        return False
+
+    def write(self, gvas_file, custom_properties) -> bytes:
+        stream = io.BytesIO()
+        self.write_to(stream, gvas_file, custom_properties)
+        return stream.getvalue()
+
+    def write_to(self, stream, gvas_file, custom_properties):
+        """
+        Write GVAS to stream part by part, worldSaveData sections are written after all the changed sections
+        encoded because the size of worldSaveData comes first
+        """
+        self.stats = {'sections': 0, 'encoded': 0, 'entries': 0, 'encoded_entries': 0}
+        writer = FArchiveWriter(custom_properties)
+        gvas_file.header.write(writer)
+        stream.write(writer.bytes())
+        view = None
+        if self.data is not None:
+            view = self.data.getbuffer() if isinstance(self.data, io.BytesIO) else memoryview(self.data)
+        body = []
+        try:
+            for key in gvas_file.properties:
+                prop = gvas_file.properties[key]
+                if key != "worldSaveData" or prop['type'] != "StructProperty":
+                    writer = FArchiveWriter(custom_properties)
+                    writer.fstring(key)
+                    writer.property(prop)
+                    stream.write(writer.bytes())
+                    continue
+                worldSaveData = prop['value']
+                for name in list(dict.keys(worldSaveData)):
+                    body.extend(self.section_parts(view, name, dict.__getitem__(worldSaveData, name),
+                                                   custom_properties))
+                writer = FArchiveWriter(custom_properties)
+                writer.fstring("None")
+                body.append(writer.bytes())
+                writer = FArchiveWriter(custom_properties)
+                writer.fstring(key)
+                writer.fstring("StructProperty")
+                writer.u64(sum(len(part) for part in body))
+                writer.fstring(prop["struct_type"])
+                writer.guid(prop["struct_id"])
+                writer.optional_guid(prop.get("id", None))
+                stream.write(writer.bytes())
+                # release each encoded part once written
+                body.reverse()
+                while len(body) > 0:
+                    stream.write(body.pop())
+            writer = FArchiveWriter(custom_properties)
+            writer.fstring("None")
+            writer.write(gvas_file.trailer)
+            stream.write(writer.bytes())
+        finally:
+            del body
+            if view is not None:
+                view.release()
+
+    def section_parts(self, view, name, prop, custom_properties) -> list:
+        self.stats['sections'] += 1
+        if view is not None and name in self.offsets:
+            start, size_offset, end, size = self.offsets[name]
+            if isinstance(prop, LazyProperty):
+                return [view[start:end]]
+            if 'skip_type' in prop:
+                if self.skip_values.get(name, None) == (len(prop['value']), zlib.crc32(prop['value'])):
+                    return [view[start:end]]
+            else:
+                mp_value = DirtyTracker.mp_value(prop)
+                if mp_value is not None and self.is_original_source(name, mp_value):
+                    positions = mp_value.origin_positions()
+                    self.stats['entries'] += len(positions)
+                    if positions == list(range(len(mp_value.origins))):
+                        return [view[start:end]]
+                    if 'custom_type' not in prop:
+                        return self.splice_entries(view, name, prop, mp_value, positions, custom_properties)
+                elif mp_value is None and name in self.digests and DirtyTracker.digest(prop) == self.digests[name]:
+                    return [view[start:end]]
+        self.stats['encoded'] += 1
+        writer = FArchiveWriter(custom_properties)
+        writer.fstring(name)
+        writer.property(prop)
+        return [writer.bytes()]
+
+    def splice_entries(self, view, name, prop, mp_value, positions, custom_properties) -> list:
+        """Rebuild the map / array payload from original entry bytes and re-encoded changed entries"""
+        start, size_offset, end, size = self.offsets[name]
+        payload = end - size
+        data_start = end - mp_value.datasize
+        body = []
+        for pos, item in enumerate(positions):
+            if item is not None:
+                entry_start, entry_end = mp_value.source_range(item)
+                body.append(view[data_start + entry_start:data_start + entry_end])
+                continue
+            self.stats['encoded_entries'] += 1
+            writer = FArchiveWriter(custom_properties)
+            if prop['type'] == "MapProperty":
+                entry = mp_value[pos]
+                writer.prop_value(prop['key_type'], prop['key_struct_type'], entry['key'])
+                writer.prop_value(prop['value_type'], prop['value_struct_type'], entry['value'])
+            else:
+                writer.struct_value(prop['value']['type_name'], mp_value[pos])
+            body.append(writer.bytes())
+        body_size = sum(len(part) for part in body)
+        if prop['type'] == "MapProperty":
+            header = bytes(view[payload:payload + 4]) + struct.pack("<I", len(positions))
+        else:
+            # count, prop_name, prop_type, u64 size, type_name, guid, 0
+            array_size_offset = payload + 4
+            for _ in range(2):
+                (length,) = FSTRING_SIZE.unpack_from(view, array_size_offset)
+                array_size_offset += 4 + (-length * 2 if length < 0 else length)
+            header = struct.pack("<I", len(positions)) + bytes(view[payload + 4:array_size_offset]) + \
+                     struct.pack("<Q", body_size) + bytes(view[array_size_offset + 8:data_start])
+        return [view[start:size_offset], struct.pack("<Q", len(header) + body_size), view[size_offset + 8:payload],
+                header] + body
+
+
+def write_gvas_stream(gvas_file, stream, custom_properties, tracker: Optional[DirtyTracker] = None):
+    """Encode GVAS into stream, untouched parts are copied from the original bytes when tracker given"""
+    if tracker is None:
+        tracker = DirtyTracker(None)
+    tracker.write_to(stream, gvas_file, custom_properties)
+    return tracker
+
+
+SAV_COMPRESS_THREADS = os.cpu_count() or 1
+
+
+def adler32_combine(adler1, adler2, len2):
+    """adler32 of the concatenation from the adler32 of both parts, port of zlib adler32_combine"""
+    base = 65521
+    rem = len2 % base
+    sum1 = adler1 & 0xffff
+    sum2 = (rem * sum1) % base
+    sum1 += (adler2 & 0xffff) + base - 1
+    sum2 += ((adler1 >> 16) & 0xffff) + ((adler2 >> 16) & 0xffff) + base - rem
+    if sum1 >= base:
+        sum1 -= base
+    if sum1 >= base:
+        sum1 -= base
+    if sum2 >= (base << 1):
+        sum2 -= (base << 1)
+    if sum2 >= base:
+        sum2 -= base
+    return sum1 | (sum2 << 16)
+
+
+def deflate_block(block, zdict, level, last):
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.adler32(block), len(block)
+
+
+class ParallelDeflate:
+    """
+    pigz style zlib compressor with the interface of zlib.compressobj. Input is cut into blocks deflated on a
+    thread pool, each block primed with the last 32 KB of the previous block and ended by a sync flush, so the
+    raw deflate blocks concatenate into one stream, the zlib trailer is the combined adler32 of the blocks.
+    """
+    BlockSize = 1048576
+    DictSize = 32768
+
+    def __init__(self, threads, level=zlib.Z_DEFAULT_COMPRESSION):
+        self.level = level
+        self.threads = threads
+        self.pool = concurrent.futures.ThreadPoolExecutor(threads, thread_name_prefix="deflate")
+        self.pending = []
+        self.buffer = b""
+        self.zdict = b""
+        self.adler = 1
+        self.header = ParallelDeflate.zlib_header(level)
+
+    @staticmethod
+    def zlib_header(level):
+        if level == zlib.Z_DEFAULT_COMPRESSION:
+            level = 6
+        flevel = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+        cmf = 0x78
+        flg = flevel << 6
+        flg += 31 - (cmf * 256 + flg) % 31
+        return bytes([cmf, flg])
+
+    def submit(self, block, last=False):
+        self.pending.append(self.pool.submit(deflate_block, block, self.zdict, self.level, last))
+        self.zdict = bytes(block[-ParallelDeflate.DictSize:])
+
+    def collect(self, wait_all=False) -> bytes:
+        """Compressed blocks done in order, wait the oldest while too many blocks in flight"""
+        output = [self.header]
+        self.header = b""
+        while len(self.pending) > 0 and (wait_all or self.pending[0].done() or
+                                         len(self.pending) > self.threads * 2):
+            compressed, adler, size = self.pending.pop(0).result()
+            self.adler = adler32_combine(self.adler, adler, size)
+            output.append(compressed)
+        return b"".join(output)
+
+    def compress(self, data) -> bytes:
+        with memoryview(data) as view:
+            pos = 0
+            if len(self.buffer) > 0:
+                # keep the last block unsubmitted until flush, it has to be the final block
+                pos = ParallelDeflate.BlockSize - len(self.buffer)
+                if len(view) <= pos:
+                    self.buffer += bytes(view)
+                    return self.collect()
+                self.submit(self.buffer + bytes(view[:pos]))
+            while len(view) - pos > ParallelDeflate.BlockSize:
+                self.submit(bytes(view[pos:pos + ParallelDeflate.BlockSize]))
+                pos += ParallelDeflate.BlockSize
+            self.buffer = bytes(view[pos:])
+        return self.collect()
+
+    def flush(self) -> bytes:
+        self.submit(self.buffer, True)
+        self.buffer = b""
+        output = self.collect(True)
+        self.pool.shutdown()
+        return output + struct.pack(">I", self.adler)
+
+    def abort(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class SavStreamWriter:
+    """
+    File-like sink compressing GVAS into .sav on the fly, both zlib passes of save type 0x32 are streamed.
+    Written to a temp file next to the target, the header is patched and the file renamed over the target
+    when the context exits without error.
+    """
+    ChunkSize = 16 * 1048576
+
+    def __init__(self, path, save_type, threads=None):
+        self.path = path
+        self.save_type = save_type
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.file = open(self.tmp_path, "wb")
+        # uncompressed_len, compressed_len, magic and save_type are patched on close
+        self.file.write(bytes(12))
+        threads = SAV_COMPRESS_THREADS if threads is None else threads
+        self.compressor = ParallelDeflate(threads) if threads > 1 else zlib.compressobj()
+        self.outer_compressor = None
+        if save_type == 0x32:
+            self.outer_compressor = ParallelDeflate(threads) if threads > 1 else zlib.compressobj()
+        self.uncompressed_len = 0
+        self.compressed_len = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data):
+        size = len(data)
+        if size <= SavStreamWriter.ChunkSize:
+            self.compress(data)
+        else:
+            with memoryview(data) as view:
+                for pos in range(0, size, SavStreamWriter.ChunkSize):
+                    self.compress(view[pos:pos + SavStreamWriter.ChunkSize])
+        return size
+
+    def compress(self, data):
+        self.uncompressed_len += len(data)
+        self.emit(self.compressor.compress(data))
+
+    def emit(self, compressed):
+        self.compressed_len += len(compressed)
+        if self.outer_compressor is not None:
+            compressed = self.outer_compressor.compress(compressed)
+        self.file.write(compressed)
+
+    def close(self):
+        self.emit(self.compressor.flush())
+        if self.outer_compressor is not None:
+            self.file.write(self.outer_compressor.flush())
+        self.file.seek(0)
+        self.file.write(self.uncompressed_len.to_bytes(4, byteorder="little"))
+        self.file.write(self.compressed_len.to_bytes(4, byteorder="little"))
+        self.file.write(MAGIC_BYTES)
+        self.file.write(bytes([self.save_type]))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if os.path.exists(self.path):
+            shutil.copymode(self.path, self.tmp_path)
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        for compressor in [self.compressor, self.outer_compressor]:
+            if isinstance(compressor, ParallelDeflate):
+                compressor.abort()
+        self.file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+BACKUP_CHUNK_MIN_SIZE = 16384
+BACKUP_CHUNK_MAX_SIZE = 262144
+BACKUP_CHUNK_MASK = 0xff
+BACKUP_CHUNK_ANCHOR = b"None\x00"
+BACKUP_CHUNK_WINDOW = 64
+
+
+def content_chunks(blocks, min_size=BACKUP_CHUNK_MIN_SIZE, max_size=BACKUP_CHUNK_MAX_SIZE, mask=BACKUP_CHUNK_MASK):
+    """
+    Content defined chunking of an iterable of byte blocks, cut points only depend on the bytes before them
+    so an inserted or deleted entry only changes the chunks around it.
+    Candidate cuts are the ends of the GVAS struct terminator fstring "None", a candidate becomes a cut when
+    the crc32 of the window before it matches the mask, chunks without a cut are split at max_size.
+    """
+    buffer = bytearray()
+    scan = min_size
+    for block in blocks:
+        buffer += block
+        start = 0
+        while True:
+            limit = start + max_size
+            cut = None
+            while True:
+                pos = buffer.find(BACKUP_CHUNK_ANCHOR, scan, min(limit, len(buffer)))
+                if pos < 0:
+                    break
+                end = pos + len(BACKUP_CHUNK_ANCHOR)
+                if zlib.crc32(buffer[end - BACKUP_CHUNK_WINDOW:end]) & mask == 0:
+                    cut = end
+                    break
+                scan = pos + 1
+            if cut is None:
+                if len(buffer) < limit:
+                    # anchor may straddle the next block
+                    scan = max(scan, len(buffer) - len(BACKUP_CHUNK_ANCHOR) + 1)
+                    break
+                cut = limit
+            yield bytes(buffer[start:cut])
+            start = cut
+            scan = start + min_size
+        del buffer[:start]
+        scan -= start
+    if buffer:
+        yield bytes(buffer)
+
+
+class BackupStore:
+    """
+    Content addressed backup store under backup/store, files are split by content_chunks and each chunk is
+    stored once zlib compressed as chunks/<xx>/<digest>. Sav files are chunked on the decompressed GVAS,
+    the compressed stream changes after the first modified byte and would not deduplicate.
+    A backup is a JSON manifest snapshots/<name>.json listing the chunks of each file.
+    Jobs run on one background thread, in submit order.
+    Restored Sav files are compressed again, the GVAS inside is identical but not the compressed bytes.
+    """
+    _instances = {}
+
+    @staticmethod
+    def get(root) -> "BackupStore":
+        root = os.path.abspath(root)
+        if root not in BackupStore._instances:
+            BackupStore._instances[root] = BackupStore(root)
+        return BackupStore._instances[root]
+
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.snapshot_dir = os.path.join(root, "snapshots")
+        self.pending_dir = os.path.join(root, "pending")
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+        self.known_chunks = None
+        self.pinned = 0
+
+    @staticmethod
+    def chunk_digest(chunk):
+        return hashlib.blake2b(chunk, digest_size=20).hexdigest()
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def load_known_chunks(self):
+        self.known_chunks = set()
+        if os.path.exists(self.chunk_dir):
+            for sub_dir in os.scandir(self.chunk_dir):
+                if sub_dir.is_dir():
+                    self.known_chunks.update(entry.name for entry in os.scandir(sub_dir.path)
+                                             if not entry.name.endswith(".tmp"))
+
+    @staticmethod
+    def write_atomic(path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put_chunks(self, blocks, stats):
+        """Store the new chunks of blocks, return (digest list, total size, content blake2b)"""
+        if self.known_chunks is None:
+            self.load_known_chunks()
+        digests = []
+        size = 0
+        content_hash = hashlib.blake2b(digest_size=20)
+        for chunk in content_chunks(blocks):
+            digest = BackupStore.chunk_digest(chunk)
+            digests.append(digest)
+            size += len(chunk)
+            content_hash.update(chunk)
+            if digest in self.known_chunks:
+                continue
+            os.makedirs(os.path.dirname(self.chunk_path(digest)), exist_ok=True)
+            compressed = zlib.compress(chunk, 6)
+            BackupStore.write_atomic(self.chunk_path(digest), compressed)
+            self.known_chunks.add(digest)
+            stats['new_chunks'] += 1
+            stats['stored'] += len(compressed)
+        stats['chunks'] += len(digests)
+        return digests, size, content_hash.hexdigest()
+
+    def get_chunks(self, digests):
+        for digest in digests:
+            with open(self.chunk_path(digest), "rb") as f:
+                chunk = zlib.decompress(f.read())
+            if BackupStore.chunk_digest(chunk) != digest:
+                raise Exception(f"backup chunk {digest} is corrupted")
+            yield chunk
+
+    def manifest_path(self, name):
+        return os.path.join(self.snapshot_dir, f"{name}.json")
+
+    def load_manifest(self, name):
+        with open(self.manifest_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def names(self):
+        if not os.path.exists(self.snapshot_dir):
+            return []
+        return sorted(filename[:-5] for filename in os.listdir(self.snapshot_dir) if filename.endswith(".json"))
+
+    def pin(self, path):
+        """
+        Hard link path under pending/ before it gets replaced, the link keeps the old content for a queued
+        backup without reading it now. Copied when the file system has no hard links.
+        """
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self.pinned += 1
+        pinned_path = os.path.join(self.pending_dir, f"{os.getpid()}.{self.pinned}.{os.path.basename(path)}")
+        try:
+            os.link(path, pinned_path)
+        except OSError:
+            shutil.copyfile(path, pinned_path)
+        return pinned_path
+
+    def unpin(self, pinned_path):
+        try:
+            os.unlink(pinned_path)
+        except OSError:
+            pass
+
+    def submit(self, name, arcname, data, mtime=None, log_text=None) -> concurrent.futures.Future:
+        """
+        Queue data, the bytes of a file or the path returned by pin, as arcname of backup name,
+        log_text replaces the log.txt of the backup.
+        """
+        return self.executor.submit(self.backup, name, arcname, data, mtime, log_text)
+
+    def backup(self, name, arcname, data, mtime=None, log_text=None):
+        if isinstance(data, str):
+            with open(data, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return self.backup(name, arcname, b"", mtime, log_text)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self.backup(name, arcname, mm, mtime, log_text)
+        stats = {'chunks': 0, 'new_chunks': 0, 'stored': 0, 'size': len(data)}
+        t1 = time.time()
+        entry = self.put_file(data, stats)
+        entry['mtime'] = mtime
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        manifest = {'name': name, 'time': time.time(), 'files': {}, 'stored': 0}
+        if os.path.exists(self.manifest_path(name)):
+            manifest = self.load_manifest(name)
+        manifest['files'][arcname] = entry
+        if log_text is not None:
+            manifest['files']['log.txt'] = self.put_file(log_text.encode("utf-8"), stats, False)
+        manifest['time'] = time.time()
+        manifest['stored'] += stats['stored']
+        BackupStore.write_atomic(self.manifest_path(name), json.dumps(manifest, indent=1).encode("utf-8"))
+        stats['time'] = time.time() - t1
+        return stats
+
+    def put_file(self, data, stats, is_sav=None):
+        """Store data, bytes or an mmap, streamed in SAV_STREAM_CHUNK_SIZE blocks, return its manifest entry"""
+        if is_sav is not False and data[8:11] == SAV_MAGIC_BYTES:
+            try:
+                save_type = data[11]
+                with memoryview(data) as view:
+                    blocks = _inflate_stream(view[pos:pos + SAV_STREAM_CHUNK_SIZE]
+                                             for pos in range(12, len(data), SAV_STREAM_CHUNK_SIZE))
+                    if save_type == 0x32:
+                        blocks = _inflate_stream(blocks)
+                    digests, size, content_hash = self.put_chunks(blocks, stats)
+                if size == int.from_bytes(data[0:4], byteorder="little"):
+                    return {'format': 'sav', 'save_type': save_type, 'size': size, 'hash': content_hash,
+                            'chunks': digests}
+            except Exception as e:
+                log.error(f"{tcl(31)}Backup Sav decompress failed, store raw file -> {type(e)}: {str(e)}{tcl(0)}")
+        with memoryview(data) as view:
+            digests, size, content_hash = self.put_chunks(
+                (view[pos:pos + SAV_STREAM_CHUNK_SIZE] for pos in range(0, len(data), SAV_STREAM_CHUNK_SIZE)), stats)
+        return {'format': 'raw', 'size': size, 'hash': content_hash, 'chunks': digests}
+
+    def stored_size(self):
+        size = 0
+        if os.path.exists(self.chunk_dir):
+            for sub_dir in os.scandir(self.chunk_dir):
+                if sub_dir.is_dir():
+                    size += sum(entry.stat().st_size for entry in os.scandir(sub_dir.path))
+        return size
+
+    def verify_blocks(self, entry):
+        content_hash = hashlib.blake2b(digest_size=20)
+        size = 0
+        for chunk in self.get_chunks(entry['chunks']):
+            content_hash.update(chunk)
+            size += len(chunk)
+            yield chunk
+        if size != entry['size'] or content_hash.hexdigest() != entry['hash']:
+            raise Exception("restored content does not match the backup")
+
+    def restore_file(self, entry, path, threads=None):
+        """
+        Rebuild one manifest entry to path, Sav files are compressed again from the GVAS chunks so the file
+        loads the same but is not byte identical to the one backed up
+        """
+        if entry['format'] == 'sav':
+            with SavStreamWriter(path, entry['save_type'], threads) as f:
+                for chunk in self.verify_blocks(entry):
+                    f.write(chunk)
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in self.verify_blocks(entry):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def restore(self, name, target_dir, files=None, threads=None):
+        manifest = self.load_manifest(name)
+        restored = []
+        for arcname, entry in manifest['files'].items():
+            if files is not None and arcname not in files:
+                continue
+            path = os.path.join(target_dir, arcname)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.restore_file(entry, path, threads)
+            restored.append(path)
+        return restored
+
+    def wait(self):
+        """Block until all queued backups are written"""
+        self.executor.submit(lambda: None).result()
+
+
+DELTA_MAGIC = b"PLD1"
+DELTA_HEADER = struct.Struct("<4sQ")
+DELTA_OP = struct.Struct("<cQQ")
+DELTA_COMPARE_BLOCK = 4096
+
+
+def common_prefix_size(a, b):
+    size = min(len(a), len(b))
+    lo = 0
+    while lo + DELTA_COMPARE_BLOCK <= size and a[lo:lo + DELTA_COMPARE_BLOCK] == b[lo:lo + DELTA_COMPARE_BLOCK]:
+        lo += DELTA_COMPARE_BLOCK
+    hi = min(lo + DELTA_COMPARE_BLOCK, size)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix_size(a, b):
+    size = min(len(a), len(b))
+    a_end = len(a)
+    b_end = len(b)
+    lo = 0
+    while lo + DELTA_COMPARE_BLOCK <= size and \
+            a[a_end - lo - DELTA_COMPARE_BLOCK:a_end - lo] == b[b_end - lo - DELTA_COMPARE_BLOCK:b_end - lo]:
+        lo += DELTA_COMPARE_BLOCK
+    hi = min(lo + DELTA_COMPARE_BLOCK, size)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[a_end - mid:a_end - lo] == b[b_end - mid:b_end - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def gvas_delta_ops(old, new, old_chunks, new_chunks):
+    """
+    Copy / insert operations rebuilding new from old.
+    Chunks of new found in old are copied, each unmatched region is narrowed to the bytes that differ
+    from the old bytes between the surrounding copies, so an entry edit costs about the entry size.
+
+    :param old_chunks: [(digest, size)] of old from content_chunks
+    :param new_chunks: [(digest, size)] of new from content_chunks
+    :return: list of (b"C", old offset, size) and (b"I", new offset, size)
+    """
+    index = {}
+    pos = 0
+    for digest, size in old_chunks:
+        index.setdefault(digest, pos)
+        pos += size
+    ops = []
+
+    def emit(op, offset, size):
+        if size == 0:
+            return
+        if ops and ops[-1][0] == op and ops[-1][1] + ops[-1][2] == offset:
+            ops[-1][2] += size
+        else:
+            ops.append([op, offset, size])
+
+    def emit_gap(old_start, old_end, new_start, new_end):
+        old_gap = old[old_start:old_end] if old_start < old_end else b""
+        new_gap = new[new_start:new_end]
+        prefix = common_prefix_size(old_gap, new_gap)
+        suffix = common_suffix_size(old_gap[prefix:], new_gap[prefix:])
+        emit(b"C", old_start, prefix)
+        emit(b"I", new_start + prefix, new_end - new_start - prefix - suffix)
+        emit(b"C", old_end - suffix, suffix)
+
+    old_pos = 0
+    pending = None
+    pos = 0
+    for digest, size in new_chunks:
+        offset = index.get(digest)
+        if offset is None:
+            if pending is None:
+                pending = pos
+        else:
+            if pending is not None:
+                emit_gap(old_pos, offset, pending, pos)
+                pending = None
+            emit(b"C", offset, size)
+            old_pos = offset + size
+        pos += size
+    if pending is not None:
+        emit_gap(old_pos, len(old), pending, pos)
+    return [tuple(op) for op in ops]
+
+
+class _BlockReader:
+    """File like reads over an iterable of byte blocks, e.g. _inflate_stream"""
+
+    def __init__(self, blocks):
+        self.blocks = iter(blocks)
+        self.block = memoryview(b"")
+        self.pos = 0
+
+    def readinto(self, view):
+        filled = 0
+        while filled < len(view):
+            if self.pos >= len(self.block):
+                self.block = memoryview(next(self.blocks, b""))
+                self.pos = 0
+                if len(self.block) == 0:
+                    break
+            size = min(len(view) - filled, len(self.block) - self.pos)
+            view[filled:filled + size] = self.block[self.pos:self.pos + size]
+            self.pos += size
+            filled += size
+        return filled
+
+    def read(self, size):
+        buffer = bytearray(size)
+        return bytes(buffer[:self.readinto(memoryview(buffer))])
+
+
+def apply_gvas_delta(base, delta, output):
+    """
+    Rebuild the GVAS of delta from base into output, return the size
+    delta: the decompressed delta file, or a _BlockReader streaming it
+    """
+    if not isinstance(delta, _BlockReader):
+        delta = _BlockReader([delta])
+    header = delta.read(DELTA_HEADER.size)
+    if len(header) != DELTA_HEADER.size:
+        raise Exception("truncated snapshot delta")
+    magic, size = DELTA_HEADER.unpack(header)
+    if magic != DELTA_MAGIC:
+        raise Exception(f"not a snapshot delta, found {magic!r}")
+    out_pos = 0
+    with memoryview(base) as base_view, memoryview(output) as out_view:
+        while True:
+            op_bytes = delta.read(DELTA_OP.size)
+            if len(op_bytes) == 0:
+                break
+            if len(op_bytes) != DELTA_OP.size:
+                raise Exception("truncated snapshot delta")
+            op, offset, length = DELTA_OP.unpack(op_bytes)
+            if out_pos + length > len(out_view):
+                raise Exception(f"incorrect delta size: more than {size}")
+            if op == b"C":
+                out_view[out_pos:out_pos + length] = base_view[offset:offset + length]
+            elif op == b"I":
+                if delta.readinto(out_view[out_pos:out_pos + length]) != length:
+                    raise Exception("truncated snapshot delta")
+            else:
+                raise Exception(f"unknown delta operation {op!r}")
+            out_pos += length
+    if out_pos != size:
+        raise Exception(f"incorrect delta size: {out_pos} != {size}")
+    return size
+
+
+class SnapshotChain:
+    """
+    History of one save file under backup/chain/<file name>, each version is stored as a binary delta
+    against the previous decompressed GVAS (<name>.delta) with a full keyframe (<name>.key) every
+    keyframe_interval versions or when the delta is no longer small.
+    index.json lists the versions and the content_chunks of the newest one for the next delta.
+    """
+    KeyframeInterval = 16
+
+    def __init__(self, root, keyframe_interval=None):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.keyframe_interval = SnapshotChain.KeyframeInterval if keyframe_interval is None else keyframe_interval
+        self.index = {'entries': [], 'head_chunks': []}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        # newest GVAS kept after add() for the next delta of a watch loop
+        self.head = None
+
+    @staticmethod
+    def for_file(filename):
+        filename = os.path.abspath(filename)
+        return SnapshotChain(os.path.join(os.path.dirname(filename), "backup", "chain", os.path.basename(filename)))
+
+    @staticmethod
+    def is_entry_file(filename):
+        return (filename.endswith(".key") or filename.endswith(".delta")) and \
+            os.path.exists(os.path.join(os.path.dirname(os.path.abspath(filename)), "index.json"))
+
+    @staticmethod
+    def open_entry_file(filename) -> tuple[mmap.mmap, int]:
+        """Materialize the version of a .key / .delta file path, same result as decompress_sav_to_mmap"""
+        filename = os.path.abspath(filename)
+        chain = SnapshotChain(os.path.dirname(filename))
+        return chain.materialize(os.path.splitext(os.path.basename(filename))[0])
+
+    def entry(self, name):
+        for entry in self.index['entries']:
+            if entry['name'] == name:
+                return entry
+        raise KeyError(f"snapshot {name} not found in {self.root}")
+
+    def entry_path(self, entry):
+        return os.path.join(self.root, "%s.%s" % (entry['name'], entry['kind']))
+
+    def save_index(self):
+        BackupStore.write_atomic(self.index_path, json.dumps(self.index, indent=1).encode("utf-8"))
+
+    @staticmethod
+    def gvas_hash(raw_gvas):
+        return hashlib.blake2b(raw_gvas, digest_size=20).hexdigest()
+
+    @staticmethod
+    def gvas_chunks(raw_gvas):
+        with memoryview(raw_gvas) as view:
+            blocks = (view[pos:pos + SAV_STREAM_CHUNK_SIZE] for pos in range(0, len(raw_gvas), SAV_STREAM_CHUNK_SIZE))
+            return [(BackupStore.chunk_digest(chunk), len(chunk)) for chunk in content_chunks(blocks)]
+
+    def add(self, raw_gvas, save_type, name, mtime=None):
+        """Append raw_gvas as version name, return the new entry or None when unchanged"""
+        entries = self.index['entries']
+        content_hash = SnapshotChain.gvas_hash(raw_gvas)
+        if entries and entries[-1]['hash'] == content_hash:
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        if any(entry['name'] == name for entry in entries):
+            name = "%s-%d" % (name, len(entries))
+        chunks = SnapshotChain.gvas_chunks(raw_gvas)
+        entry = {'name': name, 'time': time.time(), 'mtime': mtime, 'save_type': save_type, 'size': len(raw_gvas),
+                 'hash': content_hash}
+        since_key = 0
+        for prev in reversed(entries):
+            if prev['kind'] == 'key':
+                break
+            since_key += 1
+        if entries and since_key + 1 < self.keyframe_interval:
+            materialized = None
+            if self.head is not None and self.head[0] == entries[-1]['hash']:
+                base = self.head[1]
+            else:
+                base = materialized = self.materialize(entries[-1]['name'])[0]
+            try:
+                ops = gvas_delta_ops(base, raw_gvas, [tuple(c) for c in self.index['head_chunks']], chunks)
+            finally:
+                if materialized is not None:
+                    materialized.close()
+            entry['kind'] = 'delta'
+            entry['base'] = entries[-1]['name']
+            entry['stored'] = self.write_delta(self.entry_path(entry), raw_gvas, ops)
+            last_key = next(prev for prev in reversed(entries) if prev['kind'] == 'key')
+            if entry['stored'] > last_key['stored'] // 2:
+                # most of the save changed, a keyframe is cheaper to read back
+                os.unlink(self.entry_path(entry))
+                del entry['base']
+                entry['kind'] = 'key'
+        if entry.get('kind', 'key') == 'key':
+            entry['kind'] = 'key'
+            entry['stored'] = self.write_key(self.entry_path(entry), raw_gvas)
+        entries.append(entry)
+        self.index['head_chunks'] = chunks
+        self.save_index()
+        self.head = (content_hash, raw_gvas)
+        return entry
+
+    @staticmethod
+    def write_key(path, raw_gvas):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        compressor = zlib.compressobj(6)
+        with open(tmp_path, "wb") as f:
+            with memoryview(raw_gvas) as view:
+                for pos in range(0, len(raw_gvas), SAV_STREAM_CHUNK_SIZE):
+                    f.write(compressor.compress(view[pos:pos + SAV_STREAM_CHUNK_SIZE]))
+            f.write(compressor.flush())
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    @staticmethod
+    def write_delta(path, raw_gvas, ops):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        compressor = zlib.compressobj(6)
+        with open(tmp_path, "wb") as f, memoryview(raw_gvas) as view:
+            f.write(compressor.compress(DELTA_HEADER.pack(DELTA_MAGIC, len(raw_gvas))))
+            for op, offset, size in ops:
+                f.write(compressor.compress(DELTA_OP.pack(op, offset if op == b"C" else 0, size)))
+                if op == b"I":
+                    f.write(compressor.compress(view[offset:offset + size]))
+            f.write(compressor.flush())
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def materialize(self, name) -> tuple[mmap.mmap, int]:
+        """
+        Rebuild the GVAS of version name from its keyframe and the deltas after it,
+        the stored files are inflated chunk by chunk, at most the base and the output version are in memory
+        """
+        entries = self.index['entries']
+        target = entries.index(self.entry(name))
+        first = target
+        while entries[first]['kind'] != 'key':
+            first -= 1
+        raw_gvas = None
+        for entry in entries[first:target + 1]:
+            output = mmap.mmap(-1, max(entry['size'], 1))
+            try:
+                with open(self.entry_path(entry), "rb") as f:
+                    stored = _inflate_stream(iter(lambda: f.read(SAV_STREAM_CHUNK_SIZE), b""))
+                    if entry['kind'] == 'key':
+                        written = 0
+                        for block in stored:
+                            if written + len(block) > entry['size']:
+                                raise Exception(f"incorrect keyframe size: more than {entry['size']}")
+                            output.write(block)
+                            written += len(block)
+                        if written != entry['size']:
+                            raise Exception(f"incorrect keyframe size: {written} != {entry['size']}")
+                        output.seek(0)
+                    else:
+                        apply_gvas_delta(raw_gvas, _BlockReader(stored), output)
+            except Exception:
+                output.close()
+                if raw_gvas is not None:
+                    raw_gvas.close()
+                raise
+            if raw_gvas is not None:
+                raw_gvas.close()
+            raw_gvas = output
+        with memoryview(raw_gvas) as view:
+            content_hash = SnapshotChain.gvas_hash(view[:entries[target]['size']])
+        if content_hash != entries[target]['hash']:
+            raw_gvas.close()
+            raise Exception(f"snapshot {name} does not match its hash")
+        return raw_gvas, entries[target]['save_type']
+
+
 class MPProgressReader:
     def __init__(self, proc):
         self.mp_ctx = {}
@@ -1590,13 +4932,15 @@ def BatchParseItem(_worldSaveData, skip_paths, recursive=True, progress=None, us
                                                                                           _worldSaveData[mp_path[15:]][
                                                                                               'type'], -1, mp_path)
                     _worldSaveData[mp_path[15:]]["custom_type"] = mp_path
-            print("Loading %s in %.2fs, extra parse %.2fs" % (mp_path, t3, time.time() - t2 - t3))
+            print("Loading %s in %.2fs, extra parse %.2fs, dispatch overhead %.1fms" % (
+                mp_path, t3, time.time() - t2 - t3, 1000 * mp[mp_path].dispatch_time))
             del mp[mp_path]
             break
         if len(mp.keys()) - s == 0:
             time.sleep(0.01)
     if parsed > 0:
         print("Parse skipped data in %.2fs" % (time.time() - t2))
+        DecodeWorkerPool.print_stats()
 
 
 # ArrayProperty: -> .Value
@@ -30,21 +30,22 @@ def MigrateBaseCamp(base_id, group_id, dry_run=False):
     base_idx = orig_group_info['base_ids'].index(base_id)
     base_map_id = orig_group_info['map_object_instance_ids_base_camp_points'][base_idx]
 
-    refMapObject = FindReferenceMapObject(base_map_id)
-    for map_id in refMapObject['MapObject']:
+    for map_id in list(MappingCache.MapObjectClusters.Reachable(base_map_id)):
         mapObject = parse_item(MappingCache.MapObjectSaveData[map_id], "MapObjectSaveData")
         orig_map_group_belong = mapObject['Model']['value']['RawData']['value']['group_id_belong_to']
         if orig_map_group_belong == PalObject.EmptyUUID:
             continue
         log.info(f"Migrate MapObject {map_id} from {orig_map_group_belong} to {group_id}")
         if not dry_run:
-            mapObject['Model']['value']['RawData']['value']['group_id_belong_to'] = group_id
+            with MappingCache.Updating('MapObjectSaveData', mapObject):
+                mapObject['Model']['value']['RawData']['value']['group_id_belong_to'] = group_id
 
-    for idx, ind_id in enumerate(orig_group_info['individual_character_handle_ids']):
-        if ind_id['instance_id'] in instance_ids:
-            if not dry_run:
-                orig_group_info['individual_character_handle_ids'].pop(idx)
-            log.info(f"Migrate WorkDirector {ind_id['instance_id']} from {orig_group_id} to {group_id}")
+    with MappingCache.Updating('GroupSaveDataMap', orig_group_data):
+        for idx, ind_id in enumerate(orig_group_info['individual_character_handle_ids']):
+            if ind_id['instance_id'] in instance_ids:
+                if not dry_run:
+                    orig_group_info['individual_character_handle_ids'].pop(idx)
+                log.info(f"Migrate WorkDirector {ind_id['instance_id']} from {orig_group_id} to {group_id}")
 
     group_data = parse_item(MappingCache.GroupSaveDataMap[toUUID(group_id)], "GroupSaveDataMap")
     group_info = group_data['value']['RawData']['value']
@@ -53,15 +54,19 @@ def MigrateBaseCamp(base_id, group_id, dry_run=False):
         character = MappingCache.CharacterSaveParameterMap[instanceId]
         log.info(f"Migrate Character {instanceId} from {character['value']['RawData']['value']['group_id']} to {group_id}")
         if not dry_run:
-            character['value']['RawData']['value']['group_id'] = group_id
+            with MappingCache.Updating('CharacterSaveParameterMap', character):
+                character['value']['RawData']['value']['group_id'] = group_id
 
     if not dry_run:
-        orig_group_info['base_ids'].pop(base_idx)
-        orig_group_info['map_object_instance_ids_base_camp_points'].pop(base_idx)
-        group_info['base_ids'].append(base_id)
-        group_info['map_object_instance_ids_base_camp_points'].append(base_map_id)
-        group_info['individual_character_handle_ids'] += instances
-        basecamp['value']['RawData']['value']['group_id_belong_to'] = group_id
+        with MappingCache.Updating('GroupSaveDataMap', orig_group_data):
+            orig_group_info['base_ids'].pop(base_idx)
+            orig_group_info['map_object_instance_ids_base_camp_points'].pop(base_idx)
+        with MappingCache.Updating('GroupSaveDataMap', group_data):
+            group_info['base_ids'].append(base_id)
+            group_info['map_object_instance_ids_base_camp_points'].append(base_map_id)
+            group_info['individual_character_handle_ids'] += instances
+        with MappingCache.Updating('BaseCampSaveData', basecamp):
+            basecamp['value']['RawData']['value']['group_id_belong_to'] = group_id
 
 
 def MigrateBaseCampBuilder(base_id, player_uid):
@@ -79,8 +84,7 @@ def MigrateBaseCampBuilder(base_id, player_uid):
     base_idx = group_info['base_ids'].index(base_id)
     map_id = group_info['map_object_instance_ids_base_camp_points'][base_idx]
 
-    refMapObject = FindReferenceMapObject(map_id)
-    for map_id in refMapObject['MapObject']:
+    for map_id in list(MappingCache.MapObjectClusters.Reachable(map_id)):
         mapObject = parse_item(MappingCache.MapObjectSaveData[map_id], "MapObjectSaveData")
         orig_builder = mapObject['Model']['value']['RawData']['value']['build_player_uid']
         base_camp_id_belong_to = mapObject['Model']['value']['RawData']['value']['base_camp_id_belong_to']
@@ -100,12 +104,11 @@ def MoveCharacterContainer(instanceId, new_container_id):
 
     emptySlot = None
     emptySlotIndex = None
-    characterContainer = parse_item(MappingCache.CharacterContainerSaveData[new_container_id], "CharacterContainerSaveData")
-    for slotIndex, slotItem in enumerate(characterContainer['value']['Slots']['value']['values']):
+    targetContainer = parse_item(MappingCache.CharacterContainerSaveData[new_container_id], "CharacterContainerSaveData")
+    for slotIndex, slotItem in enumerate(targetContainer['value']['Slots']['value']['values']):
         if slotItem['RawData']['value']['instance_id'] in [instanceId, PalObject.EmptyUUID]:
             emptySlotIndex = slotIndex
             emptySlot = slotItem
-            slotItem['RawData']['value']['instance_id'] = instanceId
             break
     if emptySlot is None:
         raise ValueError(f"Target Container {new_container_id} no empty slot")
@@ -113,18 +116,21 @@ def MoveCharacterContainer(instanceId, new_container_id):
     if characterContainerId in MappingCache.CharacterContainerSaveData:
         characterContainer = parse_item(MappingCache.CharacterContainerSaveData[characterContainerId], "CharacterContainerSaveData")
         for slotItem in characterContainer['value']['Slots']['value']['values']:
-            if slotItem['RawData']['value']['instance_id'] == instanceId:
+            if slotItem['RawData']['value']['instance_id'] == instanceId and slotItem is not emptySlot:
                 emptySlot['PermissionTribeID']['value']['value'] = slotItem['PermissionTribeID']['value']['value']
                 slotItem['PermissionTribeID']['value']['value'] = "EPalTribeID::None"
-                slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
+                with MappingCache.Updating('CharacterContainerSaveData', characterContainer):
+                    slotItem['RawData']['value']['instance_id'] = PalObject.EmptyUUID
                 log.info(
                     f"Delete Character {instanceId} from CharacterContainer {characterData['SlotID']['value']['ContainerId']['value']['ID']['value']}")
                 break
     else:
         log.warning(f"Source Container {new_container_id} not in save")
-    characterData['SlotID']['value']['ContainerId']['value']['ID']['value'] = new_container_id
+    with MappingCache.Updating('CharacterSaveParameterMap', character):
+        characterData['SlotID']['value']['ContainerId']['value']['ID']['value'] = new_container_id
     characterData['SlotID']['value']['SlotIndex']['value'] = emptySlotIndex
-    emptySlot['RawData']['value']['instance_id'] = instanceId
+    with MappingCache.Updating('CharacterContainerSaveData', targetContainer):
+        emptySlot['RawData']['value']['instance_id'] = instanceId
     log.info(
         f"Migrate Character {instanceId} to CharacterContainer {new_container_id} -> {emptySlotIndex}")
 
@@ -0,0 +1,74 @@
+import pytest
+from palworld_save_tools.gvas import GvasFile, GvasHeader
+
+from palworld_server_toolkit.palobject import PALWORLD_CUSTOM_PROPERTIES, PalObject
+
+
+def uid(i):
+    return PalObject.toUUID("%08x-0000-0000-0000-%012x" % (i, i))
+
+
+def item_container(i, slots=3):
+    return {'key': {'ID': PalObject.Guid(uid(i))},
+            'value': {'BelongInfo': PalObject.PalItemContainerBelongInfo(uid(0)),
+                      'Slots': PalObject.ArrayStructProperty('Slots', 'PalItemSlotSaveData', [
+                          {'SlotIndex': PalObject.IntProperty(n), 'StackCount': PalObject.IntProperty(n * i)}
+                          for n in range(slots)])}}
+
+
+def gvas_header(save_game_class_name):
+    header = GvasHeader()
+    header.magic = 0x53415647
+    header.save_game_version = 3
+    header.package_file_version_ue4 = 522
+    header.package_file_version_ue5 = 1009
+    header.engine_version_major = 5
+    header.engine_version_minor = 1
+    header.engine_version_patch = 1
+    header.engine_version_changelist = 0
+    header.engine_version_branch = "++UE5+Release-5.1"
+    header.custom_version_format = 3
+    header.custom_versions = []
+    header.save_game_class_name = save_game_class_name
+    return header
+
+
+@pytest.fixture
+def make_gvas():
+    """Encode properties to raw GVAS with the header of a save_game_class_name save"""
+
+    def make(properties, save_game_class_name="/Script/Pal.PalWorldSaveGame"):
+        gvas_file = GvasFile()
+        gvas_file.header = gvas_header(save_game_class_name)
+        gvas_file.properties = properties
+        gvas_file.trailer = b"\x00\x00\x00\x00"
+        return gvas_file.write(PALWORLD_CUSTOM_PROPERTIES)
+
+    return make
+
+
+@pytest.fixture
+def make_world_gvas(make_gvas):
+    """Build the raw GVAS of a small Level.sav with n_items item containers and an n_entries map"""
+
+    def make(n_items=50, n_entries=2000):
+        wsd = {
+            'GameTimeSaveData': {'id': None, 'type': 'StructProperty', 'struct_type': 'PalGameTimeSaveData',
+                                 'struct_id': PalObject.EmptyUUID, 'value': {
+                    'GameDateTimeTicks': {'id': None, 'type': 'Int64Property', 'value': 123},
+                    'RealDateTimeTicks': {'id': None, 'type': 'Int64Property', 'value': 456}}},
+            'ItemContainerSaveData': {'id': None, 'type': 'MapProperty', 'key_type': 'StructProperty',
+                                      'value_type': 'StructProperty', 'key_struct_type': 'StructProperty',
+                                      'value_struct_type': 'StructProperty',
+                                      'value': [item_container(i) for i in range(1, n_items + 1)]},
+            'TestMap': {'id': None, 'type': 'MapProperty', 'key_type': 'IntProperty', 'value_type': 'StructProperty',
+                        'key_struct_type': None, 'value_struct_type': 'StructProperty',
+                        'value': [{'key': i, 'value': {'Name': PalObject.StrProperty('n%030d' % i),
+                                                       'Value': PalObject.IntProperty(i * 2)}}
+                                  for i in range(n_entries)]},
+            'Name': PalObject.StrProperty("world"),
+        }
+        return make_gvas({'worldSaveData': {'id': None, 'type': 'StructProperty', 'struct_type': 'PalWorldSaveData',
+                                            'struct_id': PalObject.EmptyUUID, 'value': wsd}})
+
+    return make
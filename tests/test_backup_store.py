@@ -0,0 +1,59 @@
+import os
+import random
+
+from palworld_save_tools.palsav import compress_gvas_to_sav, decompress_sav_to_gvas
+
+from palworld_server_toolkit.palobject import BackupStore
+
+
+def gvas_like(seed, entries=4000):
+    rnd = random.Random(seed)
+    return b"".join(b"Entry%08d" % i + rnd.randbytes(rnd.randrange(16, 96)) + b"None\x00" for i in range(entries))
+
+
+def backup_path(store, tmp_path, name, arcname, data):
+    path = tmp_path / os.path.basename(arcname)
+    path.write_bytes(data)
+    pinned_path = store.pin(str(path))
+    # the save replaces the file right after the backup is queued
+    replaced = tmp_path / "replacing.tmp"
+    replaced.write_bytes(b"replaced")
+    os.replace(replaced, path)
+    job = store.submit(name, arcname, pinned_path, 1.0, "log")
+    store.executor.submit(store.unpin, pinned_path)
+    return job.result()
+
+
+def test_sav_round_trip_keeps_the_gvas(tmp_path):
+    store = BackupStore(str(tmp_path / "store"))
+    raw_gvas = gvas_like(1)
+    backup_path(store, tmp_path, "b1", "Level.sav", compress_gvas_to_sav(raw_gvas, 0x32))
+    store.wait()
+    assert os.listdir(store.pending_dir) == []
+    entry = store.load_manifest("b1")['files']['Level.sav']
+    assert entry['format'] == 'sav' and entry['size'] == len(raw_gvas)
+    restored = store.restore("b1", str(tmp_path / "restore"))
+    assert len(restored) == 2
+    with open(tmp_path / "restore" / "Level.sav", "rb") as f:
+        assert decompress_sav_to_gvas(f.read()) == (raw_gvas, 0x32)
+
+
+def test_raw_round_trip_deduplicates(tmp_path):
+    store = BackupStore(str(tmp_path / "store"))
+    data = gvas_like(2)
+    first = backup_path(store, tmp_path, "b1", "Players/a.bin", data)
+    changed = bytearray(data)
+    changed[len(data) // 2:len(data) // 2] = b"inserted"
+    second = backup_path(store, tmp_path, "b2", "Players/a.bin", bytes(changed))
+    assert first['new_chunks'] > 10
+    assert second['new_chunks'] <= 3
+    store.restore("b2", str(tmp_path / "restore"))
+    assert (tmp_path / "restore" / "Players" / "a.bin").read_bytes() == bytes(changed)
+    assert (tmp_path / "restore" / "log.txt").read_text() == "log"
+
+
+def test_empty_file(tmp_path):
+    store = BackupStore(str(tmp_path / "store"))
+    backup_path(store, tmp_path, "b1", "empty.bin", b"")
+    store.restore("b1", str(tmp_path / "restore"))
+    assert (tmp_path / "restore" / "empty.bin").read_bytes() == b""
@@ -0,0 +1,69 @@
+import pytest
+from palworld_save_tools.gvas import GvasFile
+
+import palworld_server_toolkit.editor as editor
+from palworld_server_toolkit.palobject import (PALWORLD_TYPE_HINTS, SKP_PALWORLD_CUSTOM_PROPERTIES, BatchParseItem,
+                                               MPMapProperty, PalObject)
+
+
+# sections over 1 MB are decoded into share memory by the worker pool and spliced per entry
+@pytest.fixture(params=[(False, 2000), (True, 2000), (False, 30000)], ids=["eager", "lazy", "multiprocess"])
+def load(request, monkeypatch, make_world_gvas):
+    lazy_load, n_entries = request.param
+    monkeypatch.setattr(editor, "args", type("args", (), {'lazy_load': lazy_load})(), raising=False)
+    raw_gvas = make_world_gvas(n_entries=n_entries)
+    loaded = []
+
+    def read():
+        gvas_file = editor.ProgressGvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, SKP_PALWORLD_CUSTOM_PROPERTIES)
+        assert gvas_file.tracker is not None
+        loaded.append(gvas_file.properties['worldSaveData']['value'])
+        return gvas_file, loaded[-1]
+
+    yield raw_gvas, read
+    # released by MappingCacheObject in the editor
+    for wsd in loaded:
+        for key in wsd:
+            if isinstance(wsd[key]['value'], MPMapProperty):
+                wsd[key]['value'].close()
+                wsd[key]['value'].release()
+
+
+def full_save(gvas_file):
+    return GvasFile.write(gvas_file, SKP_PALWORLD_CUSTOM_PROPERTIES)
+
+
+def test_untouched_save_is_the_original(load):
+    raw_gvas, read = load
+    gvas_file, wsd = read()
+    for entry in wsd['TestMap']['value']:
+        entry['value']['Value']['value']
+    assert gvas_file.write(SKP_PALWORLD_CUSTOM_PROPERTIES) == raw_gvas
+    assert gvas_file.tracker.stats['encoded'] == 0
+
+
+def edit_entries(wsd):
+    entries = wsd['TestMap']['value']
+    entries[5]['value']['Value']['value'] = 999
+    del entries[10]
+    entries.append({'key': 777777, 'value': {'Name': PalObject.StrProperty('new'), 'Value': PalObject.IntProperty(1)}})
+    wsd['Name']['value'] = "renamed"
+
+
+def edit_skipped_section(wsd):
+    BatchParseItem(wsd, ['ItemContainerSaveData'], False, use_mp=False)
+    wsd['ItemContainerSaveData']['value'][3]['key']['ID']['value'] = PalObject.EmptyUUID
+
+
+@pytest.mark.parametrize("edit", [edit_entries, edit_skipped_section])
+def test_incremental_save_equals_full_save(load, edit):
+    raw_gvas, read = load
+    gvas_file, wsd = read()
+    edit(wsd)
+    incremental = gvas_file.write(SKP_PALWORLD_CUSTOM_PROPERTIES)
+    assert incremental != raw_gvas
+    if gvas_file.tracker.stats['entries'] > 0:
+        assert gvas_file.tracker.stats['encoded_entries'] <= 2
+    gvas_file, wsd = read()
+    edit(wsd)
+    assert incremental == full_save(gvas_file)
@@ -0,0 +1,160 @@
+import random
+
+import pytest
+
+from palworld_server_toolkit.palobject import MappingCacheObject, PalObject, ReferenceGraph
+
+
+def uid(i):
+    return PalObject.toUUID("%08x-0000-0000-0000-%012x" % (i, i))
+
+
+class World:
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+        self.wsd = {
+            'CharacterSaveParameterMap': {'value': []},
+            'CharacterContainerSaveData': {'value': []},
+            'GroupSaveDataMap': {'value': []},
+        }
+        for i in range(8):
+            self.wsd['CharacterContainerSaveData']['value'].append(
+                {'key': {'ID': {'value': uid(100 + i)}}, 'value': {'Slots': {'value': {'values': []}}}})
+        for i in range(6):
+            self.wsd['GroupSaveDataMap']['value'].append({'key': uid(200 + i), 'value': {
+                'GroupType': {'value': {'value': "EPalGroupType::Guild" if i % 2 == 0 else "EPalGroupType::Neutral"}},
+                'RawData': {'value': {'group_id': uid(200 + i), 'individual_character_handle_ids': []}}}})
+        for _ in range(60):
+            self.wsd['CharacterSaveParameterMap']['value'].append(self.character())
+
+    def character(self):
+        rnd = self.rnd
+        params = {'SlotID': {'value': {'ContainerId': {'value': {'ID': {'value': uid(100 + rnd.randrange(8))}}},
+                                       'SlotIndex': {'value': 0}}}}
+        if rnd.random() < 0.3:
+            params['IsPlayer'] = {'value': True}
+        else:
+            params['OwnerPlayerUId'] = {'value': uid(300 + rnd.randrange(5))}
+        return {'key': {'PlayerUId': {'value': uid(300 + rnd.randrange(5))},
+                        'InstanceId': {'value': uid(400 + rnd.randrange(40))}},
+                'value': {'RawData': {'value': {'group_id': uid(200 + rnd.randrange(6)),
+                                                'object': {'SaveParameter': {'value': params}}}}}}
+
+    def edit(self, entry):
+        rnd = self.rnd
+        raw = entry['value']['RawData']['value']
+        params = raw['object']['SaveParameter']['value']
+        field = rnd.randrange(5)
+        if field == 0:
+            entry['key']['InstanceId']['value'] = uid(400 + rnd.randrange(40))
+        elif field == 1:
+            raw['group_id'] = uid(200 + rnd.randrange(6))
+        elif field == 2:
+            params['SlotID']['value']['ContainerId']['value']['ID']['value'] = uid(100 + rnd.randrange(8))
+        elif field == 3 and 'IsPlayer' in params:
+            del params['IsPlayer']
+            params['OwnerPlayerUId'] = {'value': uid(300 + rnd.randrange(5))}
+        else:
+            params.pop('OwnerPlayerUId', None)
+            params['IsPlayer'] = {'value': True}
+
+
+def grouped(mapping, attr):
+    """key -> ids of the entries of a unique index, the index head and its shadows"""
+    groups = {key: {id(entry)} for key, entry in getattr(mapping, attr).items()}
+    for key, shadows in mapping.IndexShadows.get(attr, {}).items():
+        assert key in groups, (attr, key)
+        groups[key].update(id(entry) for entry in shadows)
+    return groups
+
+
+def graph_edges(graph):
+    return sorted((record[0], str(record[1]), sorted(map(str, record[3]))) for record in graph.entries.values())
+
+
+def assert_same_as_rebuild(mapping, wsd):
+    mapping.Compact()
+    fresh = MappingCacheObject(wsd)
+    fresh.use_mp = False
+    for attr, (section, key_func, entry_filter) in MappingCacheObject.Indexes.items():
+        if section not in wsd:
+            continue
+        assert grouped(mapping, attr) == grouped(fresh, attr), attr
+    for attr, (section, key_func, entry_filter) in MappingCacheObject.MultiIndexes.items():
+        if section not in wsd:
+            continue
+        incremental = {key: set(entries) for key, entries in getattr(mapping, attr).items()}
+        assert incremental == {key: set(entries) for key, entries in getattr(fresh, attr).items()}, attr
+    graph = ReferenceGraph(fresh)
+    graph.Build(False)
+    assert graph_edges(mapping.ReferenceGraph) == graph_edges(graph)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_indexes_match_rebuild(seed):
+    world = World(seed)
+    rnd = world.rnd
+    mapping = MappingCacheObject(world.wsd)
+    mapping.use_mp = False
+    for attr, (section, key_func, entry_filter) in list(MappingCacheObject.Indexes.items()) + \
+            list(MappingCacheObject.MultiIndexes.items()):
+        if section in world.wsd:
+            getattr(mapping, attr)
+    mapping.ReferenceGraph
+    removed = []
+    section = 'CharacterSaveParameterMap'
+    for step in range(400):
+        live = [entry for entry in mapping.SectionList(section) if id(entry) not in mapping.Tombstones.get(section, {})]
+        op = rnd.randrange(6)
+        if op == 0:
+            mapping.InsertEntry(section, world.character())
+        elif op == 1 and removed:
+            # revive an entry, tombstoned or already compacted out
+            mapping.InsertEntry(section, removed.pop(rnd.randrange(len(removed))))
+        elif op == 2 and live:
+            entry = rnd.choice(live)
+            assert mapping.RemoveEntry(section, entry)
+            assert not mapping.RemoveEntry(section, entry)
+            removed.append(entry)
+        elif op == 3 and live:
+            entries = rnd.sample(live, min(len(live), 4))
+            assert mapping.RemoveEntries(section, entries + entries[:1]) == len(entries)
+            removed.extend(entries)
+        elif op == 4 and live:
+            entry = rnd.choice(live)
+            with mapping.Updating(section, entry):
+                world.edit(entry)
+        else:
+            group = rnd.choice(mapping.SectionList('GroupSaveDataMap'))
+            handles = group['value']['RawData']['value']['individual_character_handle_ids']
+            with mapping.Updating('GroupSaveDataMap', group):
+                if handles and rnd.random() < 0.5:
+                    handles.pop(rnd.randrange(len(handles)))
+                else:
+                    handles.append({'guid': uid(300 + rnd.randrange(5)), 'instance_id': uid(400 + rnd.randrange(40))})
+        if step % 50 == 49:
+            assert_same_as_rebuild(mapping, world.wsd)
+    assert_same_as_rebuild(mapping, world.wsd)
+
+
+def test_remove_entry_changed_outside_updating():
+    world = World(7)
+    mapping = MappingCacheObject(world.wsd)
+    mapping.use_mp = False
+    for attr, (section, key_func, entry_filter) in list(MappingCacheObject.Indexes.items()) + \
+            list(MappingCacheObject.MultiIndexes.items()):
+        if section in world.wsd:
+            getattr(mapping, attr)
+    mapping.ReferenceGraph
+    section = 'CharacterSaveParameterMap'
+    entry = mapping.SectionList(section)[0]
+    entry['key']['InstanceId']['value'] = uid(999)
+    entry['value']['RawData']['value']['object']['SaveParameter']['value']['SlotID']['value']['ContainerId'][
+        'value']['ID']['value'] = uid(998)
+    assert not mapping.InSection(section, entry)
+    assert mapping.RemoveEntry(section, entry)
+    assert not mapping.RemoveEntry(section, entry)
+    assert all(entry is not value for entries in mapping.CharactersBySlotContainer.values()
+               for value in entries.values())
+    assert_same_as_rebuild(mapping, world.wsd)
+    assert not mapping.RemoveEntry(section, entry)
@@ -0,0 +1,126 @@
+import random
+
+import pytest
+
+import palworld_server_toolkit.editor as editor
+from palworld_server_toolkit.palobject import MappingCacheObject, PalObject
+
+
+def uid(i):
+    return PalObject.toUUID("%08x-0000-0000-0000-%012x" % (i, i))
+
+
+def map_object(i, links, group_id=PalObject.EmptyUUID, base_camp_id=PalObject.EmptyUUID):
+    return {'MapObjectInstanceId': {'value': uid(i)}, 'Model': {'value': {
+        'RawData': {'value': {'build_player_uid': PalObject.EmptyUUID, 'group_id_belong_to': group_id,
+                              'base_camp_id_belong_to': base_camp_id,
+                              'owner_spawner_level_object_instance_id': PalObject.EmptyUUID}},
+        'Connector': {'value': {'RawData': {'value': {
+            'connect': {'any_place': [{'connect_to_model_instance_id': uid(link)} for link in links[:1]]},
+            'other_connectors': [{'connect': [{'connect_to_model_instance_id': uid(link)} for link in links[1:]]}]
+        }}}}}}}
+
+
+def guild(i, base_ids=(), base_points=()):
+    return {'key': uid(i), 'value': {'GroupType': {'value': {'value': "EPalGroupType::Guild"}}, 'RawData': {'value': {
+        'group_id': uid(i), 'guild_name': "g%d" % i, 'base_ids': list(map(uid, base_ids)),
+        'map_object_instance_ids_base_camp_points': list(map(uid, base_points)),
+        'players': [], 'individual_character_handle_ids': []}}}}
+
+
+def spawner_section():
+    return {'value': [{'value': {'SpawnerDataMapByLevelObjectInstanceId': {'value': []}}}]}
+
+
+def brute_clusters(entries):
+    """Live ids and connector links of entries, the entries in use for their id"""
+    live = {entry['MapObjectInstanceId']['value'] for entry in entries}
+    links = {}
+    for entry in entries:
+        for connect in editor.map_object_connections(entry):
+            if connect in live and connect != entry['MapObjectInstanceId']['value']:
+                links.setdefault(entry['MapObjectInstanceId']['value'], set()).add(connect)
+    return live, links
+
+
+def walk(start, links, directed):
+    edges = {}
+    for node, connects in links.items():
+        for connect in connects:
+            edges.setdefault(node, set()).add(connect)
+            if not directed:
+                edges.setdefault(connect, set()).add(node)
+    reached = {start}
+    pending = [start]
+    while pending:
+        for connect in edges.get(pending.pop(), ()):
+            if connect not in reached:
+                reached.add(connect)
+                pending.append(connect)
+    return reached
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_clusters_follow_inserts_and_removes(seed):
+    rnd = random.Random(seed)
+    count = 120
+
+    def random_map_object():
+        return map_object(rnd.randrange(count), [rnd.randrange(count + 20) for _ in range(rnd.choice([0, 1, 1, 2]))])
+
+    wsd = {'MapObjectSaveData': {'value': {'values': [random_map_object() for _ in range(count)]}},
+           'MapObjectSpawnerInStageSaveData': spawner_section()}
+    mapping = MappingCacheObject(wsd)
+    mapping.use_mp = False
+    mapping.MapObjectClusters
+    for step in range(300):
+        live_entries = [entry for entry in mapping.SectionList('MapObjectSaveData')
+                        if mapping.InSection('MapObjectSaveData', entry)]
+        if rnd.random() < 0.6:
+            mapping.InsertEntry('MapObjectSaveData', random_map_object())
+        else:
+            mapping.RemoveEntry('MapObjectSaveData', rnd.choice(live_entries))
+        if step % 10 == 0:
+            live, links = brute_clusters(list(mapping.MapObjectSaveData.values()))
+            query = uid(rnd.randrange(count))
+            expected = walk(query, links, False) if query in live else set()
+            assert mapping.MapObjectClusters.Cluster(query) == expected
+            expected = walk(query, links, True) if query in live else set()
+            assert mapping.MapObjectClusters.Reachable(query) == expected
+
+
+@pytest.fixture
+def base_camp_world(monkeypatch):
+    # 10 is the base camp point of guild 100, 11 hangs off it, 20 of guild 200 only connects into 10
+    wsd = {
+        'MapObjectSaveData': {'value': {'values': [
+            map_object(10, [11], uid(100), uid(1)),
+            map_object(11, [], uid(100), uid(1)),
+            map_object(20, [10], uid(200)),
+        ]}},
+        'MapObjectSpawnerInStageSaveData': spawner_section(),
+        'GroupSaveDataMap': {'value': [guild(100, [1], [10]), guild(200), guild(300)]},
+        'BaseCampSaveData': {'value': [{'key': uid(1), 'value': {
+            'RawData': {'value': {'id': uid(1), 'group_id_belong_to': uid(100),
+                                  'owner_map_object_instance_id': uid(10)}},
+            'WorkerDirector': {'value': {'RawData': {'value': {'container_id': uid(2)}}}}}}]},
+        'CharacterContainerSaveData': {'value': [
+            {'key': {'ID': {'value': uid(2)}}, 'value': {'Slots': {'value': {'values': []}}}}]},
+        'CharacterSaveParameterMap': {'value': []},
+    }
+    mapping = MappingCacheObject.get(wsd, use_mp=False)
+    monkeypatch.setattr(editor, "wsd", wsd)
+    monkeypatch.setattr(editor, "MappingCache", mapping)
+    monkeypatch.setattr(editor, "args", type("args", (), {'reduce_memory': True})(), raising=False)
+    yield wsd, mapping
+    MappingCacheObject._MappingCacheInstances.pop(id(wsd), None)
+
+
+def test_migrate_base_camp_keeps_neighbour_guild_structures(base_camp_world):
+    wsd, mapping = base_camp_world
+    assert mapping.MapObjectClusters.Cluster(uid(10)) == {uid(10), uid(11), uid(20)}
+    editor.MigrateBaseCamp(uid(1), uid(300))
+    groups = {str(entry['MapObjectInstanceId']['value']): entry['Model']['value']['RawData']['value'][
+        'group_id_belong_to'] for entry in mapping.SectionValues('MapObjectSaveData')}
+    assert groups == {str(uid(10)): uid(300), str(uid(11)): uid(300), str(uid(20)): uid(200)}
+    assert mapping.BaseCampMapping[uid(1)]['value']['RawData']['value']['group_id_belong_to'] == uid(300)
@@ -0,0 +1,50 @@
+import ctypes
+
+import msgpack
+import pytest
+
+from palworld_server_toolkit.palobject import MPMapObject, MPMapProperty
+
+
+@pytest.fixture
+def mp_map():
+    values = MPMapProperty(count=4, size=65536)
+    for i in range(4):
+        values.append({'key': i, 'value': {'v': i}})
+    yield values
+    values.close()
+    values.release()
+
+
+def test_replaced_unparsed_item_is_detached_on_close(mp_map):
+    replaced = mp_map[1]
+    assert isinstance(replaced, MPMapObject) and not replaced.parsed_value
+    mp_map[1] = {'key': 1, 'value': {'v': 11}}
+    mp_map.close()
+    assert replaced['value'] == {'v': 1}
+
+
+def test_failed_unpack_keeps_the_entry_bytes(mp_map):
+    broken = mp_map[2]
+    # 0xc1 is never used by msgpack
+    ctypes.memset(mp_map.memaddr + mp_map.index[2] + mp_map.key_size[2], 0xc1, 1)
+    with pytest.raises(msgpack.FormatError):
+        broken['value']
+    assert not broken.parsed_value
+    mp_map.close()
+    assert bytes(broken.value)[0] == 0xc1
+
+
+@pytest.mark.parametrize("remove", [
+    lambda values, entry: values.remove(entry),
+    lambda values, entry: values.pop(0),
+    lambda values, entry: values.__delitem__(0),
+    lambda values, entry: values.__setitem__(slice(None), [value for value in values if value is not entry]),
+])
+def test_removed_items_leave_origins(mp_map, remove):
+    entry = mp_map[0]
+    remove(mp_map, entry)
+    assert mp_map.closed
+    assert [value['key'] for value in mp_map] == [1, 2, 3]
+    assert all(origin is not entry for origin in mp_map.origins)
+    assert mp_map.origin_positions() == [1, 2, 3]
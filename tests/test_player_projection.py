@@ -0,0 +1,76 @@
+import pytest
+from palworld_save_tools.gvas import GvasFile
+from palworld_save_tools.palsav import compress_gvas_to_sav
+
+import palworld_server_toolkit.editor as editor
+from palworld_server_toolkit.palobject import (PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS, PalObject,
+                                               PlayerSaveCache, project_gvas, projection_tree)
+
+INVENTORY_CONTAINERS = ['CommonContainerId', 'DropSlotContainerId', 'EssentialContainerId', 'FoodEquipContainerId',
+                        'PlayerEquipArmorContainerId', 'WeaponLoadOutContainerId']
+
+
+def uid(i):
+    return PalObject.toUUID("%08x-0000-0000-0000-%012x" % (i, i))
+
+
+def struct(struct_type, value):
+    return {'id': None, 'type': 'StructProperty', 'struct_type': struct_type, 'struct_id': PalObject.EmptyUUID,
+            'value': value}
+
+
+def filler(size):
+    """Properties of the kinds a player save has between the container ids"""
+    return {'Level': PalObject.IntProperty(5), 'Flag': PalObject.BoolProperty(True),
+            'Name': PalObject.StrProperty("x" * 20), 'Kind': PalObject.EnumProperty("EPalX", "EPalX::A"),
+            'Bytes': PalObject.ArrayProperty("ByteProperty", {'values': bytes(n % 256 for n in range(size))}),
+            'Location': PalObject.Vector(1.0, 2.0, 3.0)}
+
+
+@pytest.fixture
+def player_gvas(make_gvas):
+    inventory = filler(1000)
+    inventory.update({key: PalObject.PalContainerId(uid(10 + n)) for n, key in enumerate(INVENTORY_CONTAINERS)})
+    save_data = filler(5000)
+    save_data.update({'PlayerUId': PalObject.Guid(uid(1)), 'IndividualId': PalObject.PalInstanceID(uid(2), uid(1)),
+                      'OtomoCharacterContainerId': PalObject.PalContainerId(uid(3)),
+                      'InventoryInfo': struct('PalPlayerDataInventoryInfo', inventory),
+                      'PalStorageContainerId': PalObject.PalContainerId(uid(4))})
+    save_data.update({'Tail%s' % key: value for key, value in filler(20000).items()})
+    return make_gvas({'Version': PalObject.IntProperty(3), 'SaveData': struct('PalPlayerSaveData', save_data)},
+                     "/Script/Pal.PalWorldPlayerSaveGame")
+
+
+def test_projection_equals_full_decode(player_gvas):
+    full = GvasFile.read(player_gvas, PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES).properties['SaveData']['value']
+    projected = project_gvas(player_gvas, editor.PLAYER_CONTAINER_PATHS).properties
+    assert list(projected) == ['SaveData']
+    save_data = projected['SaveData']['value']
+    assert set(save_data) == {'PlayerUId', 'IndividualId', 'OtomoCharacterContainerId', 'PalStorageContainerId',
+                              'InventoryInfo'}
+    for key in save_data:
+        if key != 'InventoryInfo':
+            assert save_data[key] == full[key], key
+    assert save_data['InventoryInfo']['value'] == {key: full['InventoryInfo']['value'][key]
+                                                   for key in INVENTORY_CONTAINERS}
+
+
+def test_missing_path_scans_to_the_end(player_gvas):
+    projected = project_gvas(player_gvas, ['SaveData.Missing', 'SaveData.PlayerUId', 'Version']).properties
+    assert projected['Version']['value'] == 3
+    assert list(projected['SaveData']['value']) == ['PlayerUId']
+
+
+def test_projection_tree_keeps_the_whole_parent():
+    assert projection_tree(['A', 'A.B']) == {'A': None}
+    assert projection_tree(['A.B', 'A']) == {'A': None}
+
+
+def test_player_save_cache_reuses_the_projection(tmp_path, player_gvas):
+    path = tmp_path / "00000001000000000000000000000000.sav"
+    path.write_bytes(compress_gvas_to_sav(player_gvas, 0x31))
+    cache = PlayerSaveCache()
+    projected = cache.Get(str(path), editor.PLAYER_CONTAINER_PATHS)
+    assert projected.properties['SaveData']['value']['PlayerUId']['value'] == uid(1)
+    assert cache.Get(str(path), reversed(editor.PLAYER_CONTAINER_PATHS)) is projected
+    assert cache.Get(str(tmp_path / "missing.sav"), editor.PLAYER_CONTAINER_PATHS) is None
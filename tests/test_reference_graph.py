@@ -0,0 +1,167 @@
+import pytest
+
+import palworld_server_toolkit.editor as editor
+from palworld_server_toolkit.palobject import MappingCacheObject, PalObject, ReferenceGraph
+
+
+def uid(i):
+    return PalObject.toUUID("%08x-0000-0000-0000-%012x" % (i, i))
+
+
+def slot(instance_id):
+    return {'IndividualId': {'value': {'PlayerUId': {'value': PalObject.EmptyUUID},
+                                       'InstanceId': {'value': PalObject.EmptyUUID}}},
+            'PermissionTribeID': {'value': {'value': "EPalTribeID::None"}},
+            'RawData': {'value': {'instance_id': instance_id}}}
+
+
+def character_container(i, instance_ids):
+    return {'key': {'ID': {'value': uid(i)}},
+            'value': {'Slots': {'value': {'values': [slot(instance_id) for instance_id in instance_ids]}}}}
+
+
+def character(instance_id, owner, container_id, slot_index, group_id, is_player=False):
+    params = {'CharacterID': {'value': "Pal"},
+              'SlotID': {'value': {'ContainerId': {'value': {'ID': {'value': container_id}}},
+                                   'SlotIndex': {'value': slot_index}}}}
+    if is_player:
+        params['IsPlayer'] = {'value': True}
+    else:
+        params['OwnerPlayerUId'] = {'value': owner}
+    return {'key': {'PlayerUId': {'value': owner if is_player else PalObject.EmptyUUID},
+                    'InstanceId': {'value': instance_id}},
+            'value': {'RawData': {'value': {'group_id': group_id, 'object': {'SaveParameter': {'value': params}}}}}}
+
+
+def item_container(i, dynamic_ids):
+    return {'key': {'ID': {'value': uid(i)}}, 'value': {
+        'BelongInfo': {'value': {'GroupID': {'value': PalObject.EmptyUUID}}},
+        'Slots': {'value': {'values': [
+            {'ItemId': {'value': {'StaticId': {'value': "Item"},
+                                  'DynamicId': {'value': {'LocalIdInCreatedWorld': {'value': dynamic_id}}}}}}
+            for dynamic_id in dynamic_ids]}}}}
+
+
+def dynamic_item(i):
+    return {'ID': {'value': {'LocalIdInCreatedWorld': {'value': uid(i)}}},
+            'RawData': {'value': {'id': {'local_id_in_created_world': uid(i)}}}}
+
+
+@pytest.fixture
+def world(monkeypatch):
+    group_id = uid(200)
+    wsd = {
+        'CharacterSaveParameterMap': {'value': [
+            character(uid(1001), uid(1), uid(100), 0, group_id, is_player=True),
+            character(uid(2001), uid(1), uid(100), 1, group_id),
+            character(uid(2002), uid(1), uid(101), 0, group_id),
+        ]},
+        'CharacterContainerSaveData': {'value': [
+            character_container(100, [uid(1001), uid(2001)]),
+            character_container(101, [uid(2002)]),
+            character_container(102, [PalObject.EmptyUUID, PalObject.EmptyUUID]),
+        ]},
+        'GroupSaveDataMap': {'value': [{'key': group_id, 'value': {
+            'GroupType': {'value': {'value': "EPalGroupType::Guild"}},
+            'RawData': {'value': {'group_id': group_id, 'guild_name': "guild",
+                                  'players': [{'player_uid': uid(1), 'player_info': {
+                                      'player_name': "p1", 'last_online_real_time': 0}}],
+                                  'individual_character_handle_ids': [
+                                      {'guid': uid(1), 'instance_id': uid(1001)},
+                                      {'guid': PalObject.EmptyUUID, 'instance_id': uid(2001)},
+                                      {'guid': PalObject.EmptyUUID, 'instance_id': uid(2002)}]}}}}]},
+        'ItemContainerSaveData': {'value': [item_container(300, [uid(400)]), item_container(301, [])]},
+        'DynamicItemSaveData': {'value': {'values': [dynamic_item(400)]}},
+        'MapObjectSaveData': {'value': {'values': []}},
+        'FoliageGridSaveDataMap': {'value': []},
+        'MapObjectSpawnerInStageSaveData': {'value': [{'value': {'SpawnerDataMapByLevelObjectInstanceId': {
+            'value': []}}}]},
+    }
+    mapping = MappingCacheObject.get(wsd, use_mp=False)
+    monkeypatch.setattr(editor, "wsd", wsd)
+    monkeypatch.setattr(editor, "MappingCache", mapping)
+    monkeypatch.setattr(editor, "args", type("args", (), {'reduce_memory': True})(), raising=False)
+    for attr, (section, key_func, entry_filter) in list(MappingCacheObject.Indexes.items()) + \
+            list(MappingCacheObject.MultiIndexes.items()):
+        if section in wsd:
+            getattr(mapping, attr)
+    mapping.ReferenceGraph
+    yield wsd, mapping
+    MappingCacheObject._MappingCacheInstances.pop(id(wsd), None)
+
+
+def graph_edges(graph):
+    return sorted((record[0], str(record[1]), sorted(map(str, record[3]))) for record in graph.entries.values())
+
+
+def assert_same_as_rebuild(mapping, wsd):
+    mapping.Compact()
+    fresh = MappingCacheObject(wsd)
+    fresh.use_mp = False
+    for attr, (section, key_func, entry_filter) in MappingCacheObject.MultiIndexes.items():
+        if section not in wsd:
+            continue
+        incremental = {key: set(entries) for key, entries in getattr(mapping, attr).items()}
+        assert incremental == {key: set(entries) for key, entries in getattr(fresh, attr).items()}, attr
+    graph = ReferenceGraph(fresh)
+    graph.Build(False)
+    assert graph_edges(mapping.ReferenceGraph) == graph_edges(graph)
+
+
+def test_slot_move_refers_the_target_container(world):
+    wsd, mapping = world
+    assert uid(102) not in mapping.ReferenceGraph.ReferencedIds('container')
+    pal = mapping.CharacterSaveParameterMap[uid(2002)]
+    assert editor.UpdateCharacterToSlot(pal, uid(102))
+    assert uid(102) in mapping.ReferenceGraph.ReferencedIds('container')
+    assert mapping.EntriesOf('CharactersBySlotContainer', uid(102)) == [pal]
+    assert_same_as_rebuild(mapping, wsd)
+
+
+def test_editor_edits_keep_graph_current(world):
+    wsd, mapping = world
+    editor.BindGuildInstanceId(uid(1), uid(1002))
+    assert mapping.ReferenceGraph.Referrers(uid(1001), 'instance') == \
+        [('CharacterContainerSaveData', uid(100), mapping.CharacterContainerSaveData[uid(100)])]
+    editor.CopyCharacterContainer(uid(101), wsd, new_container_id=uid(103))
+    editor.RepairCharacterContainer(uid(101))
+    assert_same_as_rebuild(mapping, wsd)
+
+
+@pytest.mark.parametrize("item_containers, reported", [
+    ([item_container(300, [uid(400)])], False),
+    ([item_container(300, [uid(400)]), item_container(301, [uid(400)])], True),
+])
+def test_dynamic_item_referred_outside_its_slot_is_reported(world, monkeypatch, item_containers, reported):
+    wsd, mapping = world
+    for entry in list(mapping.SectionList('ItemContainerSaveData')):
+        mapping.RemoveEntry('ItemContainerSaveData', entry)
+    for entry in item_containers:
+        mapping.InsertEntry('ItemContainerSaveData', entry)
+    printed = []
+    monkeypatch.setattr(editor, "gp", printed.append)
+    editor.DoubleCheckForDeleteItemContainers(uid(300), printout=False)
+    assert bool(printed) == reported
+
+
+@pytest.mark.parametrize("delete", [
+    lambda player_uid: editor.DeletePlayer(player_uid),
+    lambda player_uid: editor.BatchDeletePlayers([player_uid]),
+])
+def test_delete_player_finds_pals_given_to_the_player(world, monkeypatch, delete):
+    wsd, mapping = world
+    monkeypatch.setattr(editor, "GetPlayerGvas", lambda *args, **kwargs: (True, None, "missing.sav", None))
+    monkeypatch.setattr(editor, "LoadPlayerSaves", lambda *args, **kwargs: None)
+    monkeypatch.setattr(editor, "backup_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(editor, "delete_files", [], raising=False)
+    # re-owned like the attribute editor does it
+    pal = mapping.CharacterSaveParameterMap[uid(2002)]
+    with mapping.Updating('CharacterSaveParameterMap', pal):
+        pal['value']['RawData']['value']['object']['SaveParameter']['value']['OwnerPlayerUId']['value'] = uid(2)
+    # re-owned behind the indexes like PalEdit does it, then invalidated
+    pal = mapping.CharacterSaveParameterMap[uid(2001)]
+    pal['value']['RawData']['value']['object']['SaveParameter']['value']['OwnerPlayerUId']['value'] = uid(2)
+    mapping.Invalidate('CharacterSaveParameterMap')
+    delete(uid(2))
+    assert list(mapping.CharacterSaveParameterMap) == [uid(1001)]
+    assert_same_as_rebuild(mapping, wsd)
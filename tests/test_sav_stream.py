@@ -0,0 +1,61 @@
+import os
+import random
+import zlib
+
+import pytest
+from palworld_save_tools.palsav import compress_gvas_to_sav, decompress_sav_to_gvas
+
+from palworld_server_toolkit.palobject import ParallelDeflate, SavStreamWriter
+
+
+def write_stream(path, raw_gvas, save_type, threads=1, block=7777):
+    with SavStreamWriter(str(path), save_type, threads) as f:
+        for pos in range(0, len(raw_gvas), block):
+            f.write(raw_gvas[pos:pos + block])
+
+
+@pytest.mark.parametrize("save_type", [0x31, 0x32])
+def test_stream_matches_compress_gvas_to_sav(tmp_path, monkeypatch, make_world_gvas, save_type):
+    monkeypatch.setattr(SavStreamWriter, "ChunkSize", 4096)
+    raw_gvas = make_world_gvas()
+    path = tmp_path / "Level.sav"
+    path.write_bytes(b"old")
+    os.chmod(path, 0o640)
+    write_stream(path, raw_gvas, save_type, block=len(raw_gvas))
+    assert path.read_bytes() == compress_gvas_to_sav(raw_gvas, save_type)
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["Level.sav"]
+
+
+def test_failed_stream_keeps_the_target(tmp_path, make_world_gvas):
+    raw_gvas = make_world_gvas()
+    path = tmp_path / "Level.sav"
+    write_stream(path, raw_gvas, 0x32)
+    with pytest.raises(ZeroDivisionError):
+        with SavStreamWriter(str(path), 0x32, 1) as f:
+            f.write(b"x" * 100)
+            1 / 0
+    assert decompress_sav_to_gvas(path.read_bytes()) == (raw_gvas, 0x32)
+    assert os.listdir(tmp_path) == ["Level.sav"]
+
+
+@pytest.mark.parametrize("size", [0, 1, 4096, 4097, 3 * 4096 + 777])
+@pytest.mark.parametrize("block", [1, 1000, 4096, 20000])
+def test_parallel_deflate_is_one_zlib_stream(monkeypatch, size, block):
+    monkeypatch.setattr(ParallelDeflate, "BlockSize", 4096)
+    rnd = random.Random(size)
+    data = bytes(rnd.choice(b"abc") for _ in range(size))
+    compressor = ParallelDeflate(3)
+    compressed = b"".join([compressor.compress(data[pos:pos + block]) for pos in range(0, size, block)] +
+                          [compressor.flush()])
+    assert zlib.decompress(compressed) == data
+    assert int.from_bytes(compressed[-4:], "big") == zlib.adler32(data)
+
+
+@pytest.mark.parametrize("save_type", [0x31, 0x32])
+def test_parallel_stream_round_trip(tmp_path, monkeypatch, make_world_gvas, save_type):
+    monkeypatch.setattr(ParallelDeflate, "BlockSize", 16384)
+    raw_gvas = make_world_gvas()
+    path = tmp_path / "Level.sav"
+    write_stream(path, raw_gvas, save_type, threads=4)
+    assert decompress_sav_to_gvas(path.read_bytes()) == (raw_gvas, save_type)
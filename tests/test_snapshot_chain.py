@@ -0,0 +1,59 @@
+import os
+import random
+
+from palworld_server_toolkit.palobject import SnapshotChain
+
+
+def make_save(seed, count=20000):
+    rng = random.Random(seed)
+    return b"".join(b"entry%08d %08d None\x00" % (i, rng.randrange(10 ** 8)) for i in range(count))
+
+
+def read_version(chain, name):
+    raw_gvas, save_type = chain.materialize(name)
+    try:
+        return bytes(raw_gvas[:chain.entry(name)['size']]), save_type
+    finally:
+        raw_gvas.close()
+
+
+def test_small_change_is_stored_as_delta(tmp_path):
+    chain = SnapshotChain(str(tmp_path / "chain"), keyframe_interval=4)
+    first = make_save(1)
+    second = first[:1000] + b"changed" + first[1000:]
+    assert chain.add(first, 0x32, "v1")['kind'] == 'key'
+    assert chain.add(second, 0x32, "v2")['kind'] == 'delta'
+    assert chain.add(second, 0x32, "v3") is None
+    reopened = SnapshotChain(str(tmp_path / "chain"))
+    assert read_version(reopened, "v1") == (first, 0x32)
+    assert read_version(reopened, "v2") == (second, 0x32)
+
+
+def test_mostly_rewritten_save_falls_back_to_keyframe(tmp_path):
+    root = tmp_path / "chain"
+    chain = SnapshotChain(str(root), keyframe_interval=4)
+    versions = [make_save(1), make_save(2)]
+    versions.append(versions[1][:5000] + b"tail" + versions[1][5000:])
+    entries = [chain.add(raw_gvas, 0x31, "v%d" % i) for i, raw_gvas in enumerate(versions)]
+    assert [entry['kind'] for entry in entries] == ['key', 'key', 'delta']
+    assert 'base' not in entries[1]
+    assert os.path.exists(root / "v1.key")
+    assert not os.path.exists(root / "v1.delta")
+    assert entries[2]['base'] == "v1"
+    reopened = SnapshotChain(str(root))
+    for i, raw_gvas in enumerate(versions):
+        assert read_version(reopened, "v%d" % i) == (raw_gvas, 0x31)
+
+
+def test_delta_against_reopened_chain_closes_the_base(tmp_path, monkeypatch):
+    first = make_save(1)
+    second = first[:1000] + b"changed" + first[1000:]
+    SnapshotChain(str(tmp_path / "chain")).add(first, 0x32, "v1")
+    reopened = SnapshotChain(str(tmp_path / "chain"))
+    materialized = []
+    materialize = reopened.materialize
+    monkeypatch.setattr(reopened, "materialize", lambda name: materialized.append(materialize(name)) or
+                        materialized[-1])
+    assert reopened.add(second, 0x32, "v2")['kind'] == 'delta'
+    assert len(materialized) == 1 and materialized[0][0].closed
+    assert read_version(reopened, "v2") == (second, 0x32)
@@ -0,0 +1,94 @@
+import math
+import random
+import struct
+
+import palworld_coord
+import pytest
+
+from palworld_server_toolkit.palobject import MappingCacheObject, SpatialIndex
+
+
+def random_location(rnd, spread=700):
+    point = palworld_coord.map_to_sav(rnd.uniform(-spread, spread), rnd.uniform(-spread, spread))
+    return point.x, point.y, rnd.uniform(-1000, 1000)
+
+
+def map_object(rnd, i):
+    x, y, z = random_location(rnd)
+    if i % 2:
+        # WorldLocation left undecoded by SKP_PALWORLD_CUSTOM_PROPERTIES
+        location = {'skip_type': 'StructProperty', 'struct_type': 'Vector', 'value': struct.pack('<3d', x, y, z)}
+    else:
+        location = {'struct_type': 'Vector', 'value': {'x': x, 'y': y, 'z': z}}
+    return {'MapObjectInstanceId': {'value': i}, 'WorldLocation': location,
+            'Model': {'value': {'RawData': {'value': {}}}}}
+
+
+def base_camp(rnd, i, spread=700):
+    x, y, z = random_location(rnd, spread)
+    return {'key': 'b%d' % i, 'value': {'RawData': {'value': {
+        'name': 'b%d' % i, 'area_range': 3500.0, 'transform': {'translation': {'x': x, 'y': y, 'z': z}}}}}}
+
+
+def brute_points(mapping):
+    spatial = mapping.SpatialIndex
+    points = []
+    for entry in mapping.SectionValues('MapObjectSaveData'):
+        location = entry['WorldLocation']['value']
+        x, y = struct.unpack('<3d', location)[:2] if isinstance(location, bytes) else (location['x'], location['y'])
+        points.append(('MapObject', entry['MapObjectInstanceId']['value'], spatial.ToMap(x, y)))
+    for entry in mapping.SectionValues('BaseCampSaveData'):
+        translation = entry['value']['RawData']['value']['transform']['translation']
+        points.append(('BaseCamp', entry['key'], spatial.ToMap(translation['x'], translation['y'])))
+    return points
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_queries_follow_inserts_and_removes(seed):
+    rnd = random.Random(seed)
+    wsd = {'MapObjectSaveData': {'value': {'values': [map_object(rnd, i) for i in range(500)]}},
+           'BaseCampSaveData': {'value': [base_camp(rnd, i) for i in range(30)]}}
+    mapping = MappingCacheObject(wsd)
+    mapping.use_mp = False
+    mapping.BuildIndexes('MapObjectSaveData', mapping.SectionIndexes('MapObjectSaveData'))
+    spatial = mapping.SpatialIndex
+    for step in range(60):
+        if step % 3 == 0:
+            mapping.InsertEntry('MapObjectSaveData', map_object(rnd, 10000 + step))
+        elif step % 3 == 1:
+            mapping.RemoveEntry('MapObjectSaveData', rnd.choice(mapping.SectionValues('MapObjectSaveData')))
+        points = brute_points(mapping)
+        cx, cy, radius = rnd.uniform(-700, 700), rnd.uniform(-700, 700), rnd.uniform(0, 200)
+        brute = sorted((math.hypot(p[0] - cx, p[1] - cy), kind, key) for kind, key, p in points)
+        assert [(kind, key) for distance, kind, key in spatial.Radius(cx, cy, radius)] == \
+               [(kind, key) for distance, kind, key in brute if distance <= radius]
+        k = rnd.randrange(1, 20)
+        assert [round(distance, 6) for distance, kind, key in spatial.Nearest(cx, cy, k)] == \
+               [round(distance, 6) for distance, kind, key in brute[:k]]
+        x0, x1 = sorted(rnd.uniform(-700, 700) for _ in range(2))
+        y0, y1 = sorted(rnd.uniform(-700, 700) for _ in range(2))
+        assert set(spatial.Box((x0, x1), (y0, y1))) == {
+            (kind, key) for kind, key, p in points
+            if x0 - 1e-9 <= p[0] <= x1 + 1e-9 and y0 - 1e-9 <= p[1] <= y1 + 1e-9}
+
+
+def test_overlapping_base_camps():
+    rnd = random.Random(3)
+    wsd = {'MapObjectSaveData': {'value': {'values': []}},
+           'BaseCampSaveData': {'value': [base_camp(rnd, i, 100) for i in range(40)]}}
+    mapping = MappingCacheObject(wsd)
+    mapping.use_mp = False
+    mapping.BuildIndexes('MapObjectSaveData', mapping.SectionIndexes('MapObjectSaveData'))
+    translations = {entry['key']: entry['value']['RawData']['value']['transform']['translation']
+                    for entry in wsd['BaseCampSaveData']['value']}
+    # closer than the sum of both area ranges
+    brute = {(a, b) for a in translations for b in translations if str(a) < str(b) and math.hypot(
+        translations[a]['x'] - translations[b]['x'], translations[a]['y'] - translations[b]['y']) < 7000}
+    assert 0 < len(brute) < 40 * 39 // 2
+    assert {(a, b) for a, b, distance in mapping.SpatialIndex.OverlappingBaseCamps()} == brute
+
+
+def test_map_units_are_not_rounded():
+    spatial = SpatialIndex(MappingCacheObject({}))
+    point = palworld_coord.map_to_sav(123.5, -45.25)
+    assert spatial.ToMap(point.x, point.y) == pytest.approx((123.5, -45.25))
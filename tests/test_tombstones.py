@@ -0,0 +1,49 @@
+import pytest
+
+import palworld_server_toolkit.editor as editor
+from palworld_server_toolkit.palobject import MappingCacheObject, PalObject
+
+
+def uid(i):
+    return PalObject.toUUID("%08x-0000-0000-0000-%012x" % (i, i))
+
+
+def character(i, is_player=True):
+    params = {'IsPlayer': {'value': is_player}, 'NickName': {'value': "p%d" % i}, 'Level': {'value': i}}
+    return {'key': {'PlayerUId': {'value': uid(i) if is_player else PalObject.EmptyUUID},
+                    'InstanceId': {'value': uid(1000 + i)}},
+            'value': {'RawData': {'value': {'group_id': PalObject.EmptyUUID, 'object': {'SaveParameter': {
+                'struct_type': 'PalIndividualCharacterSaveParameter', 'value': params}}}}}}
+
+
+@pytest.fixture
+def world(monkeypatch):
+    wsd = {'CharacterSaveParameterMap': {'value': [character(i, i % 4 != 0) for i in range(1, 21)]}}
+    mapping = MappingCacheObject.get(wsd, use_mp=False)
+    monkeypatch.setattr(editor, "wsd", wsd)
+    monkeypatch.setattr(editor, "MappingCache", mapping)
+    monkeypatch.setattr(editor, "args", type("args", (), {'reduce_memory': True})(), raising=False)
+    yield wsd, mapping
+    MappingCacheObject._MappingCacheInstances.pop(id(wsd), None)
+
+
+def test_load_players_skips_removed_entries(world):
+    wsd, mapping = world
+    entries = list(mapping.SectionList('CharacterSaveParameterMap'))
+    removed = [entry for entry in entries if entry['value']['RawData']['value']['object']['SaveParameter'][
+        'value']['Level']['value'] in (1, 2, 5, 8)]
+    assert mapping.RemoveEntries('CharacterSaveParameterMap', removed) == len(removed)
+    # still pending compaction in the raw list
+    assert len(wsd['CharacterSaveParameterMap']['value']) == 20
+    players = editor.LoadPlayers(wsd)
+    assert sorted(players) == sorted(str(uid(i)) for i in range(1, 21) if i % 4 != 0 and i not in (1, 2, 5))
+    assert all(entry not in removed for entry in wsd['CharacterSaveParameterMap']['value'])
+
+
+def test_load_players_sees_revived_entries(world):
+    wsd, mapping = world
+    entry = mapping.SectionList('CharacterSaveParameterMap')[0]
+    mapping.RemoveEntry('CharacterSaveParameterMap', entry)
+    assert str(uid(1)) not in editor.LoadPlayers(wsd)
+    mapping.InsertEntry('CharacterSaveParameterMap', entry)
+    assert editor.LoadPlayers(wsd)[str(uid(1))]['NickName'] == "p1"